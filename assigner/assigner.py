@@ -1,4 +1,6 @@
-from sklearn.cluster import KMeans
+import numpy as np
+
+from utils import progress
 
 
 class TeamAssigner:
@@ -24,6 +26,10 @@ class TeamAssigner:
         # Cache de asignaciones por jugador para mantener consistencia
         # Formato: {player_id: team_id}
         self.player_team_dict = {}
+        
+        # Cache de colores muestreados por track (no se vuelven a recortar)
+        # Formato: {player_id: [color, ...]}
+        self.track_colors = {}
     
     def get_clustering_model(self, image):
         """
@@ -38,6 +44,9 @@ class TeamAssigner:
         # Convertir imagen 3D (altura, ancho, canales) a matriz 2D (píxeles, RGB)
         image_2d = image.reshape(-1, 3)
 
+        # sklearn se importa solo al asignar equipos (arranque más rápido)
+        from sklearn.cluster import KMeans
+
         # Configurar y entrenar modelo K-means con 2 clusters
         # Un cluster para la camiseta del jugador, otro para el fondo
         kmeans = KMeans(n_clusters=2, init="k-means++", n_init=1)
@@ -57,8 +66,25 @@ class TeamAssigner:
             array: Color RGB dominante de la camiseta
         """
         # Recortar región del jugador usando las coordenadas del bounding box
-        player_region = frame[int(bbox[1]):int(bbox[3]), int(bbox[0]):int(bbox[2])]
+        return self.get_crop_color(self.crop_player(frame, bbox))
+
+    @staticmethod
+    def crop_player(frame, bbox):
+        """
+        Recorta la región de un jugador (vista sobre el frame, sin copia).
+        """
+        return frame[int(bbox[1]):int(bbox[3]), int(bbox[0]):int(bbox[2])]
 
+    def get_crop_color(self, player_region):
+        """
+        Extrae el color dominante de la camiseta a partir del recorte de un jugador.
+        
+        Args:
+            player_region: Recorte del jugador (ver crop_player)
+            
+        Returns:
+            array: Color RGB dominante de la camiseta
+        """
         # Enfocarse en la mitad superior donde típicamente está la camiseta
         # Esto evita confusión con pantalones, césped, etc.
         top_half_image = player_region[0:int(player_region.shape[0]/2), :]
@@ -107,6 +133,8 @@ class TeamAssigner:
             player_color = self.get_player_color(frame, bbox)
             player_colors.append(player_color)
         
+        from sklearn.cluster import KMeans
+
         # Aplicar clustering global para separar jugadores en dos equipos
         kmeans = KMeans(n_clusters=2, init="k-means++", n_init=10)
         kmeans.fit(player_colors)
@@ -137,11 +165,18 @@ class TeamAssigner:
         # Extraer color dominante del jugador actual
         player_color = self.get_player_color(frame, player_bbox)
 
-        # Clasificar color usando el modelo de equipos entrenado
-        team_id = self.kmeans.predict(player_color.reshape(1, -1))[0]
+        return self._classify_track(player_id, [player_color])
+
+    def _classify_track(self, player_id, player_colors):
+        """
+        Asigna el equipo de un track por mayoría entre sus colores muestreados
+        y lo guarda en player_team_dict.
+        """
+        # Clasificar colores usando el modelo de equipos entrenado
+        votes = self.kmeans.predict(np.array(player_colors))
         
         # Convertir de índice (0,1) a ID de equipo (1,2)
-        team_id += 1
+        team_id = int(np.bincount(votes, minlength=2).argmax()) + 1
 
         # Caso especial: corrección manual para jugador específico
         # Esto podría ser un portero o caso edge detectado manualmente
@@ -151,4 +186,86 @@ class TeamAssigner:
         # Guardar en cache para futuras consultas
         self.player_team_dict[player_id] = team_id
 
-        return team_id
\ No newline at end of file
+        return team_id
+
+    def collect_track_crops(self, frames, player_tracks, num_samples=5):
+        """
+        Recorta unas pocas detecciones por track, repartidas a lo largo de su vida.
+        
+        Los frames necesarios se recorren una sola vez y en orden, así que frames
+        puede ser una lista o una fuente que decodifique bajo demanda (FrameSource):
+        solo se conservan los recortes, no los frames.
+        
+        Args:
+            frames: Frames del video (lista o FrameSource)
+            player_tracks (list): Tracks de jugadores por frame
+            num_samples (int): Recortes por track
+            
+        Returns:
+            dict: {player_id: [recorte, ...]} para los tracks sin equipo asignado
+        """
+        frames_by_id = {}
+        for frame_num, frame_players in enumerate(player_tracks):
+            for player_id in frame_players:
+                frames_by_id.setdefault(player_id, []).append(frame_num)
+
+        # Planificar qué detecciones se recortan: {frame: [player_id, ...]}
+        wanted = {}
+        for player_id, track_frames in frames_by_id.items():
+            if player_id in self.player_team_dict or player_id in self.track_colors:
+                continue
+            sample_idx = np.linspace(0, len(track_frames) - 1, min(num_samples, len(track_frames)))
+            sampled = []
+            for idx in np.unique(sample_idx.astype(int)):
+                bbox = player_tracks[track_frames[idx]][player_id]['bbox']
+                # Recortes demasiado pequeños no dan un color fiable
+                if bbox[3] - bbox[1] >= 4 and bbox[2] - bbox[0] >= 2:
+                    sampled.append(track_frames[idx])
+            for frame_num in sampled or track_frames[:1]:
+                wanted.setdefault(frame_num, []).append(player_id)
+
+        crops = {}
+        for frame_num in progress.track(sorted(wanted), "team_crops"):
+            frame = frames[frame_num]
+            for player_id in wanted[frame_num]:
+                crop = self.crop_player(frame, player_tracks[frame_num][player_id]['bbox'])
+                crops.setdefault(player_id, []).append(crop.copy())
+        return crops
+
+    def assign_track_teams(self, frames, player_tracks, num_samples=5):
+        """
+        Asigna un equipo por track a partir de unos pocos recortes muestreados,
+        en lugar de clasificar cada detección.
+        
+        Los recortes se toman repartidos a lo largo de la vida del track y el
+        equipo se decide por mayoría, lo que tolera oclusiones puntuales.
+        Requiere haber llamado antes a assign_team_color.
+        
+        Args:
+            frames: Frames del video (lista o FrameSource)
+            player_tracks (list): Tracks de jugadores por frame
+            num_samples (int): Recortes por track
+            
+        Returns:
+            dict: Tabla {player_id: team_id}
+        """
+        crops = self.collect_track_crops(frames, player_tracks, num_samples)
+        for player_id, track_crops in progress.track(crops.items(), "teams"):
+            self.track_colors[player_id] = [self.get_crop_color(crop) for crop in track_crops]
+
+        for frame_players in player_tracks:
+            for player_id in frame_players:
+                if player_id not in self.player_team_dict:
+                    self._classify_track(player_id, self.track_colors[player_id])
+
+        return self.player_team_dict
+
+    def broadcast_teams(self, player_tracks):
+        """
+        Escribe el equipo de la tabla por track en cada detección (in-place).
+        
+        Solo se guarda el ID de equipo; el color se consulta en team_colors.
+        """
+        for frame_players in player_tracks:
+            for player_id, player in frame_players.items():
+                player['team'] = self.player_team_dict[player_id]
\ No newline at end of file
@@ -0,0 +1,326 @@
+"""
+Comprobación de regresiones entre modos del pipeline.
+
+Ejecuta el pipeline sobre un clip en un modo de referencia y en uno o varios
+modos a comprobar (otro backend, --headless, --imgsz, --ball-roi, ...) y compara
+sus salidas con la referencia: detecciones emparejadas por IoU (recall,
+precisión, IoU medio), cambios de ID, equipos, posesión, velocidad y distancia.
+Termina con código 1 si algún modo se sale de las tolerancias.
+
+Cada modo se indica con opciones de main.py separadas por comas ('' es la
+configuración por defecto); el modelo se carga una sola vez y cada modo usa
+sus propios stubs, sin cache.
+
+Uso:
+    python -m benchmarks.regression_check -i clip.mp4 -m best.pt --max-frames 300 \\
+        --candidate headless --candidate tracker=iou --candidate "headless,imgsz=640"
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import build_parser, run_analysis, resolve_input_path, resolve_model_path
+
+# Objetos que se comparan y tolerancias por defecto
+COMPARED_OBJECTS = ("players", "referees", "ball")
+DEFAULT_TOLERANCES = {
+    "min_recall": 0.95,
+    "min_precision": 0.95,
+    "min_mean_iou": 0.8,
+    "max_id_switches": 5,
+    "min_team_agreement": 0.95,
+    "max_possession_delta": 2.0,
+    "max_speed_delta": 1.0,
+    "max_distance_delta": 5.0,
+}
+
+
+def parse_mode(spec):
+    """
+    Convierte 'headless,tracker=iou' en {'headless': True, 'tracker': 'iou'}.
+    """
+    options = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        options[name.strip().replace("-", "_")] = value.strip() if value else True
+    return options
+
+
+def trim_clip(input_path, output_path, max_frames):
+    """
+    Copia los primeros max_frames frames del video (para comprobaciones rápidas).
+    """
+    import cv2
+    from utils import get_video_fps
+
+    video_capture = cv2.VideoCapture(input_path)
+    out = None
+    for _ in range(max_frames):
+        frame_exists, frame = video_capture.read()
+        if not frame_exists:
+            break
+        if out is None:
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'XVID'), get_video_fps(input_path),
+                                  (frame.shape[1], frame.shape[0]))
+        out.write(frame)
+    video_capture.release()
+    if out is not None:
+        out.release()
+    return output_path
+
+
+def run_mode(input_path, model_path, options, work_dir, model=None):
+    """
+    Ejecuta el pipeline en un modo con sus propios stubs y salida.
+
+    Returns:
+        tuple: (dict con 'tracks', 'team_ball_control' y 'frame_rate', segundos empleados)
+    """
+    from service.analysis_service import options_to_argv
+
+    argv = ["-i", input_path, "-m", model_path, "-o", os.path.join(work_dir, "output"),
+            "--stub-dir", os.path.join(work_dir, "stubs"), "--no-cache"] + options_to_argv(options)
+    outputs = {}
+    start = time.perf_counter()
+    run_analysis(build_parser().parse_args(argv), model=model, outputs=outputs)
+    return outputs, time.perf_counter() - start
+
+
+def match_detections(reference, candidate, iou_threshold):
+    """
+    Empareja las detecciones de un frame por IoU (de mayor a menor, una a una).
+
+    Args:
+        reference (dict): {track_id: info} de la referencia
+        candidate (dict): {track_id: info} del modo comprobado
+
+    Returns:
+        list: Tuplas (id de referencia, id comprobado, IoU)
+    """
+    from trackers.tracker_backends import box_iou
+
+    if not reference or not candidate:
+        return []
+    reference_ids, candidate_ids = list(reference), list(candidate)
+    iou = box_iou(np.array([reference[i]["bbox"] for i in reference_ids], dtype=np.float64),
+                  np.array([candidate[i]["bbox"] for i in candidate_ids], dtype=np.float64))
+
+    pairs, used_reference, used_candidate = [], set(), set()
+    for flat in np.argsort(-iou, axis=None):
+        row, col = divmod(int(flat), iou.shape[1])
+        if iou[row, col] < iou_threshold:
+            break
+        if row in used_reference or col in used_candidate:
+            continue
+        used_reference.add(row)
+        used_candidate.add(col)
+        pairs.append((reference_ids[row], candidate_ids[col], float(iou[row, col])))
+    return pairs
+
+
+def compare_objects(reference_tracks, candidate_tracks, iou_threshold=0.5):
+    """
+    Compara las detecciones de un objeto frame a frame.
+
+    Un cambio de ID se cuenta cuando un track de la referencia pasa a emparejarse
+    con un ID distinto del modo comprobado (como en CLEAR-MOT).
+
+    Returns:
+        dict: 'recall', 'precision', 'mean_iou', 'id_switches' y los pares emparejados
+              como {frame: [(id referencia, id comprobado), ...]}
+    """
+    num_reference = num_candidate = 0
+    ious, matches = [], {}
+    last_match, id_switches = {}, 0
+    for frame_num, (reference, candidate) in enumerate(zip(reference_tracks, candidate_tracks)):
+        num_reference += len(reference)
+        num_candidate += len(candidate)
+        pairs = match_detections(reference, candidate, iou_threshold)
+        matches[frame_num] = [(reference_id, candidate_id) for reference_id, candidate_id, _ in pairs]
+        for reference_id, candidate_id, iou in pairs:
+            ious.append(iou)
+            if last_match.get(reference_id, candidate_id) != candidate_id:
+                id_switches += 1
+            last_match[reference_id] = candidate_id
+
+    return {
+        "recall": len(ious) / num_reference if num_reference else 1.0,
+        "precision": len(ious) / num_candidate if num_candidate else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 1.0,
+        "id_switches": id_switches,
+        "matches": matches,
+    }
+
+
+def team_mapping(reference_players, candidate_players, matches):
+    """
+    Equipo de la referencia que corresponde a cada equipo comprobado (el número
+    de equipo del KMeans puede salir intercambiado) y porcentaje de acuerdo.
+
+    Returns:
+        tuple: ({equipo comprobado: equipo de referencia}, acuerdo entre 0 y 1)
+    """
+    same = swapped = 0
+    for frame_num, pairs in matches.items():
+        for reference_id, candidate_id in pairs:
+            reference_team = reference_players[frame_num][reference_id].get("team")
+            candidate_team = candidate_players[frame_num][candidate_id].get("team")
+            same += reference_team == candidate_team
+            swapped += {reference_team, candidate_team} == {1, 2}
+
+    total = sum(len(pairs) for pairs in matches.values())
+    if swapped > same:
+        return {1: 2, 2: 1}, swapped / total
+    return {1: 1, 2: 2}, same / total if total else 1.0
+
+
+def compare_outputs(reference, candidate, iou_threshold=0.5):
+    """
+    Compara las salidas de dos ejecuciones (ver run_mode).
+
+    Returns:
+        dict: Métricas por objeto y del partido
+    """
+    metrics = {}
+    for object_name in COMPARED_OBJECTS:
+        metrics[object_name] = compare_objects(reference["tracks"].get(object_name, []),
+                                               candidate["tracks"].get(object_name, []), iou_threshold)
+
+    reference_players = reference["tracks"]["players"]
+    candidate_players = candidate["tracks"]["players"]
+    player_matches = metrics["players"]["matches"]
+    mapping, team_agreement = team_mapping(reference_players, candidate_players, player_matches)
+
+    # Posesión con los equipos comprobados renombrados como en la referencia
+    reference_control = np.asarray(reference["team_ball_control"])
+    candidate_control = np.asarray(candidate["team_ball_control"])
+    candidate_control = np.vectorize(lambda team: mapping.get(team, team), otypes=[np.int64])(candidate_control) \
+        if candidate_control.size else candidate_control
+    num_frames = min(len(reference_control), len(candidate_control))
+    possession_delta = max(
+        abs(np.mean(reference_control == team) - np.mean(candidate_control == team)) * 100 if num_frames else 0.0
+        for team in (1, 2)
+    )
+
+    # Velocidad de las detecciones emparejadas y distancia total de los jugadores
+    speed_deltas = []
+    for frame_num, pairs in player_matches.items():
+        for reference_id, candidate_id in pairs:
+            reference_speed = reference_players[frame_num][reference_id].get("speed")
+            candidate_speed = candidate_players[frame_num][candidate_id].get("speed")
+            if reference_speed is not None and candidate_speed is not None:
+                speed_deltas.append(abs(reference_speed - candidate_speed))
+
+    def total_distance(player_tracks):
+        final = {}
+        for frame_players in player_tracks:
+            for player_id, player in frame_players.items():
+                final[player_id] = max(final.get(player_id, 0.0), player.get("distance") or 0.0)
+        return sum(final.values())
+
+    reference_distance = total_distance(reference_players)
+    candidate_distance = total_distance(candidate_players)
+    distance_delta = (abs(candidate_distance - reference_distance) / reference_distance * 100
+                      if reference_distance else abs(candidate_distance))
+
+    for object_metrics in metrics.values():
+        object_metrics.pop("matches")
+    metrics.update(
+        frames=(len(reference_players), len(candidate_players)),
+        team_agreement=team_agreement,
+        possession_delta=float(possession_delta),
+        possession_agreement=float(np.mean(reference_control[:num_frames] == candidate_control[:num_frames]))
+                             if num_frames else 1.0,
+        speed_delta=float(np.mean(speed_deltas)) if speed_deltas else 0.0,
+        distance_delta=float(distance_delta),
+    )
+    return metrics
+
+
+def check_tolerances(metrics, tolerances):
+    """
+    Returns:
+        list: Descripción de cada tolerancia superada (vacía si el modo pasa)
+    """
+    failures = []
+    if metrics["frames"][0] != metrics["frames"][1]:
+        failures.append(f"número de frames distinto: {metrics['frames'][0]} != {metrics['frames'][1]}")
+    for object_name in COMPARED_OBJECTS:
+        object_metrics = metrics[object_name]
+        for key in ("recall", "precision", "mean_iou"):
+            if object_metrics[key] < tolerances[f"min_{key}"]:
+                failures.append(f"{object_name} {key} {object_metrics[key]:.3f} < {tolerances[f'min_{key}']}")
+        if object_metrics["id_switches"] > tolerances["max_id_switches"]:
+            failures.append(f"{object_name} id_switches {object_metrics['id_switches']} > {tolerances['max_id_switches']}")
+    if metrics["team_agreement"] < tolerances["min_team_agreement"]:
+        failures.append(f"team_agreement {metrics['team_agreement']:.3f} < {tolerances['min_team_agreement']}")
+    for key in ("possession_delta", "speed_delta", "distance_delta"):
+        if metrics[key] > tolerances[f"max_{key}"]:
+            failures.append(f"{key} {metrics[key]:.2f} > {tolerances[f'max_{key}']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobación de regresiones entre modos del pipeline")
+    parser.add_argument("-i", "--input", required=True, help="Clip de referencia")
+    parser.add_argument("-m", "--model", default="best.pt", help="Modelo YOLO (default: best.pt)")
+    parser.add_argument("--reference", default="", help="Opciones del modo de referencia (default: ninguna)")
+    parser.add_argument("--candidate", action="append", required=True,
+                        help="Opciones de un modo a comprobar, separadas por comas (repetible)")
+    parser.add_argument("--max-frames", type=int, default=None, help="Usar solo los primeros N frames")
+    parser.add_argument("--iou-threshold", type=float, default=0.5, help="IoU mínimo para emparejar detecciones")
+    parser.add_argument("--work-dir", default=None, help="Directorio de trabajo (default: temporal)")
+    parser.add_argument("--report", default=None, help="Guardar las métricas en un JSON")
+    for name, value in DEFAULT_TOLERANCES.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value,
+                            help=f"Tolerancia (default: {value})")
+    args = parser.parse_args()
+    tolerances = {name: getattr(args, name) for name in DEFAULT_TOLERANCES}
+
+    from service.analysis_service import load_yolo_model
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="regression_")
+    input_path = resolve_input_path(args.input)
+    if args.max_frames:
+        input_path = trim_clip(input_path, os.path.join(work_dir, "clip.avi"), args.max_frames)
+    model_path = resolve_model_path(args.model)
+    model = load_yolo_model(model_path)
+
+    modes = [args.reference] + args.candidate
+    runs = []
+    for index, spec in enumerate(modes):
+        outputs, elapsed = run_mode(input_path, model_path, parse_mode(spec), os.path.join(work_dir, f"mode_{index}"), model)
+        runs.append(outputs)
+        print(f"[{'referencia' if index == 0 else f'modo {index}'}] '{spec}': {elapsed:.1f} s")
+
+    report, failed = [], False
+    print()
+    print(f"{'Modo':<28}{'Recall':>8}{'Precisión':>11}{'IoU':>7}{'Cambios ID':>12}{'Posesión Δ':>12}"
+          f"{'Vel. Δ':>8}{'Dist. Δ%':>10}  Resultado")
+    for spec, outputs in zip(args.candidate, runs[1:]):
+        metrics = compare_outputs(runs[0], outputs, args.iou_threshold)
+        failures = check_tolerances(metrics, tolerances)
+        failed = failed or bool(failures)
+        players = metrics["players"]
+        print(f"{spec or '(defecto)':<28}{players['recall']:>8.3f}{players['precision']:>11.3f}"
+              f"{players['mean_iou']:>7.3f}{players['id_switches']:>12}{metrics['possession_delta']:>12.2f}"
+              f"{metrics['speed_delta']:>8.2f}{metrics['distance_delta']:>10.2f}  {'FALLA' if failures else 'OK'}")
+        for failure in failures:
+            print(f"    - {failure}")
+        report.append({"mode": spec, "metrics": metrics, "failures": failures})
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"reference": args.reference, "tolerances": tolerances, "modes": report}, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark del tiempo de arranque de main.py.
+
+Mide el tiempo de pared (mediana de varias ejecuciones) de los caminos que no
+deberían cargar librerías pesadas (--help y error de validación de entrada) y
+de una ejecución completa servida desde stubs (un clip sintético con sus stubs
+de tracking y de movimiento de cámara), y lista qué librerías pesadas quedan
+importadas en cada caso. La ejecución con cache no debe importar torch ni
+ultralytics: si lo hace, el benchmark termina con código 1.
+
+Uso:
+    python -m benchmarks.startup_benchmark --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("cv2", "numpy", "torch", "ultralytics", "supervision", "sklearn", "pandas", "scipy")
+
+# Ejecuta main() con los argumentos dados y muestra las librerías pesadas cargadas
+PROBE = """
+import sys
+sys.argv = ['main.py'] + {args!r}
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print('MODULES:' + ','.join(m for m in {modules!r} if m in sys.modules))
+"""
+
+SCENARIOS = {
+    "help": ["--help"],
+    "entrada inválida": ["-i", "__no_existe__.mp4"],
+}
+
+# Librerías que cada escenario no puede importar
+FORBIDDEN_MODULES = {
+    "cache": ("torch", "ultralytics"),
+}
+
+
+def make_cached_run(directory, num_frames=48):
+    """
+    Crea un clip sintético, un modelo vacío y los stubs de tracking y de movimiento
+    de cámara, de forma que main.py no necesite el modelo YOLO.
+
+    Returns:
+        list: Argumentos de main.py para la ejecución servida desde stubs
+    """
+    import cv2
+    import numpy as np
+
+    sys.path.insert(0, ROOT_DIR)
+    from utils import atomic_pickle_dump, PackedTracks
+
+    width, height = 640, 360
+    video_path = os.path.join(directory, "clip.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"XVID"), 24, (width, height))
+    shirts = [(0, 0, 200), (200, 0, 0)] * 3
+    tracks = {"players": [], "referees": [], "ball": []}
+    for frame_num in range(num_frames):
+        frame = np.full((height, width, 3), (40, 140, 40), dtype=np.uint8)
+        players = {}
+        for player_id, color in enumerate(shirts, start=1):
+            x1, y1 = 60 + player_id * 80 + frame_num, 120 + (player_id % 2) * 80
+            bbox = [x1, y1, x1 + 30, y1 + 70]
+            cv2.rectangle(frame, (x1, y1), (x1 + 30, y1 + 70), color, -1)
+            players[player_id] = {"bbox": bbox}
+        writer.write(frame)
+        tracks["players"].append(players)
+        tracks["referees"].append({})
+        tracks["ball"].append({1: {"bbox": [300 + frame_num, 300, 310 + frame_num, 310]}})
+    writer.release()
+
+    stub_dir = os.path.join(directory, "stubs")
+    os.makedirs(stub_dir)
+    atomic_pickle_dump(PackedTracks.pack(tracks), os.path.join(stub_dir, "track_stubs.pkl"))
+    atomic_pickle_dump([[0, 0]] * num_frames, os.path.join(stub_dir, "camera_movement_stub.pkl"))
+
+    # main.py solo comprueba que el modelo exista; con el stub nunca lo carga
+    model_path = os.path.join(directory, "model.pt")
+    open(model_path, "wb").close()
+
+    return ["-i", video_path, "-m", model_path, "--stub-dir", stub_dir, "-o", os.path.join(directory, "out")]
+
+
+def time_scenario(args, runs):
+    """
+    Returns:
+        tuple: (mediana en segundos, librerías pesadas importadas)
+
+    Raises:
+        RuntimeError: Si main.py falla
+    """
+    times = []
+    modules = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(args=args, modules=HEAVY_MODULES)],
+            cwd=ROOT_DIR, capture_output=True, text=True
+        )
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "main.py falló")
+        for line in result.stdout.splitlines():
+            if line.startswith("MODULES:"):
+                modules = line[len("MODULES:"):]
+    return statistics.median(times), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de arranque de main.py")
+    parser.add_argument("--runs", type=int, default=5, help="Ejecuciones por escenario (default: 5)")
+    args = parser.parse_args()
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        scenarios = dict(SCENARIOS, cache=make_cached_run(tmp_dir))
+
+        print(f"{'Escenario':<20}{'Mediana (s)':>12}  Librerías pesadas importadas")
+        for name, scenario_args in scenarios.items():
+            median, modules = time_scenario(scenario_args, args.runs)
+            print(f"{name:<20}{median:>12.3f}  {modules or '-'}")
+
+            loaded = set(modules.split(",")) & set(FORBIDDEN_MODULES.get(name, ()))
+            if loaded:
+                failed.append(f"{name}: importa {', '.join(sorted(loaded))}")
+
+    if failed:
+        print("ERROR: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
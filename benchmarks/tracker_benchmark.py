@@ -0,0 +1,133 @@
+"""
+Benchmark de backends de seguimiento sobre un clip de referencia.
+
+Ejecuta la detección YOLO una sola vez y pasa las mismas detecciones a cada
+backend, midiendo el throughput del seguimiento (frames por segundo) y una
+estimación de cambios de ID: nacimientos de IDs nuevos que solapan con un
+track que terminó poco antes (el mismo jugador con otro ID).
+
+Uso:
+    python -m benchmarks.tracker_benchmark -i clip.mp4 -m best.pt --max-frames 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import resolve_input_path, resolve_model_path
+
+
+def count_id_switches(object_tracks, max_gap=30, iou_threshold=0.3):
+    """
+    Estima los cambios de ID sin ground truth.
+
+    Cuenta los tracks que aparecen después del primer frame y cuyo primer bbox
+    solapa (IoU >= iou_threshold) con el último bbox de un track que terminó
+    como mucho max_gap frames antes.
+
+    Args:
+        object_tracks (list): Lista por frame de dicts {track_id: {'bbox': [...]}}
+        max_gap (int): Frames máximos entre el fin de un track y el inicio del otro
+        iou_threshold (float): Solapamiento mínimo para considerar que es el mismo objeto
+
+    Returns:
+        int: Número estimado de cambios de ID
+    """
+    from trackers.tracker_backends import box_iou
+
+    first_seen, last_seen = {}, {}
+    for frame_num, frame_tracks in enumerate(object_tracks):
+        for track_id, info in frame_tracks.items():
+            if track_id not in first_seen:
+                first_seen[track_id] = (frame_num, info['bbox'])
+            last_seen[track_id] = (frame_num, info['bbox'])
+
+    ended = sorted((frame_num, bbox) for frame_num, bbox in last_seen.values())
+    ended_frames = np.array([frame_num for frame_num, _ in ended])
+    ended_boxes = np.array([bbox for _, bbox in ended], dtype=np.float64).reshape(-1, 4)
+
+    switches = 0
+    for track_id, (start, bbox) in first_seen.items():
+        if start == 0:
+            continue
+        recent = (ended_frames < start) & (ended_frames >= start - max_gap)
+        if not np.any(recent):
+            continue
+        iou = box_iou(np.array([bbox], dtype=np.float64), ended_boxes[recent])
+        if np.any(iou >= iou_threshold):
+            switches += 1
+    return switches
+
+
+def run_backend(tracker_type, frame_detections, frame_rate, params):
+    """
+    Ejecuta un backend sobre detecciones ya calculadas.
+
+    Returns:
+        tuple: (tracks por frame, segundos empleados)
+    """
+    from trackers.tracker_backends import create_tracker
+
+    object_tracker = create_tracker(tracker_type, frame_rate, **params)
+    tracks = []
+    start = time.perf_counter()
+    for detections in frame_detections:
+        with_tracks = object_tracker.update_with_detections(detections)
+        tracks.append({
+            int(tracker_id): {'bbox': bbox}
+            for bbox, tracker_id in zip(with_tracks.xyxy.tolist(), with_tracks.tracker_id.tolist())
+        })
+    elapsed = time.perf_counter() - start
+    return tracks, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de seguimiento")
+    parser.add_argument("-i", "--input", required=True, help="Clip de referencia")
+    parser.add_argument("-m", "--model", default="best.pt", help="Modelo YOLO (default: best.pt)")
+    parser.add_argument("--max-frames", type=int, default=None, help="Limitar el número de frames")
+    parser.add_argument("--backends", nargs="+", default=["bytetrack", "iou"], help="Backends a comparar")
+    args = parser.parse_args()
+
+    import supervision as sv
+    from utils import read_video, get_video_fps
+    from trackers import Tracker
+
+    input_path = resolve_input_path(args.input)
+    frames = read_video(input_path)
+    if args.max_frames:
+        frames = frames[:args.max_frames]
+    frame_rate = int(round(get_video_fps(input_path)))
+
+    # Detección una sola vez para todos los backends (solo jugadores)
+    tracker = Tracker(resolve_model_path(args.model), frame_rate=frame_rate)
+    start = time.perf_counter()
+    detections = tracker.detect_frames(frames)
+    detection_time = time.perf_counter() - start
+
+    frame_detections = []
+    for detection in detections:
+        cls_names_inv = {v: k for k, v in detection.names.items()}
+        detection_supervision = sv.Detections.from_ultralytics(detection)
+        if "goalkeeper" in cls_names_inv:
+            goalkeepers = detection_supervision.class_id == cls_names_inv["goalkeeper"]
+            detection_supervision.class_id[goalkeepers] = cls_names_inv["player"]
+        frame_detections.append(detection_supervision[detection_supervision.class_id == cls_names_inv["player"]])
+
+    print(f"Frames: {len(frames)}  FPS del video: {frame_rate}")
+    print(f"Detección: {detection_time:.2f} s ({len(frames) / detection_time:.1f} fps)")
+    print()
+    print(f"{'Backend':<12}{'Tiempo (s)':>12}{'FPS':>12}{'IDs':>8}{'Cambios ID':>12}")
+    for tracker_type in args.backends:
+        tracks, elapsed = run_backend(tracker_type, frame_detections, frame_rate, {})
+        num_ids = len({track_id for frame_tracks in tracks for track_id in frame_tracks})
+        fps = len(frames) / elapsed if elapsed > 0 else float('inf')
+        print(f"{tracker_type:<12}{elapsed:>12.3f}{fps:>12.1f}{num_ids:>8}{count_id_switches(tracks):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,228 @@
 """
 Módulo para detectar eventos clave en partidos de fútbol.
+
+Los eventos se evalúan con un motor de reglas sobre ventanas deslizantes de la
+posición del balón en coordenadas del campo ('position_transformed', en metros).
+El detector funciona de forma incremental: en modo en vivo se llama a update()
+por cada frame; en modo offline se recorren los tracks completos.
+
+Todas las reglas miden el balón respecto a las líneas de gol y de banda del
+campo completo, así que solo se evalúan con posiciones calibradas
+(calibrated=True, --auto-calibration). La transformación fija de ViewTransformer
+solo cubre un tramo de 23.32 m sin ninguna línea de gol y descarta los puntos
+fuera de él: el balón nunca cruza una línea, y un pase largo en el tramo pasaría
+por un tiro hacia una portería que no está a la vista.
 """
 
-from typing import List, Dict, Any
+from collections import deque
+from typing import Callable, List, Dict, Any, Optional
+
+import numpy as np
+
 
 class EventDetector:
     """
     Detecta eventos como goles, tiros, saques de banda, etc.
     """
-    def __init__(self, tracks: Dict[str, Any]):
+    def __init__(self, tracks: Optional[Dict[str, Any]] = None, frame_rate: int = 24,
+                 pitch_length: float = 105.0, pitch_width: float = 68.0,
+                 goal_width: float = 7.32, window_size: int = 12, calibrated: bool = False):
+        """
+        tracks: dict con información de tracking (None para modo en vivo)
+        frame_rate: frames por segundo del video
+        pitch_length, pitch_width: dimensiones del campo en metros
+        goal_width: ancho de la portería en metros
+        window_size: frames de la ventana deslizante del balón
+        calibrated: si las posiciones vienen de la calibración automática del campo
+                    completo (sin ella no se registra ninguna regla)
+        """
         self.tracks = tracks
+        self.frame_rate = frame_rate
+        self.pitch_length = pitch_length
+        self.pitch_width = pitch_width
+        self.goal_width = goal_width
+        self.window_size = window_size
+
+        # Umbrales de las reglas
+        self.shot_speed = 18.0          # m/s mínimos para considerar un tiro
+        self.shot_horizon = 2.0         # segundos máximos hasta la línea de gol
+        self.shot_goal_margin = 3.0     # metros de margen a cada lado de la portería
+
+        # Reglas: nombre -> (predicado, frames mínimos activos)
+        # Un predicado recibe la ventana (k, 3) [frame, x, y] y devuelve un dict
+        # con información extra si el evento está activo, o None si no.
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        if calibrated:
+            self.add_rule('shot', self._is_shot_on_goal, min_frames=1)
+            self.add_rule('goal', self._is_ball_in_goal_mouth, min_frames=3)
+            self.add_rule('throw_in', self._is_ball_over_touchline, min_frames=3)
+
+        self.reset()
+
+    def add_rule(self, name: str, predicate: Callable[[np.ndarray], Optional[Dict[str, Any]]],
+                 min_frames: int = 1):
+        """
+        Registra una regla de evento.
+        """
+        self.rules[name] = {'predicate': predicate, 'min_frames': min_frames}
+
+    def reset(self):
+        """
+        Reinicia el estado incremental (ventana, eventos abiertos y emitidos).
+        """
+        self._window = deque(maxlen=self.window_size)
+        self._active: Dict[str, Dict[str, Any]] = {}
+        self._last_owner = None
+        self._offline_events = None
+        self.events: List[Dict[str, Any]] = []
+
+    def update(self, frame_num: int, ball_position, player_track: Optional[Dict[int, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Procesa un nuevo frame en modo incremental.
+
+        Args:
+            frame_num: Número de frame
+            ball_position: Posición del balón en metros (x, y) o None
+            player_track: Dict {player_id: info} de los jugadores en el frame (opcional)
+
+        Returns:
+            list: Eventos que terminaron en este frame
+        """
+        if player_track:
+            for player_id, info in player_track.items():
+                if info.get('has_ball', False):
+                    self._last_owner = (player_id, info.get('team'))
+                    break
+
+        if ball_position is None:
+            self._window.append((frame_num, np.nan, np.nan))
+        else:
+            self._window.append((frame_num, ball_position[0], ball_position[1]))
+        window = np.array(self._window, dtype=np.float64)
+
+        finished = []
+        for name, rule in self.rules.items():
+            info = rule['predicate'](window)
+            active = self._active.get(name)
+            if info is not None:
+                if active is None:
+                    active = {'type': name, 'frame_start': frame_num}
+                    if self._last_owner is not None:
+                        active['player_id'], active['team'] = self._last_owner
+                    active.update(info)
+                    self._active[name] = active
+                active['frame_end'] = frame_num
+            elif active is not None:
+                event = self._close(name)
+                if event is not None:
+                    finished.append(event)
+        return finished
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Cierra los eventos abiertos al final del video o del stream.
+        """
+        finished = []
+        for name in list(self._active):
+            event = self._close(name)
+            if event is not None:
+                finished.append(event)
+        return finished
+
+    def _close(self, name: str) -> Optional[Dict[str, Any]]:
+        event = self._active.pop(name)
+        if event['frame_end'] - event['frame_start'] + 1 < self.rules[name]['min_frames']:
+            return None
+        self.events.append(event)
+        return event
+
+    def process_tracks(self) -> List[Dict[str, Any]]:
+        """
+        Evalúa todas las reglas sobre los tracks completos (modo offline).
+        Returns: lista de eventos ordenada por frame de inicio
+        """
+        if self._offline_events is not None:
+            return self._offline_events
+
+        players = self.tracks.get('players', [])
+        for frame_num, ball_track in enumerate(self.tracks.get('ball', [])):
+            ball_position = ball_track.get(1, {}).get('position_transformed')
+            player_track = players[frame_num] if frame_num < len(players) else None
+            self.update(frame_num, ball_position, player_track)
+        self.flush()
+
+        self._offline_events = sorted(self.events, key=lambda event: event['frame_start'])
+        return self._offline_events
+
+    def _events_of_type(self, name: str) -> List[Dict[str, Any]]:
+        return [event for event in self.process_tracks() if event['type'] == name]
+
+    def _ball_velocity(self, window: np.ndarray):
+        """
+        Velocidad media (m/s) del balón en la ventana, o None si no hay datos suficientes.
+        """
+        valid = window[~np.isnan(window[:, 1])]
+        if valid.shape[0] < 2 or valid[-1, 0] == valid[0, 0]:
+            return None
+        elapsed = (valid[-1, 0] - valid[0, 0]) / self.frame_rate
+        return (valid[-1, 1:] - valid[0, 1:]) / elapsed
+
+    def _is_ball_in_goal_mouth(self, window: np.ndarray) -> Optional[Dict[str, Any]]:
+        x, y = window[-1, 1:]
+        if np.isnan(x):
+            return None
+        half_goal = self.goal_width / 2
+        if abs(y - self.pitch_width / 2) > half_goal:
+            return None
+        if x < 0:
+            return {'side': 'left'}
+        if x > self.pitch_length:
+            return {'side': 'right'}
+        return None
+
+    def _is_shot_on_goal(self, window: np.ndarray) -> Optional[Dict[str, Any]]:
+        velocity = self._ball_velocity(window)
+        x, y = window[-1, 1:]
+        if velocity is None or np.isnan(x):
+            return None
+        speed = float(np.hypot(*velocity))
+        if speed < self.shot_speed or velocity[0] == 0:
+            return None
+
+        # Proyectar la trayectoria hasta la línea de gol hacia la que se mueve el balón
+        goal_x, side = (0.0, 'left') if velocity[0] < 0 else (self.pitch_length, 'right')
+        time_to_goal = (goal_x - x) / velocity[0]
+        if time_to_goal < 0 or time_to_goal > self.shot_horizon:
+            return None
+        y_at_goal = y + velocity[1] * time_to_goal
+        if abs(y_at_goal - self.pitch_width / 2) > self.goal_width / 2 + self.shot_goal_margin:
+            return None
+        return {'side': side, 'speed': speed * 3.6}
+
+    def _is_ball_over_touchline(self, window: np.ndarray) -> Optional[Dict[str, Any]]:
+        x, y = window[-1, 1:]
+        if np.isnan(y) or x < 0 or x > self.pitch_length:
+            return None
+        if y < 0:
+            return {'side': 'top'}
+        if y > self.pitch_width:
+            return {'side': 'bottom'}
+        return None
 
     def detect_goals(self) -> List[Dict[str, Any]]:
         """
-        Detecta posibles goles en el partido.
+        Detecta posibles goles en el partido (solo con calibrated=True).
         """
-        # Implementación pendiente
-        pass
+        return self._events_of_type('goal')
 
     def detect_shots(self) -> List[Dict[str, Any]]:
         """
         Detecta tiros a puerta.
         """
-        # Implementación pendiente
-        pass
+        return self._events_of_type('shot')
 
     def detect_throw_ins(self) -> List[Dict[str, Any]]:
         """
-        Detecta saques de banda.
+        Detecta saques de banda (solo con calibrated=True).
         """
-        # Implementación pendiente
-        pass 
\ No newline at end of file
+        return self._events_of_type('throw_in')
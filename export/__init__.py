@@ -1 +1,2 @@
-from .export_to_csv_json import DataExporter
\ No newline at end of file
+from .export_to_csv_json import DataExporter
+from .results_bundle import write_results_bundle
@@ -1,28 +1,225 @@
 """
 Módulo para exportar datos de tracking y estadísticas a CSV y JSON.
+
+Las filas se generan directamente desde los tracks y se escriben en bloques,
+sin construir el documento completo en memoria. Formatos soportados: CSV,
+JSON, JSON Lines y Parquet (requiere pyarrow), con compresión opcional
+gzip o zstd (requiere zstandard), y los tracks completos empaquetados por
+columnas (PackedTracks, .pkl).
 """
 
+import gzip
+import io
 import json
 import csv
-from typing import Dict, Any
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+
+# Columnas disponibles, en el orden en que se exportan
+COLUMNS = [
+    'frame', 'object', 'track_id',
+    'x1', 'y1', 'x2', 'y2',
+    'position_x', 'position_y',
+    'position_adjusted_x', 'position_adjusted_y',
+    'position_transformed_x', 'position_transformed_y',
+    'team', 'speed', 'distance', 'has_ball',
+]
+
+# Campos de los tracks que se exportan como pares (x, y)
+_POINT_FIELDS = ('position', 'position_adjusted', 'position_transformed')
+
+
+def _to_python(value):
+    """
+    Convierte escalares de numpy a tipos nativos de Python.
+    """
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _open_text(file_path: str, compression: Optional[str]):
+    """
+    Abre un archivo de texto para escritura con la compresión indicada.
+    """
+    if compression is None:
+        return open(file_path, 'w', newline='', encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(file_path, 'wt', newline='', encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError("La compresión zstd requiere el paquete 'zstandard'") from error
+        binary = zstandard.ZstdCompressor().stream_writer(open(file_path, 'wb'))
+        return io.TextIOWrapper(binary, newline='', encoding='utf-8')
+    raise ValueError(f"Compresión no soportada: {compression}")
+
+
+def _infer_compression(file_path: str) -> Optional[str]:
+    if file_path.endswith('.gz'):
+        return 'gzip'
+    if file_path.endswith('.zst'):
+        return 'zstd'
+    return None
+
 
 class DataExporter:
     """
     Exporta datos de tracking y estadísticas a archivos CSV y JSON.
     """
-    def __init__(self, tracks: Dict[str, Any]):
+    def __init__(self, tracks: Dict[str, Any], columns: Optional[Sequence[str]] = None,
+                 chunk_size: int = 10000):
+        """
+        tracks: dict con información de tracking por tipo de objeto y frame
+        columns: columnas a exportar (None para todas, ver COLUMNS)
+        chunk_size: filas que se escriben por bloque
+        """
         self.tracks = tracks
+        self.columns = self._check_columns(columns)
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _check_columns(columns: Optional[Sequence[str]]) -> List[str]:
+        if columns is None:
+            return list(COLUMNS)
+        unknown = [column for column in columns if column not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {unknown}")
+        return list(columns)
 
-    def export_to_csv(self, file_path: str):
+    def iter_rows(self, columns: Optional[Sequence[str]] = None) -> Iterator[tuple]:
+        """
+        Genera una tupla por detección (frame, objeto, track) con las columnas pedidas.
+        """
+        columns = self._check_columns(columns) if columns is not None else self.columns
+        for object_name, object_tracks in self.tracks.items():
+            for frame_num, frame_tracks in enumerate(object_tracks):
+                for track_id, info in frame_tracks.items():
+                    record = {'frame': frame_num, 'object': object_name, 'track_id': _to_python(track_id)}
+
+                    bbox = info.get('bbox')
+                    if bbox is not None:
+                        record['x1'], record['y1'], record['x2'], record['y2'] = (_to_python(v) for v in bbox)
+
+                    for field in _POINT_FIELDS:
+                        point = info.get(field)
+                        if point is not None:
+                            record[f'{field}_x'] = _to_python(point[0])
+                            record[f'{field}_y'] = _to_python(point[1])
+
+                    record['team'] = _to_python(info.get('team'))
+                    record['speed'] = _to_python(info.get('speed'))
+                    record['distance'] = _to_python(info.get('distance'))
+                    record['has_ball'] = _to_python(info.get('has_ball', False))
+
+                    yield tuple(record.get(column) for column in columns)
+
+    def iter_chunks(self, columns: Optional[Sequence[str]] = None) -> Iterator[List[tuple]]:
+        """
+        Agrupa las filas en bloques de chunk_size.
+        """
+        rows = self.iter_rows(columns)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def export_to_csv(self, file_path: str, compression: Optional[str] = None,
+                      columns: Optional[Sequence[str]] = None):
         """
         Exporta los datos a un archivo CSV.
         """
-        # Implementación pendiente
-        pass
+        columns = self._check_columns(columns) if columns is not None else self.columns
+        compression = compression or _infer_compression(file_path)
+        with _open_text(file_path, compression) as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for chunk in self.iter_chunks(columns):
+                writer.writerows(chunk)
+
+    def export_to_json(self, file_path: str, compression: Optional[str] = None,
+                       columns: Optional[Sequence[str]] = None):
+        """
+        Exporta los datos a un archivo JSON (lista de objetos), escrito en bloques.
+        """
+        columns = self._check_columns(columns) if columns is not None else self.columns
+        compression = compression or _infer_compression(file_path)
+        with _open_text(file_path, compression) as f:
+            f.write('[')
+            first = True
+            for chunk in self.iter_chunks(columns):
+                lines = [json.dumps(dict(zip(columns, row))) for row in chunk]
+                if not first:
+                    f.write(',')
+                f.write('\n' + ',\n'.join(lines))
+                first = False
+            f.write('\n]\n')
+
+    def export_to_jsonl(self, file_path: str, compression: Optional[str] = None,
+                        columns: Optional[Sequence[str]] = None):
+        """
+        Exporta los datos a un archivo JSON Lines (un objeto por línea).
+        """
+        columns = self._check_columns(columns) if columns is not None else self.columns
+        compression = compression or _infer_compression(file_path)
+        with _open_text(file_path, compression) as f:
+            for chunk in self.iter_chunks(columns):
+                f.write(''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in chunk))
 
-    def export_to_json(self, file_path: str):
+    def export_to_parquet(self, file_path: str, compression: Optional[str] = 'zstd',
+                          columns: Optional[Sequence[str]] = None):
         """
-        Exporta los datos a un archivo JSON.
+        Exporta los datos a un archivo Parquet, un row group por bloque.
         """
-        # Implementación pendiente
-        pass 
\ No newline at end of file
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("La exportación a Parquet requiere el paquete 'pyarrow'") from error
+
+        columns = self._check_columns(columns) if columns is not None else self.columns
+        types = {
+            'frame': pa.int32(), 'object': pa.string(), 'track_id': pa.int32(),
+            'team': pa.int8(), 'has_ball': pa.bool_(),
+        }
+        schema = pa.schema([(column, types.get(column, pa.float32())) for column in columns])
+
+        with pq.ParquetWriter(file_path, schema, compression=compression or 'none') as writer:
+            for chunk in self.iter_chunks(columns):
+                arrays = [pa.array(values, type=schema.field(i).type)
+                          for i, values in enumerate(zip(*chunk))]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    def export_to_packed(self, file_path: str, precision: str = 'quantized', delta: bool = True):
+        """
+        Exporta los tracks completos (todos los campos) empaquetados por columnas,
+        cuantizados y con diferencias entre frames; se leen con utils.unpack_tracks.
+        """
+        from utils.checkpoint import atomic_pickle_dump
+        from utils.track_storage import PackedTracks
+
+        atomic_pickle_dump(PackedTracks.pack(self.tracks, precision, delta), file_path)
+
+    def export(self, file_path: str, compression: Optional[str] = None,
+               columns: Optional[Sequence[str]] = None):
+        """
+        Exporta eligiendo el formato según la extensión (.csv, .json, .jsonl, .parquet,
+        .pkl), ignorando el sufijo de compresión (.gz, .zst).
+        """
+        name = file_path
+        for suffix in ('.gz', '.zst'):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+
+        if name.endswith('.csv'):
+            self.export_to_csv(file_path, compression, columns)
+        elif name.endswith('.jsonl'):
+            self.export_to_jsonl(file_path, compression, columns)
+        elif name.endswith('.json'):
+            self.export_to_json(file_path, compression, columns)
+        elif name.endswith('.parquet'):
+            self.export_to_parquet(file_path, compression or 'zstd', columns)
+        elif name.endswith('.pkl') and name == file_path:
+            self.export_to_packed(file_path)
+        else:
+            raise ValueError(f"Formato de exportación no soportado: {file_path}")
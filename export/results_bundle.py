@@ -0,0 +1,121 @@
+"""
+Paquete de resultados del modo de solo análisis.
+
+Un único archivo .zip con:
+    summary.json  Resumen: video, posesión, pases, estadísticas por jugador y equipo
+                  y medias tácticas por equipo (compactación, rival más cercano, presión)
+    tracks.csv    Una fila por detección (columnas de DataExporter)
+
+Se escribe en un temporal y se renombra al terminar, como los stubs.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .export_to_csv_json import DataExporter, _to_python
+
+
+def player_stats(tracks: Dict[str, Any], frame_rate: float) -> Dict[int, Dict[str, Any]]:
+    """
+    Estadísticas por jugador en una pasada sobre los tracks.
+
+    Returns:
+        dict: {player_id: {'team', 'frames', 'seconds', 'distance_m', 'max_speed_kmh', 'ball_frames'}}
+    """
+    stats = {}
+    for frame_players in tracks['players']:
+        for player_id, player in frame_players.items():
+            entry = stats.get(player_id)
+            if entry is None:
+                entry = stats[player_id] = {'team': _to_python(player.get('team')), 'frames': 0,
+                                            'distance_m': 0.0, 'max_speed_kmh': 0.0, 'ball_frames': 0}
+            entry['frames'] += 1
+            # La distancia de los tracks es acumulada: la última es la total
+            entry['distance_m'] = max(entry['distance_m'], float(player.get('distance') or 0.0))
+            entry['max_speed_kmh'] = max(entry['max_speed_kmh'], float(player.get('speed') or 0.0))
+            entry['ball_frames'] += bool(player.get('has_ball', False))
+
+    for entry in stats.values():
+        entry['seconds'] = round(entry['frames'] / frame_rate, 2)
+        entry['distance_m'] = round(entry['distance_m'], 1)
+        entry['max_speed_kmh'] = round(entry['max_speed_kmh'], 1)
+    return stats
+
+
+def build_summary(tracks: Dict[str, Any], team_ball_control: np.ndarray, frame_rate: float,
+                  metadata: Optional[Dict[str, Any]] = None,
+                  pitch_extent: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Resumen del análisis (lo que se guarda en summary.json).
+
+    Args:
+        tracks: Tracks con posiciones, equipos, velocidad y posesión
+        team_ball_control: Equipo con el balón en cada frame
+        frame_rate: Frames por segundo del video
+        metadata: Datos adicionales (video, opciones, ...)
+        pitch_extent: Tramo del eje x que cubren las posiciones (None = campo completo)
+    """
+    from stats import PossessionAndPassesAnalyzer, SpatialAnalyzer
+
+    analyzer = PossessionAndPassesAnalyzer(tracks, team_ball_control)
+    passes = analyzer.detect_passes()
+    players = player_stats(tracks, frame_rate)
+    tactics = SpatialAnalyzer(tracks, pitch_extent=pitch_extent).team_summary()
+
+    teams = {}
+    for team_id, possession in analyzer.calculate_possession().items():
+        team_players = [entry for entry in players.values() if entry['team'] == team_id]
+        teams[str(team_id)] = {
+            'possession_pct': round(possession, 1),
+            'passes': sum(1 for p in passes if p['team'] == team_id),
+            'players': len(team_players),
+            'distance_m': round(sum((entry['distance_m'] for entry in team_players), 0.0), 1),
+            'tactics': tactics.get(team_id),
+        }
+
+    num_frames = len(tracks['players'])
+    ball_frames = sum(1 for ball in tracks['ball'] if ball)
+    return {
+        **(metadata or {}),
+        'frames': num_frames,
+        'fps': frame_rate,
+        'duration_s': round(num_frames / frame_rate, 2),
+        'ball_visible_pct': round(ball_frames / num_frames * 100, 1) if num_frames else 0.0,
+        'teams': teams,
+        'players': {str(player_id): entry for player_id, entry in sorted(players.items())},
+        'possession_spells': analyzer.get_possession_spells(),
+        'passes': passes,
+    }
+
+
+def write_results_bundle(bundle_path: str, tracks: Dict[str, Any], team_ball_control: np.ndarray,
+                         frame_rate: float, metadata: Optional[Dict[str, Any]] = None,
+                         pitch_extent: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Escribe el paquete de resultados (.zip con summary.json y tracks.csv).
+
+    Returns:
+        dict: El resumen guardado en summary.json
+    """
+    summary = build_summary(tracks, team_ball_control, frame_rate, metadata, pitch_extent)
+
+    tmp_path = f"{bundle_path}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr('summary.json', json.dumps(summary, indent=2, default=_to_python))
+
+        exporter = DataExporter(tracks)
+        with bundle.open('tracks.csv', 'w') as raw:
+            with io.TextIOWrapper(raw, newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(exporter.columns)
+                for chunk in exporter.iter_chunks():
+                    writer.writerows(chunk)
+    os.replace(tmp_path, bundle_path)
+
+    return summary
@@ -0,0 +1 @@
+from .multi_camera import CameraView, MultiCameraFusion, run_camera_pipelines, fuse_camera_bundles
@@ -0,0 +1,476 @@
+"""
+Fusión de varias cámaras fijas en un único conjunto de tracks en el campo.
+
+Cada cámara se analiza en su propio proceso con el pipeline en modo de solo
+análisis (--headless); su paquete de resultados trae las detecciones en píxeles
+y los colores de sus equipos. Después, cada detección se lleva a metros con la
+homografía de su cámara y, frame a frame, las detecciones de distintas cámaras
+que caen cerca en el campo y son del mismo equipo se agrupan en un solo jugador.
+La búsqueda de vecinos usa una rejilla del tamaño de la distancia de asociación,
+así que el coste crece linealmente con el número de detecciones.
+
+Configuración (JSON):
+    {
+      "options": {"tracker": "iou"},
+      "cameras": [
+        {"name": "norte", "video": "norte.mp4",
+         "pixel_points": [[x, y], ...], "pitch_points": [[x_m, y_m], ...],
+         "frame_offset": 0},
+        {"name": "sur", "video": "sur.mp4", "homography": [[...], [...], [...]]}
+      ]
+    }
+
+Uso:
+    python -m fusion.multi_camera --config camaras.json -m best.pt --workers 3
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CameraView:
+    """
+    Una cámara fija: su video, su homografía píxel -> campo y su desfase de frames.
+    """
+
+    def __init__(self, name, video_path, homography, frame_offset=0):
+        """
+        Args:
+            name (str): Nombre de la cámara (también el de su directorio de stubs y salidas)
+            video_path (str): Video de la cámara
+            homography (array): Matriz 3x3 de píxeles a metros del campo
+            frame_offset (int): Frame del video que corresponde al frame 0 de la fusión
+        """
+        self.name = name
+        self.video_path = video_path
+        self.homography = np.asarray(homography, dtype=np.float64)
+        self.frame_offset = frame_offset
+
+    @classmethod
+    def from_config(cls, config, base_dir="."):
+        """
+        Crea la cámara desde su entrada de la configuración: 'homography' o bien
+        'pixel_points' y 'pitch_points' (al menos 4 correspondencias).
+        """
+        video_path = config["video"]
+        if not os.path.isabs(video_path):
+            video_path = os.path.join(base_dir, video_path)
+
+        homography = config.get("homography")
+        if homography is None:
+            import cv2
+
+            pixel_points = np.asarray(config["pixel_points"], dtype=np.float32)
+            pitch_points = np.asarray(config["pitch_points"], dtype=np.float32)
+            if len(pixel_points) < 4 or len(pixel_points) != len(pitch_points):
+                raise ValueError(f"La cámara '{config['name']}' necesita al menos 4 pares de puntos")
+            homography, _ = cv2.findHomography(pixel_points, pitch_points)
+        return cls(config["name"], video_path, homography, config.get("frame_offset", 0))
+
+    def to_pitch(self, points):
+        """
+        Args:
+            points (array): Puntos (N, 2) en píxeles
+
+        Returns:
+            np.ndarray: Puntos (N, 2) en metros del campo
+        """
+        import cv2
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        if not len(points):
+            return np.zeros((0, 2))
+        return cv2.perspectiveTransform(points, self.homography).reshape(-1, 2)
+
+
+def load_camera_config(config_path):
+    """
+    Returns:
+        tuple: (lista de CameraView, opciones del análisis comunes a todas las cámaras)
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    cameras = [CameraView.from_config(camera, base_dir) for camera in config["cameras"]]
+    names = [camera.name for camera in cameras]
+    if len(set(names)) != len(names):
+        raise ValueError("Los nombres de las cámaras deben ser únicos")
+    return cameras, config.get("options", {})
+
+
+def _analyze_camera(argv):
+    # Se ejecuta en un proceso del pool: cada cámara carga su propio modelo
+    from main import build_parser, run_analysis
+
+    return run_analysis(build_parser().parse_args(argv))["output_path"]
+
+
+def run_camera_pipelines(cameras, model_path, output_dir, stub_dir, options=None, workers=None):
+    """
+    Analiza todas las cámaras en paralelo (un proceso por cámara) en modo de solo análisis.
+
+    Las cámaras son fijas, así que no se estima su movimiento; la perspectiva y la
+    velocidad se calculan después de la fusión, con la homografía de cada cámara.
+
+    Args:
+        cameras (list): CameraView a analizar
+        model_path (str): Modelo YOLO
+        output_dir (str): Directorio de salida (un subdirectorio por cámara)
+        stub_dir (str): Directorio de stubs (un subdirectorio por cámara)
+        options (dict): Opciones comunes del análisis, con los nombres de main.py
+        workers (int): Procesos simultáneos (por defecto, uno por cámara)
+
+    Returns:
+        dict: {nombre de la cámara: ruta de su paquete de resultados}
+    """
+    from service.analysis_service import options_to_argv
+
+    extra_argv = options_to_argv(options or {})
+    with ProcessPoolExecutor(max_workers=workers or len(cameras)) as pool:
+        futures = {
+            camera.name: pool.submit(_analyze_camera, [
+                "-i", camera.video_path, "-m", model_path,
+                "-o", os.path.join(output_dir, camera.name),
+                "--stub-dir", os.path.join(stub_dir, camera.name),
+                "--headless", "--no-camera-movement", "--no-perspective", "--no-speed-distance",
+            ] + extra_argv)
+            for camera in cameras
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def read_bundle_tracks(bundle_path):
+    """
+    Reconstruye los tracks de un paquete de resultados (tracks.csv).
+
+    Returns:
+        tuple: (tracks, resumen de summary.json)
+    """
+    with zipfile.ZipFile(bundle_path) as bundle:
+        summary = json.loads(bundle.read("summary.json"))
+        num_frames = summary["frames"]
+        tracks = {}
+        with bundle.open("tracks.csv") as raw:
+            for row in csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8", newline="")):
+                object_tracks = tracks.get(row["object"])
+                if object_tracks is None:
+                    object_tracks = tracks[row["object"]] = [{} for _ in range(num_frames)]
+
+                info = {"has_ball": row["has_ball"] == "True"}
+                if row["x1"]:
+                    info["bbox"] = [float(row[key]) for key in ("x1", "y1", "x2", "y2")]
+                if row["position_x"]:
+                    info["position"] = (float(row["position_x"]), float(row["position_y"]))
+                if row["team"]:
+                    info["team"] = int(row["team"])
+                object_tracks[int(row["frame"])][int(row["track_id"])] = info
+    return tracks, summary
+
+
+def match_teams(reference_colors, colors):
+    """
+    Empareja los equipos de una cámara con los de la cámara de referencia por color.
+
+    Args:
+        reference_colors (dict): {equipo: color BGR} de la cámara de referencia
+        colors (dict): {equipo: color BGR} de la cámara a emparejar
+
+    Returns:
+        dict: {equipo de la cámara: equipo de referencia}
+    """
+    local_teams = sorted(colors)
+    reference_teams = sorted(reference_colors)
+    if not local_teams or len(local_teams) != len(reference_teams):
+        return {team: team for team in local_teams}
+
+    def cost(permutation):
+        return sum(np.linalg.norm(np.subtract(colors[local], reference_colors[reference]))
+                   for local, reference in zip(local_teams, permutation))
+
+    best = min(itertools.permutations(reference_teams), key=cost)
+    return dict(zip(local_teams, best))
+
+
+def team_ball_control_from_tracks(player_tracks):
+    """
+    Equipo con el balón en cada frame (se mantiene el último si nadie lo tiene).
+    """
+    team_ball_control = []
+    for frame_players in player_tracks:
+        team = next((player.get("team") or 0 for player in frame_players.values() if player.get("has_ball")), None)
+        if team is None:
+            team = team_ball_control[-1] if team_ball_control else 0
+        team_ball_control.append(team)
+    return np.array(team_ball_control)
+
+
+class MultiCameraFusion:
+    """
+    Asocia las detecciones de varias cámaras en el campo y les da una identidad común.
+    """
+
+    def __init__(self, cameras, match_distance=2.0, pitch_length=105.0, pitch_width=68.0, pitch_margin=5.0):
+        """
+        Args:
+            cameras (list): CameraView, en orden de prioridad (la primera es la referencia
+                            de equipos y manda en los conflictos de identidad)
+            match_distance (float): Distancia máxima (metros) entre detecciones del mismo jugador
+            pitch_length, pitch_width (float): Dimensiones del campo en metros
+            pitch_margin (float): Margen fuera del campo en el que se aceptan detecciones
+        """
+        self.cameras = cameras
+        self.match_distance = match_distance
+        self.pitch_length = pitch_length
+        self.pitch_width = pitch_width
+        self.pitch_margin = pitch_margin
+
+    def _camera_detections(self, camera_index, object_tracks, team_map):
+        """
+        Todas las detecciones de un objeto en una cámara como arrays, ya en metros.
+        """
+        camera = self.cameras[camera_index]
+        frames, track_ids, teams, has_ball, points = [], [], [], [], []
+        for frame_num, frame_tracks in enumerate(object_tracks):
+            fused_frame = frame_num - camera.frame_offset
+            if fused_frame < 0:
+                continue
+            for track_id, info in frame_tracks.items():
+                point = info.get("position")
+                if point is None:
+                    bbox = info["bbox"]
+                    point = ((bbox[0] + bbox[2]) / 2, bbox[3])
+                frames.append(fused_frame)
+                track_ids.append(track_id)
+                teams.append(team_map.get(info.get("team"), 0))
+                has_ball.append(info.get("has_ball", False))
+                points.append(point)
+
+        pitch = camera.to_pitch(points)
+        margin = self.pitch_margin
+        inside = (
+            (pitch[:, 0] >= -margin) & (pitch[:, 0] <= self.pitch_length + margin) &
+            (pitch[:, 1] >= -margin) & (pitch[:, 1] <= self.pitch_width + margin)
+        )
+        return {
+            "frame": np.asarray(frames, dtype=np.int64)[inside],
+            "camera": np.full(int(inside.sum()), camera_index, dtype=np.int64),
+            "track_id": np.asarray(track_ids, dtype=np.int64)[inside],
+            "team": np.asarray(teams, dtype=np.int64)[inside],
+            "has_ball": np.asarray(has_ball, dtype=bool)[inside],
+            "pitch": pitch[inside],
+        }
+
+    def _cluster_frame(self, detections, rows, identity, fused_ids):
+        """
+        Agrupa las detecciones de un frame. Primero se une cada detección al grupo
+        que ya tiene la identidad de su track; si no, al grupo más cercano del mismo
+        equipo sin otra detección de su cámara (vecinos buscados en la rejilla).
+
+        Returns:
+            list: Grupos [{'rows', 'cameras', 'team', 'sum'}]
+        """
+        cell_size = self.match_distance
+        clusters, grid, by_identity = [], {}, {}
+
+        for row in rows:
+            camera = int(detections["camera"][row])
+            team = int(detections["team"][row])
+            point = detections["pitch"][row]
+            key = (camera, int(detections["track_id"][row]))
+
+            target = by_identity.get(identity.get(key))
+            if target is not None and (camera in target["cameras"] or target["team"] != team):
+                target = None
+
+            if target is None:
+                cell = (int(point[0] // cell_size), int(point[1] // cell_size))
+                best_distance = self.match_distance
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for cluster in grid.get((cell[0] + dx, cell[1] + dy), ()):
+                            if cluster["team"] != team or camera in cluster["cameras"]:
+                                continue
+                            distance = np.hypot(*(cluster["sum"] / len(cluster["rows"]) - point))
+                            if distance <= best_distance:
+                                target, best_distance = cluster, distance
+
+            if target is None:
+                target = {"rows": [], "cameras": set(), "team": team, "sum": np.zeros(2), "id": None}
+                clusters.append(target)
+                # El grupo queda en la celda de su primera detección (la rejilla
+                # cubre la distancia de asociación con las 8 celdas vecinas)
+                grid.setdefault(cell, []).append(target)
+
+            target["rows"].append(row)
+            target["cameras"].add(camera)
+            target["sum"] += point
+            if target["id"] is None and key in identity and identity[key] not in by_identity:
+                target["id"] = identity[key]
+                by_identity[target["id"]] = target
+
+        # Identidad de los grupos nuevos: la de algún miembro libre o una nueva
+        for cluster in clusters:
+            if cluster["id"] is None:
+                keys = [(int(detections["camera"][row]), int(detections["track_id"][row])) for row in cluster["rows"]]
+                cluster["id"] = next((identity[key] for key in keys
+                                      if key in identity and identity[key] not in by_identity), None)
+                if cluster["id"] is None:
+                    cluster["id"] = next(fused_ids)
+                by_identity[cluster["id"]] = cluster
+            for row in cluster["rows"]:
+                identity.setdefault((int(detections["camera"][row]), int(detections["track_id"][row])), cluster["id"])
+        return clusters
+
+    def fuse_object(self, camera_object_tracks, team_maps, num_frames, single=False):
+        """
+        Fusiona un tipo de objeto de todas las cámaras.
+
+        Args:
+            camera_object_tracks (list): Tracks del objeto de cada cámara (mismo orden que cameras)
+            team_maps (list): {equipo de la cámara: equipo común} de cada cámara
+            num_frames (int): Frames de la fusión
+            single (bool): Objeto único por frame (balón): se promedian todas sus detecciones
+
+        Returns:
+            list: Por frame, {id común: {'position_transformed', 'team', 'has_ball', 'cameras'}}
+        """
+        parts = [self._camera_detections(index, object_tracks, team_maps[index])
+                 for index, object_tracks in enumerate(camera_object_tracks)]
+        detections = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+        # Detecciones ordenadas por frame (y por cámara dentro del frame)
+        order = np.lexsort((detections["camera"], detections["frame"]))
+        detections = {key: values[order] for key, values in detections.items()}
+        bounds = np.searchsorted(detections["frame"], np.arange(num_frames + 1))
+
+        fused = [{} for _ in range(num_frames)]
+        identity, fused_ids = {}, itertools.count(1)
+        for frame_num in range(num_frames):
+            rows = range(bounds[frame_num], bounds[frame_num + 1])
+            if not len(rows):
+                continue
+            if single:
+                fused[frame_num][1] = {
+                    "position_transformed": detections["pitch"][rows.start:rows.stop].mean(axis=0).tolist(),
+                    "cameras": sorted({self.cameras[c].name for c in detections["camera"][rows.start:rows.stop]}),
+                }
+                continue
+
+            for cluster in self._cluster_frame(detections, rows, identity, fused_ids):
+                fused[frame_num][cluster["id"]] = {
+                    "position_transformed": (cluster["sum"] / len(cluster["rows"])).tolist(),
+                    "team": cluster["team"] or None,
+                    "has_ball": bool(detections["has_ball"][cluster["rows"]].any()),
+                    "cameras": sorted(self.cameras[c].name for c in cluster["cameras"]),
+                }
+        return fused
+
+    def fuse(self, camera_tracks, team_colors=None):
+        """
+        Fusiona los tracks de todas las cámaras.
+
+        Args:
+            camera_tracks (list): Tracks de cada cámara (mismo orden que cameras)
+            team_colors (list): {equipo: color} de cada cámara para emparejar equipos
+                                (None si ya usan los mismos números de equipo)
+
+        Returns:
+            dict: Tracks fusionados ('players', 'referees', 'ball') con 'position_transformed'
+        """
+        if team_colors is None:
+            team_maps = [{1: 1, 2: 2} for _ in camera_tracks]
+        else:
+            team_maps = [match_teams(team_colors[0], colors) for colors in team_colors]
+
+        num_frames = max(len(tracks.get("players", [])) - camera.frame_offset
+                         for tracks, camera in zip(camera_tracks, self.cameras))
+        num_frames = max(num_frames, 0)
+
+        fused = {}
+        for object_name in ("players", "referees", "ball"):
+            fused[object_name] = self.fuse_object(
+                [tracks.get(object_name, []) for tracks in camera_tracks],
+                team_maps if object_name == "players" else [{} for _ in camera_tracks],
+                num_frames,
+                single=object_name == "ball",
+            )
+
+        # Un solo jugador con el balón: el que más cámaras señalan
+        for frame_players in fused["players"]:
+            holders = [player for player in frame_players.values() if player["has_ball"]]
+            for player in sorted(holders, key=lambda p: -len(p["cameras"]))[1:]:
+                player["has_ball"] = False
+        return fused
+
+
+def fuse_camera_bundles(cameras, bundle_paths, output_path, match_distance=2.0):
+    """
+    Fusiona los paquetes de resultados de las cámaras y escribe el paquete común
+    (con velocidad, distancia, posesión y métricas tácticas de los tracks fusionados).
+
+    Args:
+        cameras (list): CameraView
+        bundle_paths (dict): {nombre de la cámara: paquete de resultados}
+        output_path (str): Paquete de resultados de la fusión
+
+    Returns:
+        dict: Resumen del paquete fusionado
+    """
+    from export import write_results_bundle
+    from info import SpeedAndDistanceEstimator
+
+    camera_tracks, team_colors = [], []
+    frame_rate = None
+    for camera in cameras:
+        tracks, summary = read_bundle_tracks(bundle_paths[camera.name])
+        camera_tracks.append(tracks)
+        team_colors.append({int(team): color for team, color in summary.get("team_colors", {}).items()})
+        frame_rate = frame_rate or summary["fps"]
+
+    fusion = MultiCameraFusion(cameras, match_distance=match_distance)
+    tracks = fusion.fuse(camera_tracks, team_colors if all(team_colors) else None)
+
+    speed_and_distance_estimator = SpeedAndDistanceEstimator()
+    speed_and_distance_estimator.frame_rate = frame_rate
+    speed_and_distance_estimator.add_speed_and_distance_2_tracks(tracks)
+
+    return write_results_bundle(output_path, tracks, team_ball_control_from_tracks(tracks["players"]),
+                                frame_rate, metadata={"cameras": [camera.name for camera in cameras]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusión de varias cámaras fijas en un solo análisis")
+    parser.add_argument("--config", required=True, help="Configuración JSON de las cámaras")
+    parser.add_argument("-m", "--model", default="best.pt", help="Modelo YOLO (default: best.pt)")
+    parser.add_argument("-o", "--output-dir", default="output_videos", help="Directorio de salida (default: output_videos)")
+    parser.add_argument("--stub-dir", default="stubs", help="Directorio de cache (default: stubs)")
+    parser.add_argument("--workers", type=int, default=None, help="Cámaras analizadas a la vez (default: todas)")
+    parser.add_argument("--match-distance", type=float, default=2.0,
+                        help="Distancia máxima en metros entre detecciones del mismo jugador (default: 2.0)")
+    args = parser.parse_args()
+
+    from main import resolve_model_path
+
+    cameras, options = load_camera_config(args.config)
+    bundle_paths = run_camera_pipelines(cameras, resolve_model_path(args.model), args.output_dir,
+                                        args.stub_dir, options, args.workers)
+
+    name = os.path.splitext(os.path.basename(args.config))[0]
+    output_path = os.path.join(args.output_dir, f"{name}_fused_results.zip")
+    summary = fuse_camera_bundles(cameras, bundle_paths, output_path, args.match_distance)
+    print(f"Resultados fusionados ({len(cameras)} cámaras, {summary['frames']} frames) guardados en: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-import cv2
 import sys
 sys.path.append('../')
 from utils.bbox_utils import measure_distance, get_foot_position
+from utils import progress
+from visualization.annotation_renderer import AnnotationRenderer
 
 class SpeedAndDistanceEstimator():
    
@@ -10,6 +11,7 @@ class SpeedAndDistanceEstimator():
         self.frame_rate = 24
         self.min_distance_threshold = 0.1  # Reducido para menos procesamiento
         self.max_speed_threshold = 50.0
+        self.renderer = AnnotationRenderer()
        
     def add_speed_and_distance_2_tracks(self, tracks):
         total_distance = {}
@@ -81,59 +83,69 @@ class SpeedAndDistanceEstimator():
     
     def draw_speed_and_distance(self, frames, tracks):
         # Procesar frames in-place para ahorrar memoria
-        for frame_num, frame in enumerate(frames):
+        for frame_num, frame in progress.track(enumerate(frames), "draw_speed_distance", len(frames)):
             if frame is None:
                 continue
                 
-            for object_name, object_tracks in tracks.items():
-                if object_name in ['ball', 'referee', 'referees']:
+            self.draw_speed_and_distance_on_frame(frame, frame_num, tracks)
+        
+        # Retornar la misma lista (modificada in-place)
+        return frames
+    
+    def draw_speed_and_distance_on_frame(self, frame, frame_num, tracks):
+        # Dibuja velocidad y distancia de los jugadores de un frame (in-place)
+        texts, origins, colors = [], [], []
+        for object_name, object_tracks in tracks.items():
+            if object_name in ['ball', 'referee', 'referees']:
+                continue
+                
+            if frame_num >= len(object_tracks):
+                continue
+                
+            frame_tracks = object_tracks[frame_num]
+            
+            for track_id, track_info in frame_tracks.items():
+                vel = track_info.get('speed', 0)
+                dist = track_info.get('distance', 0)
+                
+                # Solo dibujar si hay valores significativos
+                if vel < 1.0 and dist < 1.0:
                     continue
                     
-                if frame_num >= len(object_tracks):
+                bbox = track_info.get('bbox')
+                if bbox is None:
                     continue
                     
-                frame_tracks = object_tracks[frame_num]
-                
-                for track_id, track_info in frame_tracks.items():
-                    vel = track_info.get('speed', 0)
-                    dist = track_info.get('distance', 0)
+                try:
+                    position = get_foot_position(bbox)
+                    x, y = int(position[0]), int(position[1]) + 40
                     
-                    # Solo dibujar si hay valores significativos
-                    if vel < 1.0 and dist < 1.0:
-                        continue
-                        
-                    bbox = track_info.get('bbox')
-                    if bbox is None:
-                        continue
-                        
-                    try:
-                        position = get_foot_position(bbox)
-                        x, y = int(position[0]), int(position[1]) + 40
-                        
-                        # Verificar que las coordenadas estén dentro del frame
-                        if x < 0 or y < 0 or x >= frame.shape[1] or y >= frame.shape[0]:
-                            continue
-                        
-                        # Color basado en velocidad
-                        if vel < 5:
-                            color = (0, 255, 0)  # Verde
-                        elif vel < 15:
-                            color = (0, 255, 255)  # Amarillo
-                        else:
-                            color = (0, 0, 255)  # Rojo
-                        
-                        # Dibujar directamente en el frame (sin crear copias)
-                        cv2.putText(frame, f"{vel:.1f}km/h", (x, y), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
-                        
-                        # Verificar bounds para segunda línea
-                        if y + 15 < frame.shape[0]:
-                            cv2.putText(frame, f"{dist:.1f}m", (x, y + 15), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
-                        
-                    except Exception:
-                        # Ignorar errores de dibujo silenciosamente
+                    # Verificar que las coordenadas estén dentro del frame
+                    if x < 0 or y < 0 or x >= frame.shape[1] or y >= frame.shape[0]:
                         continue
+                    
+                    # Color basado en velocidad
+                    if vel < 5:
+                        color = (0, 255, 0)  # Verde
+                    elif vel < 15:
+                        color = (0, 255, 255)  # Amarillo
+                    else:
+                        color = (0, 0, 255)  # Rojo
+                    
+                    texts.append(f"{vel:.1f}km/h")
+                    origins.append((x, y))
+                    colors.append(color)
+                    
+                    # Verificar bounds para segunda línea
+                    if y + 15 < frame.shape[0]:
+                        texts.append(f"{dist:.1f}m")
+                        origins.append((x, y + 15))
+                        colors.append((255, 255, 255))
+                    
+                except Exception:
+                    # Ignorar errores de dibujo silenciosamente
+                    continue
         
-        # Retornar la misma lista (modificada in-place)
-        return frames
\ No newline at end of file
+        # Dibujar todos los textos del frame de una vez (sin crear copias)
+        self.renderer.draw_texts(frame, texts, origins, 0.4, colors)
+        return frame
@@ -1,17 +1,12 @@
-# Importar librerías necesarias para el procesamiento de video y asignación de equipos
+# Importar librerías necesarias para el procesamiento de video y asignación de equipos.
+# Las librerías pesadas (cv2, numpy, ultralytics/torch, supervision, sklearn) se importan
+# dentro de main() en la etapa que las usa, para que --help, los errores de validación
+# y las ejecuciones desde cache arranquen rápido.
 import argparse
+import contextlib
 import os
 import sys
 from pathlib import Path
-from utils import read_video, save_video
-from trackers import Tracker
-import cv2  
-import numpy as np
-from assigner import TeamAssigner
-from asignadorJugador import PlayerBallAssigner
-from mov_camera import EstimadorMovimientoCam
-from perspective_transformer import ViewTransformer
-from info import SpeedAndDistanceEstimator
 
 
 def resolve_input_path(input_path, default_dir="videos"):
@@ -56,35 +51,40 @@ def resolve_model_path(model_path, default_dir="model"):
     return full_path
 
 
-def create_output_path(input_path, output_dir="output_videos"):
+def create_output_path(input_path, output_dir="output_videos", headless=False):
     """
     Crea la ruta de salida basada en el archivo de entrada.
     
     Args:
         input_path (str): Ruta del archivo de entrada
         output_dir (str): Directorio de salida
+        headless (bool): Si la salida es el paquete de resultados (.zip) en lugar del video
     
     Returns:
         str: Ruta completa del archivo de salida
     """
     # Crear el directorio de salida si no existe
-    Path(output_dir).mkdir(exist_ok=True)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     # Obtener el nombre del archivo sin extensión
     input_file = Path(input_path)
-    output_filename = f"{input_file.stem}_analyzed{input_file.suffix}"
+    if headless:
+        output_filename = f"{input_file.stem}_results.zip"
+    else:
+        output_filename = f"{input_file.stem}_analyzed{input_file.suffix}"
     
     return os.path.join(output_dir, output_filename)
 
 
-def main():
+def build_parser():
     """
-    Función principal del sistema de análisis de fútbol.
+    Construye el parser de argumentos de la línea de comandos.
     
-    Procesa un video detectando jugadores, asignando equipos por color de camiseta
-    y generando un video de salida con anotaciones visuales.
+    También lo usa el servicio de análisis para validar las opciones de cada trabajo.
+    
+    Returns:
+        argparse.ArgumentParser: Parser con todas las opciones del sistema
     """
-    # ===== CONFIGURACIÓN DE ARGUMENTOS =====
     parser = argparse.ArgumentParser(
         description="Sistema de análisis de fútbol con detección de jugadores y asignación de equipos",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -95,6 +95,8 @@ Ejemplos de uso:
   python main.py -i videos/partido.mp4 -m models/custom_model.pt -o resultados/
   python main.py -i partido.mp4 --no-cache --no-interpolation
   python main.py -i partido.mp4 --stub-dir cache_personalizado/
+  python main.py -i partido.mp4 --headless
+  python main.py -i partido.mp4 --async-io --export-results --heatmaps --highlights --auto-calibration
         """
     )
     
@@ -148,20 +150,194 @@ Ejemplos de uso:
         help="Desactivar la transformación de perspectiva"
     )
     
+    parser.add_argument(
+        "--tracker",
+        choices=["bytetrack", "iou"],
+        default="bytetrack",
+        help="Backend de seguimiento: bytetrack o iou (más rápido, solo solapamiento) (default: bytetrack)"
+    )
+    
+    parser.add_argument(
+        "--track-thresh",
+        type=float,
+        default=0.25,
+        help="Confianza mínima para activar un track (default: 0.25)"
+    )
+    
+    parser.add_argument(
+        "--track-buffer",
+        type=int,
+        default=30,
+        help="Frames que se conserva un track perdido (default: 30)"
+    )
+    
+    parser.add_argument(
+        "--match-thresh",
+        type=float,
+        default=0.8,
+        help="Umbral de asociación de ByteTrack (default: 0.8)"
+    )
+    
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=None,
+        help="Tamaño de entrada de la detección a imagen completa, p. ej. 480 para ir más rápido (default: el del modelo)"
+    )
+    
+    parser.add_argument(
+        "--ball-roi",
+        action="store_true",
+        help="Buscar el balón perdido en una ventana a resolución nativa alrededor de su posición prevista; "
+             "solo ahorra tiempo si se reduce también --imgsz (cada ventana cuesta como un frame a 640)"
+    )
+    
+    parser.add_argument(
+        "--ball-model",
+        default=None,
+        help="Modelo YOLO específico para la búsqueda del balón por ventana (default: el modelo principal)"
+    )
+    
+    parser.add_argument(
+        "--reid",
+        action="store_true",
+        help="Fusionar tracks fragmentados de un mismo jugador por apariencia y continuidad espacio-temporal"
+    )
+    
+    parser.add_argument(
+        "--shot-detection",
+        action="store_true",
+        help="Detectar cortes de cámara, reiniciar el estado en cada plano y omitir repeticiones y primeros planos"
+    )
+    
+    parser.add_argument(
+        "--auto-calibration",
+        action="store_true",
+        help="Calibrar automáticamente la homografía del campo a partir de sus líneas"
+    )
+    
     parser.add_argument(
         "--no-speed-distance",
         action="store_true",
         help="Desactivar el cálculo de velocidad y distancia"
     )
     
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=0,
+        help="Guardar un checkpoint de tracking, movimiento de cámara y codificación cada N frames (default: 0, desactivado)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continuar desde el último checkpoint y reutilizar los stubs de las etapas terminadas"
+    )
+    
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Solo análisis: no genera video ni guarda los frames en memoria; escribe un paquete de resultados (.zip)"
+    )
+    
+    parser.add_argument(
+        "--export-results",
+        action="store_true",
+        help="Escribir también el paquete de resultados (.zip) junto al video de salida"
+    )
+    
+    parser.add_argument(
+        "--heatmaps",
+        action="store_true",
+        help="Guardar los mapas de calor de cada equipo y del balón (PNG) en el directorio de salida"
+    )
+    
+    parser.add_argument(
+        "--highlights",
+        action="store_true",
+        help="Detectar los eventos del partido y cortar un video de resumen de jugadas (requiere --auto-calibration)"
+    )
+    
+    parser.add_argument(
+        "--async-io",
+        action="store_true",
+        help="Solapar la E/S (stubs, sondeo del video y exportaciones) con las etapas de cálculo e informar del tiempo ahorrado"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para anotar y codificar el video de salida en paralelo (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Mostrar progreso por etapa (frames, fps, ETA y memoria) cada pocos segundos"
+    )
+    
+    parser.add_argument(
+        "--status-file",
+        default=None,
+        help="Archivo JSON donde escribir el progreso para orquestadores (se reemplaza de forma atómica)"
+    )
+    
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Mostrar información detallada durante el procesamiento"
     )
     
+    return parser
+
+
+class FrameAnnotator:
+    """
+    Dibuja todas las capas del video de salida sobre un frame (in-place).
+    
+    Es el process_frame de run_frame_pipeline: cada worker lo ejecuta sobre
+    los frames del buffer compartido.
+    """
+    
+    def __init__(self, tracker, tracks, team_ball_control, team_colors=None, camera_movement_estimator=None,
+                 camera_movement_per_frame=None, speed_and_distance_estimator=None):
+        self.tracker = tracker
+        self.tracks = tracks
+        self.team_ball_control = team_ball_control
+        self.team_colors = team_colors
+        self.camera_movement_estimator = camera_movement_estimator
+        self.camera_movement_per_frame = camera_movement_per_frame
+        self.speed_and_distance_estimator = speed_and_distance_estimator
+    
+    def __call__(self, frame, frame_num):
+        self.tracker.draw_frame_annotations(frame, frame_num, self.tracks, self.team_ball_control, self.team_colors)
+        if self.camera_movement_estimator is not None:
+            self.camera_movement_estimator.draw_camera_movement_on_frame(
+                frame, self.camera_movement_per_frame[frame_num]
+            )
+        if self.speed_and_distance_estimator is not None:
+            self.speed_and_distance_estimator.draw_speed_and_distance_on_frame(frame, frame_num, self.tracks)
+        return frame
+
+
+# Etapas del pipeline en orden de ejecución (para informar del progreso)
+PIPELINE_STAGES = (
+    "load", "shots", "tracking", "reid", "interpolation", "positions", "camera",
+    "perspective", "speed", "teams", "possession", "annotation", "save",
+)
+
+
+def main():
+    """
+    Función principal del sistema de análisis de fútbol.
+    
+    Procesa un video detectando jugadores, asignando equipos por color de camiseta
+    y generando un video de salida con anotaciones visuales.
+    """
     # Parsear argumentos
-    args = parser.parse_args()
+    args = build_parser().parse_args()
     
     # ===== RESOLUCIÓN DE RUTAS =====
     # Resolver ruta del video de entrada
@@ -195,40 +371,231 @@ Ejemplos de uso:
             print(f"Error: El modelo '{model_path}' no existe.")
         sys.exit(1)
     
-    # Crear directorio de stubs si no existe
-    Path(args.stub_dir).mkdir(exist_ok=True)
-    
     # Crear ruta de salida
-    output_path = create_output_path(input_path, args.output_dir)
+    output_path = create_output_path(input_path, args.output_dir, args.headless)
     
     if args.verbose:
         print(f"Configuración:")
         print(f"  - Video de entrada: {input_path}")
         print(f"  - Modelo: {model_path}")
-        print(f"  - Video de salida: {output_path}")
+        print(f"  - {'Resultados' if args.headless else 'Video de salida'}: {output_path}")
         print(f"  - Directorio de cache: {args.stub_dir}")
         print(f"  - Usar cache: {not args.no_cache}")
         print(f"  - Interpolación: {not args.no_interpolation}")
         print(f"  - Movimiento de cámara: {not args.no_camera_movement}")
         print(f"  - Transformación de perspectiva: {not args.no_perspective}")
+        print(f"  - Calibración automática: {args.auto_calibration}")
+        print(f"  - Detección de cortes: {args.shot_detection}")
+        print(f"  - Reidentificación de tracks: {args.reid}")
+        print(f"  - Tracker: {args.tracker}")
+        print(f"  - Tamaño de detección: {args.imgsz or 'el del modelo'}")
+        print(f"  - Búsqueda del balón por ventana: {args.ball_roi}")
         print(f"  - Velocidad y distancia: {not args.no_speed_distance}")
+        print(f"  - Solo análisis (sin video): {args.headless}")
+        print(f"  - Exportar resultados: {args.export_results}")
+        print(f"  - Mapas de calor: {args.heatmaps}")
+        print(f"  - Resumen de jugadas: {args.highlights}")
+        print(f"  - E/S en segundo plano: {args.async_io}")
+        print(f"  - Workers de anotación: {args.workers}")
         print()
     
-    # ===== CARGA Y PROCESAMIENTO DEL VIDEO =====
+    result = run_analysis(args)
+    
     if args.verbose:
-        print("Cargando video...")
+        print("¡Procesamiento completado!")
+    elif args.headless:
+        print(f"Resultados guardados en: {result['output_path']}")
+    else:
+        print(f"Video procesado guardado en: {result['output_path']}")
     
-    # Leer video de entrada y cargar todos los frames en memoria
-    video_frames = read_video(input_path)
+    if 'io' in result:
+        io_report = result['io']
+        print(f"E/S en segundo plano: {len(io_report['tasks'])} tareas, {io_report['io_seconds']:.1f} s; "
+              f"espera {io_report['wait_seconds']:.1f} s; ahorro {io_report['saved_seconds']:.1f} s")
+
+
+def run_analysis(args, model=None, progress=None, outputs=None):
+    """
+    Ejecuta el pipeline completo sobre un video ya validado.
     
-    if args.verbose:
-        print(f"Video cargado: {len(video_frames)} frames")
+    Args:
+        args (argparse.Namespace): Opciones del análisis (ver build_parser)
+        model: Modelo YOLO ya cargado para no recargarlo en cada análisis (opcional)
+        progress (callable): Se llama como progress(etapa, datos) al empezar cada etapa
+                             de PIPELINE_STAGES; datos lleva resultados parciales (opcional)
+        outputs (dict): Si se pasa, se le añaden 'tracks', 'team_ball_control' y
+                        'frame_rate' para compararlos entre modos (opcional)
     
-    # Inicializar el tracker con el modelo YOLO entrenado
-    if args.verbose:
-        print("Inicializando tracker...")
+    Returns:
+        dict: Ruta del video generado, número de frames y posesión por equipo; con
+              --async-io, 'io' con los tiempos de la E/S en segundo plano
+    """
+    def report(stage, message, **data):
+        if args.verbose:
+            print(message)
+        if progress is not None:
+            progress(stage, data)
     
-    tracker = Tracker(model_path)
+    input_path = resolve_input_path(args.input)
+    model_path = resolve_model_path(args.model)
+    
+    # Crear directorio de stubs si no existe
+    Path(args.stub_dir).mkdir(parents=True, exist_ok=True)
+    
+    # Crear ruta de salida
+    output_path = create_output_path(input_path, args.output_dir, args.headless)
+    
+    from utils import background_io
+    from utils.progress import ProgressReporter, set_reporter
+    
+    # El informe y el orquestador son de esta ejecución (ContextVar): se desactivan
+    # aunque falle una etapa, después de esperar a la E/S pendiente
+    reporter = None
+    io = None
+    # Recursos abiertos por las etapas (p. ej. el decodificador del modo --headless)
+    resources = contextlib.ExitStack()
+    try:
+        # Progreso por etapa en terminal y/o archivo de estado
+        if args.progress or args.status_file:
+            reporter = ProgressReporter(stream=sys.stderr if args.progress else None, status_path=args.status_file)
+            set_reporter(reporter)
+        
+        # E/S en segundo plano: los stubs, el sondeo del video y las exportaciones se
+        # ejecutan en un bucle asyncio mientras siguen las etapas de cálculo
+        if args.async_io:
+            io = background_io.BackgroundIO()
+            background_io.set_orchestrator(io)
+        
+        result = _run_pipeline(args, model, report, outputs, input_path, model_path, output_path, resources)
+        if io is not None:
+            # Los stubs y exportaciones deben estar en disco al volver
+            result['io'] = io.close()
+        return result
+    finally:
+        resources.close()
+        if io is not None:
+            io.close(raise_errors=False)
+            background_io.set_orchestrator(None)
+        if reporter is not None:
+            reporter.close()
+            set_reporter(None)
+
+
+def _run_pipeline(args, model, report, outputs, input_path, model_path, output_path, resources):
+    """
+    Etapas del pipeline de run_analysis, con el informe de progreso y la E/S en
+    segundo plano ya configurados. Lo que se registra en resources
+    (contextlib.ExitStack) se cierra al terminar run_analysis, también si falla.
+    
+    Returns:
+        dict: Ruta de salida, número de frames y posesión por equipo
+    """
+    from utils import background_io
+    
+    # Al reanudar se reutilizan los stubs de las etapas ya terminadas aunque se pida --no-cache
+    use_stubs = not args.no_cache or args.resume
+    checkpoint_interval = args.checkpoint_interval or (500 if args.resume else 0)
+    
+    # Opciones que cambian el resultado de cada etapa (forman la firma de su checkpoint)
+    tracking_options = ('tracker', 'track_thresh', 'track_buffer', 'match_thresh', 'imgsz', 'ball_roi',
+                        'ball_model', 'shot_detection')
+    stage_options = {
+        'tracks': tracking_options,
+        'camera_movement': ('shot_detection',),
+        'encoding': tracking_options + ('reid', 'no_interpolation', 'no_camera_movement', 'no_perspective',
+                                        'auto_calibration', 'no_speed_distance'),
+    }
+    
+    def stage_checkpoint(name):
+        # Checkpoint de una etapa (None si están desactivados); sin --resume se empieza de cero.
+        # Se descarta si se guardó con otro video, modelo u opciones de la etapa. El tamaño
+        # de chunk no forma parte de la firma: el checkpoint guarda el siguiente frame y
+        # un --resume sin --checkpoint-interval puede continuar el de otro intervalo
+        if not checkpoint_interval:
+            return None
+        
+        from utils import StageCheckpoint
+        from utils.checkpoint import file_signature
+        
+        signature = {
+            'video': [os.path.abspath(input_path)] + file_signature(input_path),
+            **{option: getattr(args, option) for option in stage_options[name]},
+        }
+        if name != 'camera_movement':
+            # El movimiento de cámara no depende del modelo
+            signature['model'] = [os.path.abspath(model_path)] + file_signature(model_path)
+        checkpoint = StageCheckpoint(args.stub_dir, name, signature)
+        if not args.resume:
+            checkpoint.clear()
+        return checkpoint
+    
+    # ===== CARGA Y PROCESAMIENTO DEL VIDEO =====
+    report("load", "Cargando video...")
+    
+    import numpy as np
+    from utils import read_video, save_video, get_video_fps
+    from utils.checkpoint import read_stub
+    
+    # Mientras se decodifica el video: tasa de frames y stubs de las etapas siguientes
+    frame_rate_future = background_io.submit("probe:fps", get_video_fps, input_path)
+    if use_stubs:
+        for stub_name in ('shots_stub.pkl', 'track_stubs.pkl', 'camera_movement_stub.pkl', 'calibration_stub.pkl'):
+            background_io.prefetch(f"prefetch:{stub_name}", os.path.join(args.stub_dir, stub_name), read_stub)
+    
+    if args.headless:
+        # Solo análisis: los frames se decodifican bajo demanda y no se guardan en memoria
+        from utils import FrameSource
+        
+        video_frames = resources.enter_context(FrameSource(input_path, stub_dir=args.stub_dir))
+    else:
+        # Leer video de entrada y cargar todos los frames en memoria
+        video_frames = read_video(input_path)
+    
+    report("load", f"Video cargado: {len(video_frames)} frames", frames=len(video_frames))
+    
+    # Detección de cortes de cámara
+    segments = None
+    skip_types = ()
+    if args.shot_detection:
+        report("shots", "Detectando cortes de cámara...")
+        
+        from shot_detection import ShotBoundaryDetector
+        from shot_detection.shot_detector import SEGMENT_CLOSEUP, SEGMENT_REPLAY
+        
+        shot_detector = ShotBoundaryDetector()
+        segments = shot_detector.get_segments(
+            video_frames,
+            read_from_stub=use_stubs,
+            stub_path=os.path.join(args.stub_dir, 'shots_stub.pkl')
+        )
+        skip_types = (SEGMENT_CLOSEUP, SEGMENT_REPLAY)
+        
+        if args.verbose:
+            skipped = sum(s['end'] - s['start'] for s in segments if s['type'] in skip_types)
+            print(f"Segmentos: {len(segments)} ({skipped} frames omitidos)")
+    
+    # Inicializar el tracker con el modelo YOLO entrenado
+    report("tracking", "Inicializando tracker...")
+    
+    from trackers import Tracker, BallRoiDetector
+    
+    # Mismos parámetros para jugadores y árbitros; la tasa de frames se toma del video
+    frame_rate = background_io.result(frame_rate_future)
+    class_params = {
+        'track_activation_threshold': args.track_thresh,
+        'lost_track_buffer': args.track_buffer,
+        'minimum_matching_threshold': args.match_thresh,
+    }
+    tracker = Tracker(
+        model_path,
+        tracker_type=args.tracker,
+        frame_rate=int(round(frame_rate)),
+        tracker_params={object_name: class_params for object_name in Tracker.TRACKED_CLASSES},
+        model=model,
+        imgsz=args.imgsz,
+        ball_roi=BallRoiDetector() if args.ball_roi else None,
+        ball_model_path=resolve_model_path(args.ball_model) if args.ball_model else None
+    )
     
     # Ejecutar detección y seguimiento de objetos en el video
     if args.verbose:
@@ -236,26 +603,54 @@ Ejemplos de uso:
     
     tracks = tracker.object_tracks(
         video_frames, 
-        read_from_stub=not args.no_cache, 
-        stub_path=os.path.join(args.stub_dir, "track_stubs.pkl")
+        read_from_stub=use_stubs, 
+        stub_path=os.path.join(args.stub_dir, "track_stubs.pkl"),
+        segments=segments,
+        skip_types=skip_types,
+        checkpoint=stage_checkpoint("tracks"),
+        # Sin video en memoria se decodifica un lote de detección cada vez
+        chunk_size=checkpoint_interval or (20 if args.headless else 500)
     )
     
+    # Fusión de tracks fragmentados (menos IDs, menos KMeans por jugador)
+    if args.reid:
+        report("reid", "Fusionando tracks fragmentados...")
+        
+        from trackers import TrackReidentifier
+        
+        reidentifier = TrackReidentifier()
+        merged_ids = reidentifier.merge_tracks(video_frames, tracks, 'players')
+        
+        if args.verbose:
+            print(f"Tracks fusionados: {len(merged_ids)}")
+    
+    # Interpolación de la posición de la pelota (antes de calcular posiciones,
+    # para que los frames interpolados también tengan posición en el campo)
+    if not args.no_interpolation:
+        report("interpolation", "Interpolando posiciones de la pelota...")
+        
+        tracks['ball'] = tracker.interpolate_ball_positions(tracks['ball'], segments)
+    
     # Obteniendo posiciones de objetos
-    if args.verbose:
-        print("Calculando posiciones...")
+    report("positions", "Calculando posiciones...",
+           players=len({player_id for frame_players in tracks['players'] for player_id in frame_players}))
     
     tracker.add_possition_to_tracks(tracks)
     
     # Estimación del movimiento de la cámara
     if not args.no_camera_movement:
-        if args.verbose:
-            print("Estimando movimiento de cámara...")
+        report("camera", "Estimando movimiento de cámara...")
+        
+        from mov_camera import EstimadorMovimientoCam
         
         camera_movement_estimator = EstimadorMovimientoCam(video_frames[0])
         camera_movement_per_frame = camera_movement_estimator.get_camera_movement(
             video_frames, 
-            readFromStub=not args.no_cache,
-            stubPath=os.path.join(args.stub_dir, 'camera_movement_stub.pkl')
+            readFromStub=use_stubs,
+            stubPath=os.path.join(args.stub_dir, 'camera_movement_stub.pkl'),
+            segments=segments,
+            checkpoint=stage_checkpoint("camera_movement"),
+            chunkSize=checkpoint_interval or 500
         )
         
         camera_movement_estimator.add_adjust_position_to_tracks(tracks, camera_movement_per_frame)
@@ -263,61 +658,74 @@ Ejemplos de uso:
         camera_movement_per_frame = None
     
     # Transformador de perspectiva
+    pitch_extent = None
     if not args.no_perspective:
-        if args.verbose:
-            print("Aplicando transformación de perspectiva...")
+        report("perspective", "Aplicando transformación de perspectiva...")
+        
+        from perspective_transformer import ViewTransformer, PitchCalibrator
         
         view_transformer = ViewTransformer()
-        view_transformer.add_transformed_position_2_tracks(tracks)
-    
-    # Interpolación de la posición de la pelota
-    if not args.no_interpolation:
-        if args.verbose:
-            print("Interpolando posiciones de la pelota...")
         
-        tracks['ball'] = tracker.interpolate_ball_positions(tracks['ball'])
+        if args.auto_calibration:
+            if args.verbose:
+                print("Calibrando homografía del campo...")
+            
+            # Los vértices de referencia del transformador (en el sistema del campo completo,
+            # el mismo del modelo de líneas) sirven como aproximación inicial
+            pitch_calibrator = PitchCalibrator(view_transformer.perspective_transformer)
+            homographies = pitch_calibrator.get_homographies(
+                video_frames,
+                camera_movement_per_frame,
+                segments=[(s['start'], s['end']) for s in segments] if segments else None,
+                readFromStub=use_stubs,
+                stubPath=os.path.join(args.stub_dir, 'calibration_stub.pkl')
+            )
+            view_transformer.set_homographies(homographies)
+        
+        view_transformer.add_transformed_position_2_tracks(tracks)
+        # Parte del campo que cubren las posiciones (las métricas tácticas dependen de ella)
+        pitch_extent = view_transformer.pitch_extent
     
     # Estimador de información (después de tener las posiciones transformadas)
     if not args.no_speed_distance:
-        if args.verbose:
-            print("Calculando velocidad y distancia...")
+        report("speed", "Calculando velocidad y distancia...")
+        
+        from info import SpeedAndDistanceEstimator
         
         speed_and_distance_estimator = SpeedAndDistanceEstimator()
         speed_and_distance_estimator.add_speed_and_distance_2_tracks(tracks)
 
     # ===== ASIGNACIÓN DE EQUIPOS POR COLOR =====
-    if args.verbose:
-        print("Asignando equipos por color...")
+    report("teams", "Asignando equipos por color...")
+    
+    from assigner import TeamAssigner
     
     # Inicializar el asignador de equipos basado en colores de camisetas
     team_assigner = TeamAssigner()
     
-    # Analizar el primer frame para determinar los colores de los dos equipos
-    team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
+    # Analizar el primer frame con jugadores para determinar los colores de los dos equipos
+    # (con detección de cortes, el primero puede ser un primer plano omitido)
+    first_frame = next((i for i, players in enumerate(tracks['players']) if players), 0)
+    team_assigner.assign_team_color(video_frames[first_frame], tracks['players'][first_frame])
     
-    # Asignar equipo a cada jugador en todos los frames
-    for frame_num, player_track in enumerate(tracks['players']):
-        for player_id, track in player_track.items():
-            # Determinar el equipo del jugador basándose en el color de su camiseta
-            team = team_assigner.get_player_team(
-                video_frames[frame_num],   
-                track['bbox'],
-                player_id
-            )
-            
-            # Almacenar información del equipo en los datos de tracking
-            tracks['players'][frame_num][player_id]['team'] = team 
-            tracks['players'][frame_num][player_id]['team_color'] = team_assigner.team_colors[team]
+    # Asignar un equipo por track con unos pocos recortes muestreados y
+    # propagarlo a sus detecciones (el color se consulta en team_colors al dibujar)
+    team_assigner.assign_track_teams(video_frames, tracks['players'])
+    team_assigner.broadcast_teams(tracks['players'])
     
     # Asigna el jugador que tiene el balón
-    if args.verbose:
-        print("Asignando posesión del balón...")
+    report("possession", "Asignando posesión del balón...")
+    
+    from asignadorJugador import PlayerBallAssigner
     
     player_assigner = PlayerBallAssigner()
     team_ball_control = []
     for frame_num, player_track in enumerate(tracks['players']):
-        ball_bbox = tracks['ball'][frame_num][1]['bbox']
-        assigned_player = player_assigner.assign_ball_to_player(player_track, ball_bbox)
+        # Puede no haber balón si el hueco superó el límite de interpolación
+        ball_track = tracks['ball'][frame_num].get(1)
+        assigned_player = -1
+        if ball_track is not None:
+            assigned_player = player_assigner.assign_ball_to_player(player_track, ball_track['bbox'])
         
         if assigned_player != -1:
             tracks['players'][frame_num][assigned_player]['has_ball'] = True
@@ -329,32 +737,98 @@ Ejemplos de uso:
                 # Decide qué valor inicial poner, por ejemplo 0 o None
                 team_ball_control.append(0)
     team_ball_control = np.array(team_ball_control)
+    possession = {
+        f"team_{team}": round(float(np.mean(team_ball_control == team)) * 100, 1) for team in (1, 2)
+    }
+    if outputs is not None:
+        outputs.update(tracks=tracks, team_ball_control=team_ball_control, frame_rate=frame_rate)
+    
+    # ===== EXPORTACIONES =====
+    # Los tracks ya no cambian: con --async-io se escriben mientras se anota y codifica el video
+    stem = Path(input_path).stem
+    if args.headless or args.export_results:
+        from export import write_results_bundle
+        
+        bundle_path = output_path if args.headless else create_output_path(input_path, args.output_dir, headless=True)
+        background_io.submit("export:results", write_results_bundle, bundle_path, tracks, team_ball_control,
+                             frame_rate, metadata={
+            'video': os.path.basename(input_path),
+            'model': os.path.basename(model_path),
+            # Permite emparejar los equipos entre varias cámaras (fusion)
+            'team_colors': {str(team): [round(float(c), 1) for c in color]
+                            for team, color in team_assigner.team_colors.items()},
+        }, pitch_extent=pitch_extent)
+    
+    if args.heatmaps:
+        from visualization import HeatmapGenerator
+        
+        background_io.submit("export:heatmaps", HeatmapGenerator(tracks).save_match_heatmaps,
+                             args.output_dir, prefix=f"{stem}_")
+    
+    if args.highlights:
+        from summary import cut_match_highlights
+        
+        background_io.submit("export:highlights", cut_match_highlights, tracks, input_path,
+                             os.path.join(args.output_dir, f"{stem}_highlights{Path(input_path).suffix}"), frame_rate,
+                             calibrated=args.auto_calibration and not args.no_perspective)
+
+    if args.headless:
+        # ===== PAQUETE DE RESULTADOS (SIN VIDEO) =====
+        report("save", f"Guardando resultados en: {output_path}", possession=possession)
+        
+        return {
+            "output_path": output_path,
+            "frames": len(video_frames),
+            "possession": possession,
+        }
 
     # ===== GENERACIÓN DEL VIDEO DE SALIDA =====
-    if args.verbose:
-        print("Generando anotaciones...")
+    report("annotation", "Generando anotaciones...", possession=possession)
     
-    # Dibujar anotaciones (elipses con colores de equipo, IDs, etc.) en todos los frames
-    output_video_frames = tracker.draw_annotations(video_frames, tracks, team_ball_control)
-    
-    # Dibuja el movimiento de la cámara
-    if not args.no_camera_movement and camera_movement_per_frame is not None:
-        output_video_frames = camera_movement_estimator.draw_camera_movement(output_video_frames, camera_movement_per_frame)
+    annotator = FrameAnnotator(
+        tracker, tracks, team_ball_control, team_assigner.team_colors,
+        camera_movement_estimator if camera_movement_per_frame is not None else None,
+        camera_movement_per_frame,
+        speed_and_distance_estimator if not args.no_speed_distance else None
+    )
     
-    # Dibuja la información de los jugadores
-    if not args.no_speed_distance:
-        speed_and_distance_estimator.draw_speed_and_distance(output_video_frames, tracks)
+    if args.workers > 1:
+        # Anotar y codificar en paralelo: los frames se decodifican de nuevo en un
+        # buffer de memoria compartida y se anotan in-place en varios procesos
+        report("save", f"Anotando y guardando video en: {output_path} ({args.workers} workers)")
+        
+        from utils import run_frame_pipeline
+        
+        run_frame_pipeline(input_path, output_path, annotator, num_workers=args.workers, fps=frame_rate)
+    elif checkpoint_interval:
+        # Anotar y codificar por partes para poder reanudar si el proceso se interrumpe
+        report("save", f"Anotando y guardando video por partes en: {output_path}")
+        
+        from utils import save_video_resumable
+        
+        save_video_resumable(video_frames, output_path, annotator, stage_checkpoint("encoding"),
+                             chunk_size=checkpoint_interval, fps=frame_rate)
+    else:
+        # Dibujar todas las anotaciones (elipses con colores de equipo, IDs, movimiento
+        # de cámara, velocidad y distancia) directamente sobre los frames: los
+        # originales ya no se usan y así no se duplica el video en memoria
+        from utils.progress import track
+        
+        output_video_frames = [
+            annotator(frame, frame_num)
+            for frame_num, frame in track(enumerate(video_frames), "draw_annotations", len(video_frames))
+        ]
 
-    # Guardar el video procesado con todas las anotaciones
-    if args.verbose:
-        print(f"Guardando video en: {output_path}")
-    
-    save_video(output_video_frames, output_path)
+        # Guardar el video procesado con todas las anotaciones
+        report("save", f"Guardando video en: {output_path}")
+        
+        save_video(output_video_frames, output_path, fps=frame_rate)
     
-    if args.verbose:
-        print("¡Procesamiento completado!")
-    else:
-        print(f"Video procesado guardado en: {output_path}")
+    return {
+        "output_path": output_path,
+        "frames": len(video_frames),
+        "possession": possession,
+    }
 
 
 # Punto de entrada del programa
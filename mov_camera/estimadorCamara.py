@@ -1,10 +1,12 @@
 import cv2
-import pickle
 import numpy as np
 import os
 import sys
 sys.path.append('../')
 from utils import measure_distance
+from utils.checkpoint import atomic_pickle_dump, load_stub
+from utils import progress, background_io
+from visualization.annotation_renderer import AnnotationRenderer
 
 class EstimadorMovimientoCam():
     def __init__(self,frame):
@@ -28,6 +30,8 @@ class EstimadorMovimientoCam():
             blockSize = 7,
             mask = maskFeatures
         )
+        
+        self.renderer = AnnotationRenderer()
     
     def add_adjust_position_to_tracks(self, tracks, camera_movement_per_frame):
         for object, object_tracks in tracks.items():
@@ -38,19 +42,45 @@ class EstimadorMovimientoCam():
                     positionAdjusted = (position[0]-cameraMovement[0],position[1]-cameraMovement[1])
                     tracks[object][frameNum][trackId]['position_adjusted'] = positionAdjusted
         
-    def get_camera_movement(self,frames,readFromStub=False, stubPath=None):
+    def get_camera_movement(self,frames,readFromStub=False, stubPath=None, segments=None, checkpoint=None, chunkSize=500):
+        # segments: segmentos sin cortes de cámara; en cada corte se vuelven a buscar features
+        # checkpoint: StageCheckpoint opcional; se guarda cada chunkSize frames y se reanuda desde él
         
         if readFromStub and stubPath is not None and os.path.exists(stubPath):
-            with open(stubPath,'rb') as f:
-                return pickle.load(f)
+            return load_stub(stubPath)
         
         cameraMovement = [[0,0]]*len(frames)
         
         oldGray = cv2.cvtColor(frames[0],cv2.COLOR_BGR2GRAY)
         oldFeatures = cv2.goodFeaturesToTrack(oldGray,**self.features)
+        firstFrame = 1
+        
+        # Reanudar: movimiento ya calculado y último frame/features de referencia
+        saved = checkpoint.load() if checkpoint is not None else None
+        if saved is not None:
+            chunks, state = saved
+            for chunk in chunks:
+                cameraMovement[chunk['start']:chunk['start']+len(chunk['movement'])] = chunk['movement']
+            oldGray, oldFeatures, firstFrame = state['oldGray'], state['oldFeatures'], state['next_frame']
+        chunkStart = firstFrame
+        
+        cutFrames = set()
+        if segments is not None:
+            cutFrames = {segment['start'] for segment in segments}
         
-        for frameNum in range(1,len(frames)):
+        for frameNum in progress.track(range(firstFrame,len(frames)), "camera_movement"):
+            if checkpoint is not None and frameNum - chunkStart >= chunkSize:
+                checkpoint.save(frameNum, {'start': chunkStart, 'movement': cameraMovement[chunkStart:frameNum]},
+                                {'oldGray': oldGray, 'oldFeatures': oldFeatures})
+                chunkStart = frameNum
+            
             frameGray = cv2.cvtColor(frames[frameNum],cv2.COLOR_BGR2GRAY)
+            
+            # Tras un corte (o sin features) no hay flujo óptico válido respecto al frame anterior
+            if frameNum in cutFrames or oldFeatures is None:
+                oldFeatures = cv2.goodFeaturesToTrack(frameGray,**self.features)
+                oldGray = frameGray
+                continue
             newFeatures, _, _ = cv2.calcOpticalFlowPyrLK(oldGray, frameGray, oldFeatures, None, **self.lk_params)
             
             maxDistance = 0
@@ -74,26 +104,32 @@ class EstimadorMovimientoCam():
             oldGray = frameGray.copy()
             
         if stubPath is not None:
-            with open(stubPath,'wb') as f:
-                pickle.dump(cameraMovement,f)
+            saved = background_io.submit("stub:camera_movement", atomic_pickle_dump,
+                                         [list(movement) for movement in cameraMovement], stubPath)
+            if checkpoint is not None:
+                background_io.result(saved)
+        if checkpoint is not None:
+            checkpoint.clear()
             
         return cameraMovement
     
     def draw_camera_movement(self, frames, camera_movement_per_frame):
         output_frames=[]
         
-        for frameNum, frame in enumerate(frames):
-            frame = frame.copy()
-            
-            overlay = frame.copy()
-            cv2.rectangle(overlay,(0,0),(500,80), (255,255,255), -1)
-            alpha = 0.6
-            cv2.addWeighted(overlay,alpha,frame,1-alpha,0,frame)
-            
-            xMov, yMov = camera_movement_per_frame[frameNum]
-            frame = cv2.putText(frame,f"Movimiento de camara X: {xMov: 2f}", (10,30), cv2.FONT_HERSHEY_SIMPLEX,0.6, (0,0,0),2)
-            frame = cv2.putText(frame,f"Movimiento de camara Y: {yMov: 2f}", (10,60), cv2.FONT_HERSHEY_SIMPLEX,0.6, (0,0,0),2)
+        for frameNum, frame in progress.track(enumerate(frames), "draw_camera_movement", len(frames)):
+            frame = self.draw_camera_movement_on_frame(frame.copy(), camera_movement_per_frame[frameNum])
             
             output_frames.append(frame)
             
-        return output_frames
\ No newline at end of file
+        return output_frames
+    
+    def draw_camera_movement_on_frame(self, frame, camera_movement):
+        # Dibuja el movimiento de cámara de un frame (in-place)
+        # Rectángulo semitransparente: solo se mezcla la región del panel
+        self.renderer.blend_rect(frame, (0, 0), (500, 80), (255, 255, 255), 0.6)
+        
+        xMov, yMov = camera_movement
+        frame = cv2.putText(frame,f"Movimiento de camara X: {xMov: 2f}", (10,30), cv2.FONT_HERSHEY_SIMPLEX,0.6, (0,0,0),2)
+        frame = cv2.putText(frame,f"Movimiento de camara Y: {yMov: 2f}", (10,60), cv2.FONT_HERSHEY_SIMPLEX,0.6, (0,0,0),2)
+        
+        return frame
\ No newline at end of file
@@ -1 +1,2 @@
-from .view_tranformer import ViewTransformer
\ No newline at end of file
+from .view_tranformer import ViewTransformer
+from .pitch_calibration import PitchCalibrator
\ No newline at end of file
@@ -0,0 +1,227 @@
+import numpy as np
+import cv2
+import os
+
+from utils import background_io
+from utils.checkpoint import atomic_pickle_dump, load_stub
+
+PITCH_LENGTH = 105.0
+PITCH_WIDTH = 68.0
+
+
+def pitch_model_keypoints(length=PITCH_LENGTH, width=PITCH_WIDTH):
+    """
+    Intersecciones de las líneas del campo en metros (origen en una esquina).
+
+    Incluye esquinas, extremos de la línea de medio campo, sus cortes con el
+    círculo central y las esquinas de las áreas grande y pequeña de ambos lados.
+    """
+    center = width / 2
+    points = [
+        (0, 0), (0, width), (length, 0), (length, width),
+        (length / 2, 0), (length / 2, width),
+        (length / 2, center - 9.15), (length / 2, center + 9.15),
+    ]
+    for half_width, depth in ((20.16, 16.5), (9.16, 5.5)):
+        for y in (center - half_width, center + half_width):
+            points += [(0, y), (depth, y), (length, y), (length - depth, y)]
+    return np.array(points, dtype=np.float32)
+
+
+class PitchCalibrator():
+    """
+    Calibración automática de la homografía imagen -> campo por segmento de video.
+
+    En unos pocos keyframes por segmento detecta las líneas del campo, calcula sus
+    intersecciones y las empareja con los puntos del modelo del campo proyectados
+    con la homografía actual; con esas correspondencias reestima la homografía
+    (RANSAC). Entre keyframes la homografía se propaga con el movimiento de cámara.
+    """
+    def __init__(self, initial_homography, keyframe_interval=120, match_radius=40, ransac_threshold=1.0):
+        """
+        Args:
+            initial_homography (np.ndarray): Homografía aproximada 3x3 píxel -> campo para el primer keyframe,
+                                             en el sistema de pitch_model_keypoints (p. ej. la de ViewTransformer)
+            keyframe_interval (int): Frames entre recalibraciones dentro de un segmento
+            match_radius (float): Distancia máxima en píxeles para emparejar un punto detectado con el modelo
+            ransac_threshold (float): Error de reproyección máximo de RANSAC en metros
+        """
+        self.initial_homography = np.asarray(initial_homography, dtype=np.float64)
+        self.keyframe_interval = keyframe_interval
+        self.match_radius = match_radius
+        self.ransac_threshold = ransac_threshold
+        self.min_matches = 4
+
+        self.model_keypoints = pitch_model_keypoints()
+
+        # Homografías de los keyframes por segmento: {(inicio, fin): [(frame, H), ...]}
+        self.segment_cache = {}
+
+    def detect_line_keypoints(self, frame):
+        """
+        Detecta las intersecciones de las líneas blancas del campo en un frame.
+
+        Returns:
+            np.ndarray: Puntos (n, 2) en píxeles
+        """
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        grass = cv2.inRange(hsv, (35, 40, 40), (85, 255, 255))
+        grass = cv2.morphologyEx(grass, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+
+        # Top-hat resalta estructuras finas y claras (las líneas) sobre el césped
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, np.ones((9, 9), np.uint8))
+        lines_mask = np.where((tophat > 30) & (grass > 0), 255, 0).astype(np.uint8)
+
+        segments = cv2.HoughLinesP(lines_mask, 1, np.pi / 180, threshold=80, minLineLength=60, maxLineGap=10)
+        if segments is None or len(segments) < 2:
+            return np.zeros((0, 2), dtype=np.float32)
+
+        segments = segments.reshape(-1, 4).astype(np.float64)
+        origins = segments[:, :2]
+        directions = segments[:, 2:] - segments[:, :2]
+        lengths = np.linalg.norm(directions, axis=1)
+
+        # Intersección de todos los pares de segmentos no paralelos
+        i, j = np.triu_indices(len(segments), 1)
+        cross = directions[i, 0] * directions[j, 1] - directions[i, 1] * directions[j, 0]
+        not_parallel = np.abs(cross) > np.sin(np.radians(20)) * lengths[i] * lengths[j]
+        i, j, cross = i[not_parallel], j[not_parallel], cross[not_parallel]
+
+        delta = origins[j] - origins[i]
+        t = (delta[:, 0] * directions[j, 1] - delta[:, 1] * directions[j, 0]) / cross
+        u = (delta[:, 0] * directions[i, 1] - delta[:, 1] * directions[i, 0]) / cross
+
+        # La intersección debe caer cerca de ambos segmentos (se tolera prolongarlos 20 px)
+        tolerance_i, tolerance_j = 20 / lengths[i], 20 / lengths[j]
+        near = (t >= -tolerance_i) & (t <= 1 + tolerance_i) & (u >= -tolerance_j) & (u <= 1 + tolerance_j)
+        points = origins[i[near]] + t[near, None] * directions[i[near]]
+
+        height, width = frame.shape[:2]
+        inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+        points = points[inside]
+
+        # Fusionar intersecciones casi coincidentes (líneas gruesas dan varios segmentos)
+        _, unique_idx = np.unique(np.round(points / 8), axis=0, return_index=True)
+        return points[np.sort(unique_idx)].astype(np.float32)
+
+    def refine_homography(self, frame, homography):
+        """
+        Reestima la homografía de un frame a partir de una aproximación.
+
+        Args:
+            frame: Frame del video
+            homography (np.ndarray): Homografía aproximada píxel -> campo
+
+        Returns:
+            np.ndarray: Homografía refinada, o None si no hay correspondencias suficientes
+        """
+        detected = self.detect_line_keypoints(frame)
+        if len(detected) < self.min_matches:
+            return None
+
+        try:
+            inverse = np.linalg.inv(homography)
+        except np.linalg.LinAlgError:
+            return None
+        projected = cv2.perspectiveTransform(self.model_keypoints.reshape(-1, 1, 2), inverse).reshape(-1, 2)
+
+        # Emparejar cada punto del modelo con el punto detectado más cercano
+        distances = np.linalg.norm(projected[:, None, :] - detected[None, :, :], axis=2)
+        nearest = distances.argmin(axis=1)
+        matched = distances[np.arange(len(projected)), nearest] < self.match_radius
+        if np.count_nonzero(matched) < self.min_matches:
+            return None
+
+        pixel_points = detected[nearest[matched]]
+        pitch_points = self.model_keypoints[matched]
+        refined, inliers = cv2.findHomography(pixel_points, pitch_points, cv2.RANSAC, self.ransac_threshold)
+        if refined is None or inliers is None or np.count_nonzero(inliers) < self.min_matches:
+            return None
+        return refined
+
+    def calibrate_segment(self, frames, start, end, camera_offsets, homography):
+        """
+        Calibra los keyframes de un segmento [start, end).
+
+        Args:
+            frames (list): Frames del video
+            start, end (int): Límites del segmento
+            camera_offsets (np.ndarray): Movimiento de cámara acumulado por frame (N, 2)
+            homography (np.ndarray): Homografía aproximada para el primer frame del segmento
+
+        Returns:
+            list: [(frame, H), ...] homografías de los keyframes aceptados
+        """
+        keyframes = []
+        current_frame, current_h = start, homography
+        for frame_num in range(start, end, self.keyframe_interval):
+            guess = current_h @ self._translation(camera_offsets[frame_num] - camera_offsets[current_frame])
+            refined = self.refine_homography(frames[frame_num], guess)
+            if refined is not None:
+                current_frame, current_h = frame_num, refined
+                keyframes.append((frame_num, refined))
+
+        # Sin calibraciones válidas se propaga la aproximación inicial
+        if not keyframes:
+            keyframes.append((start, homography))
+        return keyframes
+
+    @staticmethod
+    def _translation(shift):
+        """
+        Matriz que lleva un punto del frame actual al frame del keyframe
+        (los puntos fijos se desplazan en sentido contrario al movimiento de cámara).
+        """
+        matrix = np.eye(3)
+        matrix[0, 2], matrix[1, 2] = shift[0], shift[1]
+        return matrix
+
+    def get_homographies(self, frames, camera_movement_per_frame=None, segments=None,
+                         readFromStub=False, stubPath=None):
+        """
+        Calcula una homografía píxel -> campo por frame.
+
+        Args:
+            frames (list): Frames del video
+            camera_movement_per_frame (list): Movimiento de cámara [x, y] por frame (opcional)
+            segments (list): Segmentos [(inicio, fin), ...] sin cortes de cámara (por defecto, uno solo)
+            readFromStub (bool): Si cargar las homografías de keyframes desde cache
+            stubPath (str): Ruta del archivo cache
+
+        Returns:
+            np.ndarray: Array (N, 3, 3) de homografías
+        """
+        num_frames = len(frames)
+        if segments is None:
+            segments = [(0, num_frames)]
+        if camera_movement_per_frame is None:
+            camera_offsets = np.zeros((num_frames, 2))
+        else:
+            camera_offsets = np.cumsum(np.asarray(camera_movement_per_frame, dtype=np.float64), axis=0)
+
+        if readFromStub and stubPath is not None and os.path.exists(stubPath):
+            self.segment_cache.update(load_stub(stubPath))
+
+        homographies = np.empty((num_frames, 3, 3))
+        previous_h = self.initial_homography
+        for start, end in segments:
+            key = (start, end)
+            if key not in self.segment_cache:
+                self.segment_cache[key] = self.calibrate_segment(frames, start, end, camera_offsets, previous_h)
+            keyframes = self.segment_cache[key]
+
+            # Propagar cada keyframe hasta el siguiente con el movimiento de cámara
+            bounds = [frame_num for frame_num, _ in keyframes[1:]] + [end]
+            for (key_frame, key_h), stop in zip(keyframes, bounds):
+                first = start if key_frame == keyframes[0][0] else key_frame
+                shifts = camera_offsets[first:stop] - camera_offsets[key_frame]
+                translations = np.tile(np.eye(3), (stop - first, 1, 1))
+                translations[:, 0, 2], translations[:, 1, 2] = shifts[:, 0], shifts[:, 1]
+                homographies[first:stop] = key_h @ translations
+            previous_h = keyframes[-1][1]
+
+        if stubPath is not None:
+            background_io.submit("stub:calibration", atomic_pickle_dump, dict(self.segment_cache), stubPath)
+
+        return homographies
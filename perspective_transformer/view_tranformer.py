@@ -2,9 +2,22 @@ import numpy as np
 import cv2
 
 class ViewTransformer():
-    def __init__(self):
+    def __init__(self, court_offset=None):
+        """
+        Las posiciones se expresan en el sistema del campo completo (105 x 68 m con
+        origen en una esquina), el mismo de la calibración automática.
+        
+        Args:
+            court_offset (float): Distancia en metros de la línea de gol izquierda al borde
+                                  izquierdo del tramo de referencia de 23.32 m (por defecto,
+                                  el tramo acaba en la línea de medio campo)
+        """
         court_width = 68
         court_length = 23.32
+        if court_offset is None:
+            court_offset = 105.0 / 2 - court_length
+        self.court_offset = court_offset
+        self.court_length = court_length
         
         self.pixel_vertices = np.array([
             [110,1035],
@@ -14,10 +27,10 @@ class ViewTransformer():
         ])
         
         self.target_vertices = np.array([
-            [0,court_width],
-            [0,0],
-            [court_length,0],
-            [court_length,court_width]
+            [court_offset,court_width],
+            [court_offset,0],
+            [court_offset+court_length,0],
+            [court_offset+court_length,court_width]
         ])
         
         self.pixel_vertices = self.pixel_vertices.astype(np.float32)
@@ -25,6 +38,42 @@ class ViewTransformer():
         
         self.perspective_transformer = cv2.getPerspectiveTransform(self.pixel_vertices,self.target_vertices)
         
+        # Homografías por frame (calibración automática); None usa los vértices fijos
+        self.homographies = None
+        self.pitch_length = 105.0
+        self.pitch_width = 68.0
+        self.pitch_margin = 5.0
+    
+    def set_homographies(self, homographies):
+        self.homographies = np.asarray(homographies, dtype=np.float64)
+    
+    @property
+    def pitch_extent(self):
+        """
+        Tramo del eje x (en metros) que pueden ocupar las posiciones transformadas.
+        
+        Returns:
+            tuple: (x mínima, x máxima); el campo completo con calibración automática
+                   y el tramo de referencia con los vértices fijos
+        """
+        if self.homographies is not None:
+            return (0.0, self.pitch_length)
+        return (self.court_offset, self.court_offset + self.court_length)
+    
+    def transform_points(self, points, homography):
+        """
+        Transforma varios puntos con una homografía y descarta los que caen fuera
+        del campo (con un margen para balones fuera de banda o en la portería).
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1,1,2)
+        transformed = cv2.perspectiveTransform(points,homography).reshape(-1,2)
+        margin = self.pitch_margin
+        is_inside = (
+            (transformed[:,0] >= -margin) & (transformed[:,0] <= self.pitch_length + margin) &
+            (transformed[:,1] >= -margin) & (transformed[:,1] <= self.pitch_width + margin)
+        )
+        return transformed, is_inside
+        
     def transform_point(self,point):
         p = (int(point[0]), int(point[1]))
         is_inside = cv2.pointPolygonTest(self.pixel_vertices,p,False) >=0
@@ -37,12 +86,30 @@ class ViewTransformer():
         return transform_point.reshape(-1,2)
         
     def add_transformed_position_2_tracks(self,tracks):
+        if self.homographies is not None:
+            self._add_calibrated_position_2_tracks(tracks)
+            return
+        
         for object, object_tracks in tracks.items():
             for frame_num, track in enumerate(object_tracks):
                 for track_id, track_info in track.items():
-                    position = track_info['position_adjusted']
+                    # Sin estimación de cámara se usa la posición original
+                    position = track_info.get('position_adjusted', track_info['position'])
                     position = np.array(position)
                     position_transformed = self.transform_point(position)
                     if position_transformed is not None:
                         position_transformed = position_transformed.squeeze().tolist()
-                    tracks[object][frame_num][track_id]['position_transformed'] = position_transformed
\ No newline at end of file
+                    tracks[object][frame_num][track_id]['position_transformed'] = position_transformed
+    
+    def _add_calibrated_position_2_tracks(self,tracks):
+        # La homografía de cada frame ya incluye el movimiento de cámara,
+        # así que se transforma la posición original en píxeles
+        for object, object_tracks in tracks.items():
+            for frame_num, track in enumerate(object_tracks):
+                if not track:
+                    continue
+                track_ids = list(track.keys())
+                positions = [track[track_id]['position'] for track_id in track_ids]
+                transformed, is_inside = self.transform_points(positions,self.homographies[frame_num])
+                for track_id, point, inside in zip(track_ids, transformed.tolist(), is_inside.tolist()):
+                    tracks[object][frame_num][track_id]['position_transformed'] = point if inside else None
@@ -0,0 +1 @@
+from .analysis_service import AnalysisService
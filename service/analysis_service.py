@@ -0,0 +1,274 @@
+"""
+Servicio residente de análisis.
+
+Mantiene los modelos YOLO cargados entre análisis, ejecuta los trabajos en un
+pool de workers y guarda las salidas en una cache indexada por el contenido
+del trabajo (video, modelo y opciones), de modo que repetir un análisis ya
+hecho devuelve el resultado sin volver a procesar el video.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import build_parser, run_analysis, resolve_input_path, resolve_model_path, PIPELINE_STAGES
+
+# Estados de un trabajo
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Opciones que fija el servicio y no se aceptan en un trabajo (progress y status_file
+# escribirían en la terminal del servidor o en una ruta elegida por el cliente)
+RESERVED_OPTIONS = ("input", "model", "output_dir", "stub_dir", "verbose", "progress", "status_file")
+
+
+def load_yolo_model(model_path):
+    """
+    Carga un modelo YOLO (importa ultralytics/torch solo al llamarse).
+    """
+    from ultralytics import YOLO
+    return YOLO(model_path)
+
+
+def options_to_argv(options):
+    """
+    Convierte las opciones de un trabajo en argumentos de línea de comandos.
+
+    Args:
+        options (dict): Opciones con el nombre del argumento, p. ej. {'reid': True, 'tracker': 'iou'}
+
+    Returns:
+        list: Argumentos equivalentes, p. ej. ['--reid', '--tracker', 'iou']
+    """
+    argv = []
+    for name, value in sorted(options.items()):
+        if name in RESERVED_OPTIONS:
+            raise ValueError(f"La opción '{name}' la fija el servicio")
+        flag = "--" + name.replace("_", "-")
+        if value is True:
+            argv.append(flag)
+        elif value is not False and value is not None:
+            argv += [flag, str(value)]
+    return argv
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+class AnalysisJob:
+    """
+    Estado de un trabajo de análisis y su historial de eventos de progreso.
+    """
+
+    def __init__(self, key, input_path, model_path, argv):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.input_path = input_path
+        self.model_path = model_path
+        self.argv = argv
+        self.status = JOB_QUEUED
+        self.stage = None
+        self.progress = 0.0
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.events = []
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def publish(self, **changes):
+        """
+        Actualiza el estado del trabajo y despierta a quienes esperan eventos.
+        """
+        with self.condition:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.events.append(self.to_dict())
+            self.condition.notify_all()
+
+    def wait_events(self, since, timeout=None):
+        """
+        Espera a que haya eventos posteriores al índice since.
+
+        Returns:
+            list: Eventos nuevos (vacía si venció el timeout)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.events) > since or self.finished, timeout)
+            return self.events[since:]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "partial": dict(self.partial),
+            "result": self.result,
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+class AnalysisService:
+    """
+    Cola de trabajos con un pool de workers que reutilizan los modelos ya cargados.
+
+    Cada worker guarda sus propios modelos (la inferencia YOLO no se comparte
+    entre hilos) y cada trabajo usa directorios de stubs y de salida propios,
+    derivados de su clave, para que los análisis de videos distintos no
+    compartan cache.
+    """
+
+    def __init__(self, data_dir="service_data", num_workers=1, preload_models=(), model_loader=load_yolo_model):
+        """
+        Args:
+            data_dir (str): Directorio de salidas, stubs e índice de la cache
+            num_workers (int): Número de análisis simultáneos
+            preload_models (iterable): Modelos a cargar en cada worker al arrancar
+            model_loader (callable): Función que carga un modelo a partir de su ruta
+        """
+        self.data_dir = data_dir
+        self.num_workers = num_workers
+        self.preload_models = [resolve_model_path(m) for m in preload_models]
+        self.model_loader = model_loader
+        self.index_path = os.path.join(data_dir, "index.json")
+
+        self.jobs = {}
+        self.active = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.workers = []
+
+        os.makedirs(data_dir, exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def start(self):
+        for worker_num in range(self.num_workers):
+            worker = threading.Thread(target=self._worker, name=f"analysis-worker-{worker_num}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def submit(self, input_path, model="best.pt", options=None):
+        """
+        Encola un análisis, o devuelve uno ya hecho o en curso con la misma clave.
+
+        Args:
+            input_path (str): Video de entrada (nombre en videos/ o ruta)
+            model (str): Modelo YOLO (nombre en model/ o ruta)
+            options (dict): Opciones del análisis con los nombres de main.py
+
+        Returns:
+            AnalysisJob: Trabajo creado o reutilizado
+
+        Raises:
+            ValueError: Si las rutas no son texto o las opciones no son válidas
+            FileNotFoundError: Si no existe el video o el modelo
+        """
+        if not isinstance(input_path, str) or not isinstance(model, str):
+            raise ValueError("'input' y 'model' deben ser rutas (texto)")
+        if options is not None and not isinstance(options, dict):
+            raise ValueError("'options' debe ser un objeto {nombre: valor}")
+        argv = options_to_argv(options or {})
+        # argparse informa de los errores por stderr y sale: capturar el mensaje
+        errors = io.StringIO()
+        try:
+            with contextlib.redirect_stderr(errors):
+                build_parser().parse_args(["-i", input_path] + argv)
+        except SystemExit:
+            raise ValueError(errors.getvalue().strip().splitlines()[-1].split("error: ", 1)[-1])
+
+        input_path = resolve_input_path(input_path)
+        model_path = resolve_model_path(model)
+        for path in (input_path, model_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No existe el archivo '{path}'")
+
+        signature = [_file_signature(input_path), _file_signature(model_path), argv]
+        key = hashlib.sha256(json.dumps(signature).encode()).hexdigest()[:16]
+
+        with self.lock:
+            if key in self.active:
+                return self.active[key]
+
+            job = AnalysisJob(key, input_path, model_path, argv)
+            self.jobs[job.id] = job
+
+            cached = self.index.get(key)
+            if cached and os.path.exists(cached["output_path"]):
+                job.publish(status=JOB_DONE, progress=1.0, result=cached, cached=True)
+                return job
+
+            self.active[key] = job
+            job.publish()
+            self.queue.put(job)
+            return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        return [job.to_dict() for job in self.jobs.values()]
+
+    def _worker(self):
+        models = {path: self.model_loader(path) for path in self.preload_models}
+
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+
+            job.publish(status=JOB_RUNNING)
+            try:
+                if job.model_path not in models:
+                    models[job.model_path] = self.model_loader(job.model_path)
+                result = run_analysis(self._job_args(job), model=models[job.model_path],
+                                      progress=lambda stage, data: self._on_progress(job, stage, data))
+            except Exception as error:
+                job.publish(status=JOB_FAILED, error=f"{type(error).__name__}: {error}")
+            else:
+                with self.lock:
+                    self.index[job.key] = result
+                    with open(self.index_path, "w") as f:
+                        json.dump(self.index, f, indent=2)
+                job.publish(status=JOB_DONE, progress=1.0, result=result)
+            finally:
+                with self.lock:
+                    self.active.pop(job.key, None)
+
+    def _job_args(self, job):
+        job_dir = os.path.join(self.data_dir, "jobs", job.key)
+        return build_parser().parse_args([
+            "-i", job.input_path, "-m", job.model_path,
+            "-o", os.path.join(job_dir, "output"),
+            "--stub-dir", os.path.join(job_dir, "stubs"),
+        ] + job.argv)
+
+    def _on_progress(self, job, stage, data):
+        partial = dict(job.partial, **data)
+        job.publish(stage=stage, progress=PIPELINE_STAGES.index(stage) / len(PIPELINE_STAGES), partial=partial)
@@ -0,0 +1,163 @@
+"""
+API HTTP local del servicio de análisis.
+
+Rutas:
+    GET  /health              Estado del servicio
+    POST /jobs                Encola un análisis: {"input": ..., "model": ..., "options": {...}}
+    GET  /jobs                Lista de trabajos
+    GET  /jobs/<id>           Estado, progreso y resultados parciales de un trabajo
+    GET  /jobs/<id>/events    Progreso en streaming (una línea JSON por evento) hasta que termina
+    GET  /jobs/<id>/output    Video generado
+
+Uso:
+    python -m service.http_server --port 8000 --workers 2 --preload best.pt
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import shutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .analysis_service import AnalysisService
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """
+    Traduce las peticiones HTTP en llamadas a AnalysisService (self.server.service).
+    """
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_job(self, job_id):
+        job = self.server.service.get(job_id)
+        if job is None:
+            self._send_json(404, {"error": f"Trabajo '{job_id}' no encontrado"})
+        return job
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        service = self.server.service
+
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok", "workers": len(service.workers), "queued": service.queue.qsize()})
+        elif parts == ["jobs"]:
+            self._send_json(200, service.list_jobs())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._get_job(parts[1])
+            if job is not None:
+                self._send_json(200, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self._get_job(parts[1])
+            if job is not None:
+                self._stream_events(job)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "output":
+            job = self._get_job(parts[1])
+            if job is not None:
+                self._send_output(job)
+        else:
+            self._send_json(404, {"error": f"Ruta no encontrada: {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": f"Ruta no encontrada: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+            job = self.server.service.submit(
+                request["input"], request.get("model", "best.pt"), request.get("options")
+            )
+        except (KeyError, ValueError) as error:
+            self._send_json(400, {"error": str(error)})
+        except FileNotFoundError as error:
+            self._send_json(404, {"error": str(error)})
+        else:
+            self._send_json(202, job.to_dict())
+
+    def _stream_events(self, job):
+        """
+        Envía cada evento como una línea JSON; la conexión se cierra al terminar el trabajo.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        sent = 0
+        while True:
+            events = job.wait_events(sent, timeout=30)
+            for event in events:
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+            self.wfile.flush()
+            sent += len(events)
+            if job.finished and sent == len(job.events):
+                break
+
+    def _send_output(self, job):
+        output_path = job.result["output_path"] if job.result else None
+        if output_path is None or not os.path.exists(output_path):
+            self._send_json(409, {"error": "El trabajo no tiene salida disponible", "status": job.status})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(output_path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(output_path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(output_path)}"')
+        self.end_headers()
+        with open(output_path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+def create_server(service, host="127.0.0.1", port=8000, verbose=False):
+    """
+    Crea el servidor HTTP (sin arrancarlo) para un servicio ya iniciado.
+
+    Returns:
+        ThreadingHTTPServer: Servidor; usar serve_forever() y shutdown()
+    """
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de análisis de partidos")
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Puerto (default: 8000)")
+    parser.add_argument("--workers", type=int, default=1, help="Análisis simultáneos (default: 1)")
+    parser.add_argument("--data-dir", default="service_data", help="Directorio de salidas y cache (default: service_data)")
+    parser.add_argument("--preload", nargs="*", default=[], help="Modelos a cargar al arrancar")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Registrar cada petición")
+    args = parser.parse_args()
+
+    service = AnalysisService(args.data_dir, args.workers, args.preload)
+    service.start()
+    server = create_server(service, args.host, args.port, args.verbose)
+    print(f"Servicio de análisis escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .shot_detector import ShotBoundaryDetector
\ No newline at end of file
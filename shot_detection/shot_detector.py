@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+import os
+
+from utils import background_io
+from utils.checkpoint import atomic_pickle_dump, load_stub
+
+# Tipos de segmento
+SEGMENT_PLAY = 'play'         # Plano general del campo
+SEGMENT_CLOSEUP = 'closeup'   # Primer plano / público / gráficos
+SEGMENT_REPLAY = 'replay'     # Repetición en cámara lenta
+
+
+class ShotBoundaryDetector():
+    """
+    Detecta cortes de cámara comparando histogramas de color de frames reducidos
+    y clasifica cada segmento resultante (juego, primer plano o repetición).
+    """
+
+    def __init__(self, threshold=0.35, min_segment_length=12, min_grass_ratio=0.4, duplicate_ratio=0.3):
+        """
+        Args:
+            threshold (float): Distancia de Bhattacharyya entre histogramas a partir de la cual hay corte
+            min_segment_length (int): Frames mínimos entre dos cortes
+            min_grass_ratio (float): Proporción mínima de césped para considerar el segmento como juego
+            duplicate_ratio (float): Proporción de frames casi repetidos a partir de la cual el
+                                     segmento se considera repetición en cámara lenta
+        """
+        self.threshold = threshold
+        self.min_segment_length = min_segment_length
+        self.min_grass_ratio = min_grass_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.small_size = (64, 36)
+        self.duplicate_diff = 0.3
+
+    def _frame_features(self, frame):
+        """
+        Histograma H-S normalizado, proporción de césped e imagen gris reducida de un frame.
+        """
+        small = cv2.resize(frame, self.small_size, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+        cv2.normalize(hist, hist)
+
+        grass = cv2.inRange(hsv, (35, 40, 40), (85, 255, 255))
+        grass_ratio = np.count_nonzero(grass) / grass.size
+
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        return hist, grass_ratio, gray
+
+    def detect_boundaries(self, frames):
+        """
+        Calcula las señales por frame y los frames donde empieza un nuevo plano.
+
+        Returns:
+            tuple: (lista de frames de corte, proporción de césped (N,), frames casi repetidos (N,))
+        """
+        num_frames = len(frames)
+        grass_ratios = np.zeros(num_frames)
+        duplicates = np.zeros(num_frames, dtype=bool)
+        boundaries = []
+
+        previous_hist, previous_gray = None, None
+        last_boundary = 0
+        for frame_num, frame in enumerate(frames):
+            hist, grass_ratios[frame_num], gray = self._frame_features(frame)
+
+            if previous_hist is not None:
+                distance = cv2.compareHist(previous_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+                if distance > self.threshold and frame_num - last_boundary >= self.min_segment_length:
+                    boundaries.append(frame_num)
+                    last_boundary = frame_num
+                duplicates[frame_num] = np.mean(np.abs(gray - previous_gray)) < self.duplicate_diff
+
+            previous_hist, previous_gray = hist, gray
+
+        return boundaries, grass_ratios, duplicates
+
+    def get_segments(self, frames, read_from_stub=False, stub_path=None):
+        """
+        Divide el video en segmentos sin cortes de cámara y los clasifica.
+
+        Args:
+            frames (list): Frames del video
+            read_from_stub (bool): Si cargar los segmentos desde cache
+            stub_path (str): Ruta del archivo cache
+
+        Returns:
+            list: [{'start', 'end', 'type'}, ...] con end exclusivo
+        """
+        if read_from_stub and stub_path is not None and os.path.exists(stub_path):
+            return load_stub(stub_path)
+
+        boundaries, grass_ratios, duplicates = self.detect_boundaries(frames)
+        starts = [0] + boundaries
+        ends = boundaries + [len(frames)]
+
+        segments = []
+        for start, end in zip(starts, ends):
+            if end <= start:
+                continue
+            # El primer frame de cada segmento se compara con el plano anterior
+            duplicated = duplicates[start + 1:end].mean() if end - start > 1 else 0.0
+            if grass_ratios[start:end].mean() < self.min_grass_ratio:
+                segment_type = SEGMENT_CLOSEUP
+            elif duplicated > self.duplicate_ratio:
+                segment_type = SEGMENT_REPLAY
+            else:
+                segment_type = SEGMENT_PLAY
+            segments.append({'start': start, 'end': end, 'type': segment_type})
+
+        if stub_path is not None:
+            background_io.submit("stub:shots", atomic_pickle_dump, [dict(segment) for segment in segments], stub_path)
+
+        return segments
+
+    @staticmethod
+    def active_frames(segments, skip_types=(SEGMENT_CLOSEUP, SEGMENT_REPLAY)):
+        """
+        Máscara de los frames que pertenecen a segmentos que no se omiten.
+        """
+        num_frames = segments[-1]['end'] if segments else 0
+        mask = np.zeros(num_frames, dtype=bool)
+        for segment in segments:
+            if segment['type'] not in skip_types:
+                mask[segment['start']:segment['end']] = True
+        return mask
@@ -0,0 +1,2 @@
+from .possession_and_passes import PossessionAndPassesAnalyzer
+from .spatial_analysis import SpatialAnalyzer
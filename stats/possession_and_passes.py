@@ -3,32 +3,174 @@ Módulo para calcular estadísticas de posesión y pases en partidos de fútbol.
 """
 
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+
+def run_length_encode(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Codifica un array 1D en tramos de valores consecutivos iguales.
+
+    Args:
+        values: Array 1D
+
+    Returns:
+        tuple: (inicio de cada tramo, longitud de cada tramo, valor de cada tramo)
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, values[:0]
+
+    change = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [values.size])))
+    return starts, lengths, values[starts]
+
 
 class PossessionAndPassesAnalyzer:
     """
     Analiza la posesión del balón y detecta pases entre jugadores y equipos.
     """
-    def __init__(self, tracks: Dict[str, Any], team_ball_control: np.ndarray):
+    def __init__(self, tracks: Dict[str, Any], team_ball_control: np.ndarray,
+                 min_possession_frames: int = 3, min_pass_distance: float = 40.0,
+                 max_pass_frames: int = 72):
         """
         tracks: dict con información de tracking de jugadores y balón
         team_ball_control: array con el equipo en posesión del balón por frame
+        min_possession_frames: frames mínimos de control para considerar una posesión
+        min_pass_distance: distancia mínima (píxeles) que debe recorrer el balón en un pase
+        max_pass_frames: duración máxima (frames) del balón sin dueño durante un pase
         """
         self.tracks = tracks
-        self.team_ball_control = team_ball_control
+        self.team_ball_control = np.asarray(team_ball_control)
+        self.min_possession_frames = min_possession_frames
+        self.min_pass_distance = min_pass_distance
+        self.max_pass_frames = max_pass_frames
+
+        self._owner = None
+        self._owner_team = None
+        self._ball_centers = None
+
+    def _build_frame_arrays(self):
+        """
+        Extrae en una sola pasada los arrays por frame: jugador con el balón (-1 si nadie),
+        su equipo (0 si nadie) y el centro del balón (NaN si no hay balón).
+        """
+        if self._owner is not None:
+            return
+
+        players = self.tracks.get('players', [])
+        balls = self.tracks.get('ball', [])
+        num_frames = len(players)
+
+        owner = np.full(num_frames, -1, dtype=np.int64)
+        owner_team = np.zeros(num_frames, dtype=np.int64)
+        ball_centers = np.full((num_frames, 2), np.nan)
+
+        for frame_num, player_track in enumerate(players):
+            for player_id, track in player_track.items():
+                if track.get('has_ball', False):
+                    owner[frame_num] = player_id
+                    owner_team[frame_num] = track.get('team', 0)
+                    break
+
+            if frame_num < len(balls):
+                bbox = balls[frame_num].get(1, {}).get('bbox')
+                if bbox is not None:
+                    ball_centers[frame_num] = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+
+        self._owner = owner
+        self._owner_team = owner_team
+        self._ball_centers = ball_centers
+
+    def get_possession_spells(self) -> List[Dict[str, int]]:
+        """
+        Devuelve los tramos continuos de posesión por equipo.
+        Returns: lista de dicts {team, frame_start, frame_end} (frame_end exclusivo)
+        """
+        starts, lengths, teams = run_length_encode(self.team_ball_control)
+        keep = teams != 0
+        return [
+            {'team': int(team), 'frame_start': int(start), 'frame_end': int(start + length)}
+            for team, start, length in zip(teams[keep], starts[keep], lengths[keep])
+        ]
 
     def calculate_possession(self) -> Dict[int, float]:
         """
         Calcula el porcentaje de posesión por equipo.
         Returns: dict {team_id: porcentaje}
         """
-        # Implementación pendiente
-        pass
+        _, lengths, teams = run_length_encode(self.team_ball_control)
+        keep = teams != 0
+        teams, lengths = teams[keep].astype(np.int64), lengths[keep]
+
+        possession = {1: 0.0, 2: 0.0}
+        total = lengths.sum()
+        if total == 0:
+            return possession
+
+        frames_per_team = np.bincount(teams, weights=lengths)
+        for team_id in np.flatnonzero(frames_per_team):
+            possession[int(team_id)] = float(frames_per_team[team_id] / total * 100)
+        return possession
 
     def detect_passes(self) -> List[Dict[str, Any]]:
         """
         Detecta pases entre jugadores usando la secuencia de posesión.
         Returns: lista de dicts con información de cada pase
         """
-        # Implementación pendiente
-        pass 
\ No newline at end of file
+        self._build_frame_arrays()
+
+        starts, lengths, owners = run_length_encode(self._owner)
+        keep = (owners != -1) & (lengths >= self.min_possession_frames)
+        starts, lengths, owners = starts[keep], lengths[keep], owners[keep]
+        if owners.size < 2:
+            return []
+
+        ends = starts + lengths
+        teams = self._owner_team[starts]
+
+        # Cambios de dueño entre posesiones consecutivas del mismo equipo
+        from_idx = np.arange(owners.size - 1)
+        to_idx = from_idx + 1
+        release = ends[from_idx] - 1
+        reception = starts[to_idx]
+
+        travel = np.linalg.norm(self._ball_centers[reception] - self._ball_centers[release], axis=1)
+        duration = reception - release
+
+        is_pass = (
+            (owners[from_idx] != owners[to_idx])
+            & (teams[from_idx] == teams[to_idx])
+            & (duration <= self.max_pass_frames)
+            # Si no hay balón en alguno de los extremos no se descarta por distancia
+            & ~(travel < self.min_pass_distance)
+        )
+
+        return [
+            {
+                'frame_start': int(release[i]),
+                'frame_end': int(reception[i]),
+                'from_player': int(owners[i]),
+                'to_player': int(owners[i + 1]),
+                'team': int(teams[i]),
+                'distance': float(travel[i]) if np.isfinite(travel[i]) else None,
+            }
+            for i in np.flatnonzero(is_pass)
+        ]
+
+    def get_pass_network(self) -> Dict[int, Dict[Tuple[int, int], int]]:
+        """
+        Construye la red de pases por equipo.
+        Returns: dict {team_id: {(from_player, to_player): número de pases}}
+        """
+        passes = self.detect_passes()
+        network: Dict[int, Dict[Tuple[int, int], int]] = {}
+        if not passes:
+            return network
+
+        pairs = np.array([(p['team'], p['from_player'], p['to_player']) for p in passes])
+        unique_pairs, counts = np.unique(pairs, axis=0, return_counts=True)
+        for (team, from_player, to_player), count in zip(unique_pairs.tolist(), counts.tolist()):
+            network.setdefault(team, {})[(from_player, to_player)] = count
+        return network
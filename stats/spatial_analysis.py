@@ -0,0 +1,352 @@
+"""
+Métricas tácticas sobre las posiciones en el campo ('position_transformed', en metros).
+
+Los tracks se vuelcan una vez a arrays densos (frame, jugador del frame) y todas
+las métricas se calculan por bloques de frames con matrices de distancias
+vectorizadas: distancia al rival más cercano de cada jugador, presión sobre el
+jugador con el balón, compactación de cada equipo y líneas de la formación.
+Los jugadores sin posición transformada o sin equipo no intervienen (NaN).
+"""
+
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+
+def build_position_arrays(tracks: Dict[str, Any], object_name: str = 'players') -> Dict[str, np.ndarray]:
+    """
+    Convierte los tracks de un objeto en arrays (num_frames, max_jugadores_por_frame).
+
+    Args:
+        tracks: Tracks con 'position_transformed', 'team' y 'has_ball'
+        object_name: Objeto a convertir
+
+    Returns:
+        dict: 'positions' (F, K, 2) con NaN si no hay posición, 'ids' (F, K) con -1
+              en los huecos, 'teams' (F, K) con 0 si no hay equipo y 'has_ball' (F, K)
+    """
+    frames = tracks.get(object_name, [])
+    num_frames = len(frames)
+    # Al menos un hueco para que las reducciones por frame estén definidas
+    width = max(max((len(frame) for frame in frames), default=0), 1)
+
+    positions = np.full((num_frames, width, 2), np.nan)
+    ids = np.full((num_frames, width), -1, dtype=np.int64)
+    teams = np.zeros((num_frames, width), dtype=np.int64)
+    has_ball = np.zeros((num_frames, width), dtype=bool)
+
+    for frame_num, frame in enumerate(frames):
+        for slot, (track_id, info) in enumerate(frame.items()):
+            ids[frame_num, slot] = track_id
+            teams[frame_num, slot] = info.get('team') or 0
+            has_ball[frame_num, slot] = info.get('has_ball', False)
+            position = info.get('position_transformed')
+            if position is not None:
+                positions[frame_num, slot] = position
+
+    return {'positions': positions, 'ids': ids, 'teams': teams, 'has_ball': has_ball}
+
+
+def pairwise_distances(positions: np.ndarray) -> np.ndarray:
+    """
+    Distancias entre todos los jugadores de cada frame.
+
+    Args:
+        positions: Array (F, K, 2)
+
+    Returns:
+        np.ndarray: Array (F, K, K); NaN si falta alguna de las dos posiciones
+    """
+    diff = positions[:, :, None, :] - positions[:, None, :, :]
+    return np.sqrt(np.einsum('fijc,fijc->fij', diff, diff))
+
+
+class SpatialAnalyzer:
+    """
+    Calcula las métricas tácticas de todo el partido en una sola llamada.
+
+    Uso:
+        analyzer = SpatialAnalyzer(tracks)
+        metrics = analyzer.analyze()
+        analyzer.add_spatial_metrics_2_tracks()
+    """
+    def __init__(self, tracks: Dict[str, Any], pressure_radius: float = 5.0,
+                 pitch_length: float = 105.0, goalkeeper_zone: float = 16.5,
+                 num_lines: int = 3, chunk_size: int = 1000,
+                 pitch_extent: Optional[Tuple[float, float]] = None):
+        """
+        tracks: dict con información de tracking (posiciones transformadas y equipos)
+        pressure_radius: distancia (metros) a la que un rival presiona al jugador con el balón
+        pitch_length: largo del campo en metros (eje x de 'position_transformed')
+        goalkeeper_zone: distancia máxima a la línea de fondo del jugador más retrasado
+                         para considerarlo portero y excluirlo de las líneas
+        num_lines: número de líneas de la formación
+        chunk_size: frames por bloque de cálculo (limita la memoria de las matrices de distancias)
+        pitch_extent: tramo del eje x que cubren las posiciones (por defecto el campo
+                      completo, (0, pitch_length)); ver ViewTransformer.pitch_extent
+        """
+        self.tracks = tracks
+        self.pressure_radius = pressure_radius
+        self.pitch_length = pitch_length
+        self.goalkeeper_zone = goalkeeper_zone
+        self.num_lines = num_lines
+        self.chunk_size = chunk_size
+        self.pitch_extent = pitch_extent if pitch_extent is not None else (0.0, pitch_length)
+
+        self.arrays = build_position_arrays(tracks)
+        self.team_ids = sorted(int(team) for team in np.unique(self.arrays['teams']) if team != 0)
+        self._metrics = None
+
+    @property
+    def num_frames(self) -> int:
+        return self.arrays['ids'].shape[0]
+
+    def _chunks(self):
+        for start in range(0, self.num_frames, self.chunk_size):
+            yield slice(start, min(start + self.chunk_size, self.num_frames))
+
+    def nearest_opponents(self, positions: np.ndarray, teams: np.ndarray,
+                          distances: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Rival más cercano de cada jugador.
+
+        Args:
+            positions: Array (F, K, 2)
+            teams: Array (F, K)
+            distances: Matriz de distancias ya calculada (opcional)
+
+        Returns:
+            dict: 'slot' (F, K) posición del rival en el frame (-1 si no hay)
+                  y 'distance' (F, K) en metros (NaN si no hay)
+        """
+        if distances is None:
+            distances = pairwise_distances(positions)
+        is_opponent = (teams[:, :, None] != teams[:, None, :]) & (teams[:, :, None] != 0) & (teams[:, None, :] != 0)
+        candidates = np.where(is_opponent & ~np.isnan(distances), distances, np.inf)
+
+        slot = candidates.argmin(axis=2)
+        distance = np.take_along_axis(candidates, slot[:, :, None], axis=2)[:, :, 0]
+        found = np.isfinite(distance)
+        return {'slot': np.where(found, slot, -1), 'distance': np.where(found, distance, np.nan)}
+
+    def ball_carrier_pressure(self, teams: np.ndarray, has_ball: np.ndarray,
+                              distances: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Presión de los rivales sobre el jugador con el balón en cada frame.
+
+        La intensidad suma, por cada rival dentro de pressure_radius, 1 - d / radio
+        (1 si está encima, 0 en el borde).
+
+        Returns:
+            dict: 'carrier_slot' (F,) (-1 si nadie tiene el balón), 'carrier_team' (F,),
+                  'opponents' (F,) rivales dentro del radio, 'nearest' (F,) distancia al
+                  rival más cercano e 'intensity' (F,)
+        """
+        frames = np.arange(teams.shape[0])
+        has_carrier = has_ball.any(axis=1)
+        carrier = np.where(has_carrier, has_ball.argmax(axis=1), -1)
+
+        row = distances[frames, carrier.clip(min=0)]
+        carrier_team = teams[frames, carrier.clip(min=0)]
+        is_opponent = (teams != carrier_team[:, None]) & (teams != 0) & (carrier_team[:, None] != 0) & has_carrier[:, None]
+        row = np.where(is_opponent & ~np.isnan(row), row, np.inf)
+
+        closeness = np.clip(1 - row / self.pressure_radius, 0, None)
+        nearest = row.min(axis=1)
+        return {
+            'carrier_slot': carrier,
+            'carrier_team': np.where(has_carrier, carrier_team, 0),
+            'opponents': (row <= self.pressure_radius).sum(axis=1),
+            'nearest': np.where(np.isfinite(nearest), nearest, np.nan),
+            'intensity': closeness.sum(axis=1),
+        }
+
+    def team_shape(self, positions: np.ndarray, teams: np.ndarray, team_id: int) -> Dict[str, np.ndarray]:
+        """
+        Compactación de un equipo en cada frame.
+
+        Returns:
+            dict: 'players' (F,) jugadores con posición, 'centroid' (F, 2), 'spread' (F,)
+                  distancia media al centroide, 'length' (F,) y 'width' (F,) extensión
+                  en x e y. NaN en los frames con menos de dos jugadores.
+        """
+        mask = (teams == team_id) & ~np.isnan(positions[:, :, 0])
+        count = mask.sum(axis=1)
+        valid = count >= 2
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centroid = np.where(mask[:, :, None], positions, 0).sum(axis=1) / count[:, None]
+        offsets = np.where(mask[:, :, None], positions - centroid[:, None, :], 0)
+        spread = np.where(valid, np.sqrt((offsets ** 2).sum(axis=2)).sum(axis=1) / count.clip(min=1), np.nan)
+
+        upper = np.where(mask[:, :, None], positions, -np.inf).max(axis=1, initial=-np.inf)
+        lower = np.where(mask[:, :, None], positions, np.inf).min(axis=1, initial=np.inf)
+        extent = np.where(valid[:, None], upper - lower, np.nan)
+
+        return {
+            'players': count,
+            'centroid': np.where(valid[:, None], centroid, np.nan),
+            'spread': spread,
+            'length': extent[:, 0],
+            'width': extent[:, 1],
+        }
+
+    def formation_lines(self, positions: np.ndarray, teams: np.ndarray, team_id: int) -> np.ndarray:
+        """
+        Posición de las líneas de un equipo a lo largo del campo en cada frame.
+
+        Se excluye al portero (el jugador más retrasado, si está a menos de
+        goalkeeper_zone de su línea de fondo) y el resto se separa en num_lines
+        líneas por los mayores huecos entre jugadores consecutivos en x. Solo se
+        busca portero junto a las líneas de fondo que quedan dentro de pitch_extent:
+        sin calibración las posiciones cubren un tramo del campo y el jugador más
+        retrasado del tramo no es el portero.
+
+        Returns:
+            np.ndarray: Array (F, num_lines) con la x media de cada línea, de menor a
+                        mayor x; NaN si el equipo tiene menos jugadores que líneas
+        """
+        x = np.where(teams == team_id, positions[:, :, 0], np.nan)
+        x.sort(axis=1)
+        count = (~np.isnan(x)).sum(axis=1)
+        frames = np.arange(x.shape[0])
+
+        first = x[:, 0]
+        last = x[frames, (count - 1).clip(min=0)]
+        near_start = first <= self.pitch_length - last
+        has_start_line = self.pitch_extent[0] <= 0
+        has_end_line = self.pitch_extent[1] >= self.pitch_length
+        drop_first = near_start & (first <= self.goalkeeper_zone) & has_start_line
+        drop_last = ~near_start & (self.pitch_length - last <= self.goalkeeper_zone) & has_end_line
+        x[frames[drop_first], 0] = np.nan
+        x[frames[drop_last], (count - 1)[drop_last]] = np.nan
+        x.sort(axis=1)
+        count = (~np.isnan(x)).sum(axis=1)
+
+        lines = np.full((x.shape[0], self.num_lines), np.nan)
+        if x.shape[1] < self.num_lines:
+            return lines
+
+        # Los num_lines - 1 mayores huecos marcan el corte entre líneas
+        gaps = np.diff(x, axis=1)
+        gaps = np.where(np.isnan(gaps), -np.inf, gaps)
+        cuts = np.sort(np.argsort(-gaps, axis=1, kind='stable')[:, :self.num_lines - 1], axis=1)
+        slots = np.arange(x.shape[1])
+        line_of_slot = (cuts[:, None, :] < slots[None, :, None]).sum(axis=2)
+
+        member = (line_of_slot[:, :, None] == np.arange(self.num_lines)) & ~np.isnan(x)[:, :, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(member, x[:, :, None], 0).sum(axis=1) / member.sum(axis=1)
+        return np.where((count >= self.num_lines)[:, None], means, np.nan)
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        Calcula todas las métricas del partido (se reutilizan en llamadas posteriores).
+
+        Returns:
+            dict: 'ids' (F, K) ids de jugador por hueco,
+                  'nearest_opponent' {'id', 'distance'} (F, K),
+                  'pressure' {'carrier_id', 'carrier_team', 'opponents', 'nearest', 'intensity'} (F,),
+                  'teams' {team_id: {'players', 'centroid', 'spread', 'length', 'width', 'lines'}}
+        """
+        if self._metrics is not None:
+            return self._metrics
+
+        ids = self.arrays['ids']
+        nearest_parts, pressure_parts = [], []
+        shape_parts = {team_id: [] for team_id in self.team_ids}
+        line_parts = {team_id: [] for team_id in self.team_ids}
+
+        for chunk in self._chunks():
+            positions = self.arrays['positions'][chunk]
+            teams = self.arrays['teams'][chunk]
+            distances = pairwise_distances(positions)
+
+            nearest_parts.append(self.nearest_opponents(positions, teams, distances))
+            pressure_parts.append(self.ball_carrier_pressure(teams, self.arrays['has_ball'][chunk], distances))
+            for team_id in self.team_ids:
+                shape_parts[team_id].append(self.team_shape(positions, teams, team_id))
+                line_parts[team_id].append(self.formation_lines(positions, teams, team_id))
+
+        def concat(parts, key):
+            return np.concatenate([part[key] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+
+        nearest_slot = concat(nearest_parts, 'slot').reshape(ids.shape)
+        carrier_slot = concat(pressure_parts, 'carrier_slot').astype(np.int64)
+        frames = np.arange(self.num_frames)
+
+        self._metrics = {
+            'ids': ids,
+            'nearest_opponent': {
+                'id': np.where(nearest_slot >= 0, np.take_along_axis(ids, nearest_slot.clip(min=0), axis=1), -1),
+                'distance': concat(nearest_parts, 'distance').reshape(ids.shape),
+            },
+            'pressure': {
+                'carrier_id': np.where(carrier_slot >= 0, ids[frames, carrier_slot.clip(min=0)], -1),
+                'carrier_team': concat(pressure_parts, 'carrier_team'),
+                'opponents': concat(pressure_parts, 'opponents'),
+                'nearest': concat(pressure_parts, 'nearest'),
+                'intensity': concat(pressure_parts, 'intensity'),
+            },
+            'teams': {
+                team_id: {
+                    **{key: concat(shape_parts[team_id], key)
+                       for key in ('players', 'centroid', 'spread', 'length', 'width')},
+                    'lines': (np.concatenate(line_parts[team_id]) if line_parts[team_id]
+                              else np.zeros((0, self.num_lines))),
+                }
+                for team_id in self.team_ids
+            },
+        }
+        return self._metrics
+
+    def add_spatial_metrics_2_tracks(self):
+        """
+        Añade a cada jugador 'nearest_opponent' y 'nearest_opponent_distance' y, al
+        jugador con el balón, 'pressure' (rivales dentro del radio) y 'pressure_intensity'.
+        """
+        metrics = self.analyze()
+        opponent_ids = metrics['nearest_opponent']['id'].tolist()
+        opponent_distances = metrics['nearest_opponent']['distance'].tolist()
+        pressure = metrics['pressure']
+
+        for frame_num, frame in enumerate(self.tracks.get('players', [])):
+            for slot, player in enumerate(frame.values()):
+                distance = opponent_distances[frame_num][slot]
+                found = opponent_ids[frame_num][slot] != -1
+                player['nearest_opponent'] = opponent_ids[frame_num][slot] if found else None
+                player['nearest_opponent_distance'] = distance if found else None
+
+            carrier_id = int(pressure['carrier_id'][frame_num])
+            if carrier_id != -1:
+                frame[carrier_id]['pressure'] = int(pressure['opponents'][frame_num])
+                frame[carrier_id]['pressure_intensity'] = float(pressure['intensity'][frame_num])
+
+    def team_summary(self) -> Dict[int, Dict[str, Optional[float]]]:
+        """
+        Medias de todo el partido por equipo.
+
+        Returns:
+            dict: {team_id: {'spread_m', 'length_m', 'width_m', 'nearest_opponent_m',
+                   'pressure_received'}} (None si no hay datos); pressure_received es
+                   la intensidad media sobre sus jugadores con el balón
+        """
+        metrics = self.analyze()
+        teams = self.arrays['teams']
+        pressure = metrics['pressure']
+
+        def mean(values):
+            values = np.asarray(values, dtype=np.float64)
+            values = values[~np.isnan(values)]
+            return round(float(values.mean()), 2) if values.size else None
+
+        summary = {}
+        for team_id in self.team_ids:
+            shape = metrics['teams'][team_id]
+            summary[team_id] = {
+                'spread_m': mean(shape['spread']),
+                'length_m': mean(shape['length']),
+                'width_m': mean(shape['width']),
+                'nearest_opponent_m': mean(metrics['nearest_opponent']['distance'][teams == team_id]),
+                'pressure_received': mean(pressure['intensity'][pressure['carrier_team'] == team_id]),
+            }
+        return summary
@@ -1 +1 @@
-from .auto_summary import AutoSummaryGenerator
\ No newline at end of file
+from .auto_summary import AutoSummaryGenerator, cut_match_highlights
\ No newline at end of file
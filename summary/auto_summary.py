@@ -1,27 +1,232 @@
 """
 Módulo para generar resúmenes automáticos de partidos de fútbol.
+
+A partir de los eventos detectados (EventDetector) y de las estadísticas de
+posesión (PossessionAndPassesAnalyzer) genera un informe de texto y una lista
+de ventanas destacadas. Los clips se cortan del video original buscando
+directamente cada ventana (ffmpeg con copia de stream, o seek de OpenCV si
+ffmpeg no está disponible), sin decodificar el partido completo.
 """
 
-from typing import List, Dict, Any
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Dict, Any, Optional, Tuple
+
+# Prioridad y margen (segundos antes, segundos después) de cada tipo de evento
+EVENT_PRIORITY = {'goal': 0, 'shot': 1, 'throw_in': 2}
+EVENT_PADDING = {'goal': (8.0, 6.0), 'shot': (5.0, 3.0), 'throw_in': (2.0, 3.0)}
+EVENT_NAMES = {'goal': 'Gol', 'shot': 'Tiro a puerta', 'throw_in': 'Saque de banda'}
+
 
 class AutoSummaryGenerator:
     """
     Genera un resumen textual o de eventos destacados del partido.
     """
-    def __init__(self, tracks: Dict[str, Any], events: List[Dict[str, Any]]):
+    def __init__(self, tracks: Dict[str, Any], events: List[Dict[str, Any]],
+                 possession: Optional[Dict[int, float]] = None,
+                 passes: Optional[List[Dict[str, Any]]] = None, frame_rate: int = 24):
+        """
+        tracks: dict con información de tracking
+        events: lista de eventos con 'type', 'frame_start' y 'frame_end'
+        possession: dict {team_id: porcentaje} (opcional)
+        passes: lista de pases detectados (opcional)
+        frame_rate: frames por segundo del video
+        """
         self.tracks = tracks
-        self.events = events
+        self.events = sorted(events, key=lambda event: event['frame_start'])
+        self.possession = possession or {}
+        self.passes = passes or []
+        self.frame_rate = frame_rate
+
+    def _format_time(self, frame_num: int) -> str:
+        seconds = int(frame_num / self.frame_rate)
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
 
     def generate_text_summary(self) -> str:
         """
         Genera un resumen textual del partido.
         """
-        # Implementación pendiente
-        pass
+        num_frames = len(self.tracks.get('players', []))
+        lines = [f"Resumen del partido ({self._format_time(num_frames)} analizados)"]
+
+        if self.possession:
+            lines.append("")
+            lines.append("Posesión:")
+            for team_id, percentage in sorted(self.possession.items()):
+                lines.append(f"  Equipo {team_id}: {percentage:.1f}%")
+
+        if self.passes:
+            lines.append("")
+            lines.append("Pases completados:")
+            for team_id in sorted({p['team'] for p in self.passes}):
+                count = sum(1 for p in self.passes if p['team'] == team_id)
+                lines.append(f"  Equipo {team_id}: {count}")
+
+        lines.append("")
+        if not self.events:
+            lines.append("No se detectaron eventos destacados.")
+            return "\n".join(lines)
+
+        lines.append("Eventos:")
+        for event in self.events:
+            name = EVENT_NAMES.get(event['type'], event['type'])
+            detail = ""
+            if event.get('team') is not None:
+                detail = f" (equipo {event['team']}"
+                if event.get('player_id') is not None:
+                    detail += f", jugador {event['player_id']}"
+                detail += ")"
+            lines.append(f"  {self._format_time(event['frame_start'])} {name}{detail}")
+
+        return "\n".join(lines)
 
     def get_highlight_minutes(self) -> List[int]:
         """
         Devuelve los minutos destacados del partido según los eventos detectados.
         """
-        # Implementación pendiente
-        pass 
\ No newline at end of file
+        minutes = {int(event['frame_start'] / self.frame_rate) // 60 for event in self.events}
+        return sorted(minutes)
+
+    def get_highlight_windows(self, max_duration: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        Calcula las ventanas (inicio, fin) en segundos de los clips destacados.
+
+        Cada evento se amplía con su margen y las ventanas que se solapan se fusionan.
+        Si se indica max_duration, se eligen las ventanas fusionadas por prioridad
+        (las que contienen un gol primero) hasta completar esa duración.
+
+        Args:
+            max_duration: Duración máxima del resumen en segundos (opcional)
+
+        Returns:
+            list: Ventanas ordenadas por tiempo
+        """
+        num_frames = len(self.tracks.get('players', []))
+        video_end = num_frames / self.frame_rate if num_frames else float('inf')
+
+        candidates = []
+        for event in self.events:
+            before, after = EVENT_PADDING.get(event['type'], (3.0, 3.0))
+            start = max(0.0, event['frame_start'] / self.frame_rate - before)
+            end = min(video_end, event.get('frame_end', event['frame_start']) / self.frame_rate + after)
+            candidates.append((start, end, EVENT_PRIORITY.get(event['type'], len(EVENT_PRIORITY))))
+
+        # Fusionar antes de aplicar el presupuesto para no contar dos veces los solapes;
+        # cada ventana fusionada toma la prioridad de su mejor evento
+        merged: List[List[float]] = []
+        for start, end, priority in sorted(candidates):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+                merged[-1][2] = min(merged[-1][2], priority)
+            else:
+                merged.append([start, end, priority])
+
+        selected = []
+        total = 0.0
+        for start, end, _ in sorted(merged, key=lambda window: (window[2], window[0])):
+            if max_duration is not None and total + (end - start) > max_duration:
+                continue
+            selected.append((start, end))
+            total += end - start
+        return sorted(selected)
+
+    def cut_highlights(self, video_path: str, output_path: str,
+                       max_duration: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        Construye el video de resumen con las ventanas destacadas.
+
+        Usa ffmpeg con copia de stream (sin recodificar; los cortes se ajustan al
+        keyframe anterior) si está instalado; si no, OpenCV buscando el frame inicial
+        de cada ventana y leyendo solo esos frames. Las ventanas se pasan a frames con
+        el mismo frame_rate con el que se calcularon.
+
+        Args:
+            video_path: Video original del partido
+            output_path: Ruta del video de resumen
+            max_duration: Duración máxima del resumen en segundos (opcional)
+
+        Returns:
+            list: Ventanas incluidas en el resumen
+        """
+        windows = self.get_highlight_windows(max_duration)
+        if not windows:
+            return windows
+
+        if shutil.which('ffmpeg'):
+            self._cut_with_ffmpeg(video_path, output_path, windows)
+        else:
+            self._cut_with_opencv(video_path, output_path, windows)
+        return windows
+
+    def _cut_with_ffmpeg(self, video_path: str, output_path: str, windows: List[Tuple[float, float]]):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extension = os.path.splitext(output_path)[1] or '.mp4'
+            clip_paths = []
+            for i, (start, end) in enumerate(windows):
+                clip_path = os.path.join(tmp_dir, f"clip_{i:04d}{extension}")
+                # -ss antes de -i: búsqueda directa en el contenedor, sin decodificar
+                subprocess.run([
+                    'ffmpeg', '-y', '-loglevel', 'error',
+                    '-ss', f"{start:.3f}", '-i', video_path, '-t', f"{end - start:.3f}",
+                    '-c', 'copy', '-avoid_negative_ts', 'make_zero', clip_path,
+                ], check=True)
+                clip_paths.append(clip_path)
+
+            list_path = os.path.join(tmp_dir, 'clips.txt')
+            with open(list_path, 'w') as f:
+                for clip_path in clip_paths:
+                    f.write(f"file '{clip_path}'\n")
+
+            subprocess.run([
+                'ffmpeg', '-y', '-loglevel', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_path,
+            ], check=True)
+
+    def _cut_with_opencv(self, video_path: str, output_path: str, windows: List[Tuple[float, float]]):
+        import cv2
+
+        video_capture = cv2.VideoCapture(video_path)
+        fps = self.frame_rate
+        width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'XVID'), fps, (width, height))
+
+        for start, end in windows:
+            first_frame, last_frame = int(round(start * fps)), int(round(end * fps))
+            video_capture.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+            for _ in range(first_frame, last_frame):
+                frame_exists, frame = video_capture.read()
+                if not frame_exists:
+                    break
+                out.write(frame)
+
+        out.release()
+        video_capture.release()
+
+
+def cut_match_highlights(tracks: Dict[str, Any], video_path: str, output_path: str,
+                         frame_rate: float = 24, max_duration: Optional[float] = None,
+                         calibrated: bool = False) -> List[Tuple[float, float]]:
+    """
+    Detecta los eventos del partido en los tracks y corta el resumen de jugadas.
+
+    Args:
+        tracks: dict con información de tracking (con 'position_transformed')
+        video_path: Video original del partido
+        output_path: Ruta del video de resumen
+        frame_rate: frames por segundo del video (sin redondear, para que las ventanas
+                    caigan en los frames de los eventos)
+        max_duration: Duración máxima del resumen en segundos (opcional)
+        calibrated: si las posiciones vienen de la calibración automática; sin ella
+                    no se detectan eventos y no se corta ningún resumen (ver EventDetector)
+
+    Returns:
+        list: Ventanas incluidas en el resumen
+    """
+    from events import EventDetector
+
+    events = EventDetector(tracks, frame_rate=frame_rate, calibrated=calibrated).process_tracks()
+    return AutoSummaryGenerator(tracks, events, frame_rate=frame_rate).cut_highlights(
+        video_path, output_path, max_duration)
@@ -1 +1,3 @@
-from .tracker import Tracker
\ No newline at end of file
+from .tracker import Tracker
+from .track_reid import TrackReidentifier
+from .ball_roi import BallRoiDetector
\ No newline at end of file
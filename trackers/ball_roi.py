@@ -0,0 +1,158 @@
+"""
+Segunda pasada de detección del balón sobre una región de interés.
+
+El balón ocupa pocos píxeles y en la detección a imagen completa (reescalada
+al tamaño de entrada del modelo) se pierde a menudo. Esta pasada solo se
+ejecuta en los frames donde falta el balón poco después de una detección:
+predice su posición por velocidad constante, recorta una ventana alrededor a
+resolución nativa y busca únicamente la clase balón en ella.
+
+Las ventanas de un tramo se procesan en lotes (una llamada a predict por lote).
+Cada ventana cuesta lo mismo que un frame completo con imgsz=roi_size, así que
+el ahorro solo existe si la detección a imagen completa usa un tamaño menor
+(--imgsz) que el que haría falta para ver el balón sin esta pasada.
+"""
+
+import numpy as np
+
+
+class BallRoiDetector:
+    """
+    Recupera detecciones de balón perdidas buscando en un recorte alrededor de su posición prevista.
+    """
+
+    def __init__(self, roi_size=640, conf=0.05, max_gap=12, ball_class="ball", batch_size=16):
+        """
+        Args:
+            roi_size (int): Lado en píxeles de la ventana (múltiplo de 32); se procesa sin reescalar
+            conf (float): Confianza mínima de la detección en la ventana
+            max_gap (int): Frames máximos desde la última detección para seguir buscando
+            ball_class (str): Nombre de la clase del balón en el modelo
+            batch_size (int): Ventanas por llamada al modelo
+        """
+        self.roi_size = roi_size
+        self.conf = conf
+        self.max_gap = max_gap
+        self.ball_class = ball_class
+        self.batch_size = batch_size
+
+    def predict_center(self, history, frame_num):
+        """
+        Extrapola el centro del balón con velocidad constante a partir de las
+        dos últimas detecciones conocidas.
+
+        Args:
+            history (list): Pares (frame, centro (x, y)) de detecciones previas, en orden
+            frame_num (int): Frame a predecir
+
+        Returns:
+            np.ndarray: Centro previsto (x, y)
+        """
+        last_frame, last_center = history[-1]
+        if len(history) < 2:
+            return np.asarray(last_center, dtype=np.float64)
+        prev_frame, prev_center = history[-2]
+        velocity = (np.asarray(last_center) - np.asarray(prev_center)) / max(last_frame - prev_frame, 1)
+        return np.asarray(last_center) + velocity * (frame_num - last_frame)
+
+    def roi_origin(self, frame_shape, center):
+        """
+        Esquina superior izquierda de la ventana centrada en center y ajustada al frame.
+        """
+        height, width = frame_shape[:2]
+        x0 = int(np.clip(center[0] - self.roi_size / 2, 0, max(width - self.roi_size, 0)))
+        y0 = int(np.clip(center[1] - self.roi_size / 2, 0, max(height - self.roi_size, 0)))
+        return x0, y0
+
+    def detect_in_roi(self, model, frame, center):
+        """
+        Busca el balón en la ventana alrededor de center.
+
+        Returns:
+            tuple: (bbox [x1, y1, x2, y2] en coordenadas del frame, confianza) o None
+        """
+        return self.detect_in_rois(model, [frame], [center])[0]
+
+    def detect_in_rois(self, model, frames, centers):
+        """
+        Busca el balón en las ventanas alrededor de cada centro, en lotes de batch_size.
+
+        Args:
+            model: Modelo YOLO para el balón
+            frames (list): Frame de cada ventana
+            centers (list): Centro previsto (x, y) de cada ventana
+
+        Returns:
+            list: Por ventana, (bbox [x1, y1, x2, y2] en coordenadas del frame, confianza) o None
+        """
+        import supervision as sv
+
+        ball_ids = [k for k, v in model.names.items() if v == self.ball_class]
+        origins = [self.roi_origin(frame.shape, center) for frame, center in zip(frames, centers)]
+        crops = [frame[y0:y0 + self.roi_size, x0:x0 + self.roi_size] for frame, (x0, y0) in zip(frames, origins)]
+
+        found = []
+        for i in range(0, len(crops), self.batch_size):
+            results = model.predict(crops[i:i + self.batch_size], imgsz=self.roi_size, conf=self.conf,
+                                    classes=ball_ids, verbose=False)
+            for result, (x0, y0), center in zip(results, origins[i:i + self.batch_size], centers[i:i + self.batch_size]):
+                detections = sv.Detections.from_ultralytics(result)
+                if len(detections) == 0:
+                    found.append(None)
+                    continue
+
+                # La detección más cercana al centro previsto
+                detection_centers = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2 + (x0, y0)
+                best = int(np.argmin(np.linalg.norm(detection_centers - center, axis=1)))
+                bbox = detections.xyxy[best] + (x0, y0, x0, y0)
+                found.append((bbox.tolist(), float(detections.confidence[best])))
+        return found
+
+    def recover(self, model, frames, ball_tracks, start, end, context_start=None, frames_offset=0):
+        """
+        Rellena (in-place) los frames sin balón de un tramo que están a menos
+        de max_gap frames de una detección.
+
+        Se trabaja por rondas: en cada una se predicen todas las ventanas que ya
+        están a menos de max_gap frames de una detección y se buscan en lotes; las
+        recuperadas permiten alcanzar frames más lejanos en la ronda siguiente.
+        Cada frame se busca una sola vez.
+
+        Args:
+            model: Modelo YOLO para el balón
+            frames (list): Frames del video (o solo los del tramo, ver frames_offset)
+            ball_tracks (list): Tracks del balón por frame ({1: {'bbox': ...}} o {})
+            start (int): Primer frame del tramo
+            end (int): Frame siguiente al último del tramo
+            context_start (int): Frame desde el que se toman detecciones previas para
+                                 predecir (p. ej. el inicio del segmento si el tramo es un chunk)
+            frames_offset (int): Número de frame de frames[0]; con frames_offset=start basta
+                                 pasar los frames ya decodificados del tramo
+
+        Returns:
+            int: Número de detecciones recuperadas
+        """
+        recovered = 0
+        searched = set()
+        context_start = start if context_start is None else max(context_start, start - self.max_gap)
+        while True:
+            history = []
+            candidates = []
+            for frame_num in range(context_start, end):
+                ball = ball_tracks[frame_num].get(1)
+                if (ball is None and frame_num >= start and frame_num not in searched
+                        and history and frame_num - history[-1][0] <= self.max_gap):
+                    candidates.append((frame_num, self.predict_center(history, frame_num)))
+                if ball is not None:
+                    bbox = ball["bbox"]
+                    history = history[-1:] + [(frame_num, ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2))]
+            if not candidates:
+                return recovered
+
+            searched.update(frame_num for frame_num, _ in candidates)
+            found = self.detect_in_rois(model, [frames[frame_num - frames_offset] for frame_num, _ in candidates],
+                                        [center for _, center in candidates])
+            for (frame_num, _), detection in zip(candidates, found):
+                if detection is not None:
+                    ball_tracks[frame_num][1] = {"bbox": detection[0]}
+                    recovered += 1
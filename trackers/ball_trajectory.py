@@ -0,0 +1,203 @@
+"""
+Módulo para reconstruir la trayectoria del balón a partir de sus detecciones.
+
+Trabaja sobre la serie columnar del balón (un array (N, 4) con un bbox por
+frame y NaN donde no hubo detección), sin pasar por pandas.
+"""
+
+import numpy as np
+
+# Códigos de confianza por frame
+BALL_MISSING = 0        # Sin balón (hueco demasiado largo)
+BALL_INTERPOLATED = 1   # Posición rellenada por interpolación
+BALL_DETECTED = 2       # Detección original aceptada
+
+
+def ball_series_from_tracks(ball_tracks):
+    """
+    Convierte los tracks del balón en una serie columnar.
+
+    Args:
+        ball_tracks (list): Lista por frame de dicts {1: {'bbox': [x1, y1, x2, y2]}}
+
+    Returns:
+        np.ndarray: Array (N, 4) float64 con NaN en los frames sin detección
+    """
+    series = np.full((len(ball_tracks), 4), np.nan)
+    for frame_num, frame_ball in enumerate(ball_tracks):
+        bbox = frame_ball.get(1, {}).get('bbox')
+        if bbox is not None and len(bbox) == 4:
+            series[frame_num] = bbox
+    return series
+
+
+def ball_series_to_tracks(series, confidence):
+    """
+    Reconstruye los tracks del balón a partir de la serie columnar.
+
+    Los frames marcados como BALL_MISSING quedan como dict vacío.
+
+    Args:
+        series (np.ndarray): Array (N, 4) con los bbox por frame
+        confidence (np.ndarray): Array (N,) con el código de confianza por frame
+
+    Returns:
+        list: Lista por frame de dicts {1: {'bbox': [...], 'confidence': int}}
+    """
+    bboxes = series.tolist()
+    flags = confidence.tolist()
+    return [
+        {1: {'bbox': bbox, 'confidence': flag}} if flag != BALL_MISSING else {}
+        for bbox, flag in zip(bboxes, flags)
+    ]
+
+
+def _run_lengths(mask):
+    """
+    Devuelve, para cada frame, la longitud del tramo contiguo de True al que pertenece
+    (0 para los frames en False).
+    """
+    n = mask.shape[0]
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[::2], edges[1::2]
+    lengths = np.zeros(n, dtype=np.int64)
+    if starts.size:
+        run_id = np.cumsum(np.isin(np.arange(n), starts)) - 1
+        lengths[mask] = (ends - starts)[run_id[mask]]
+    return lengths
+
+
+class BallTrajectory:
+    """
+    Motor de trayectoria del balón: rechazo de outliers por velocidad,
+    interpolación con límite de hueco y suavizado por spline discreto.
+    """
+
+    def __init__(self, max_gap=48, max_speed=80.0, smoothing=5.0):
+        """
+        Args:
+            max_gap (int): Máximo número de frames consecutivos sin balón que se interpolan
+            max_speed (float): Velocidad máxima del centro del balón en píxeles por frame
+            smoothing (float): Peso de suavizado (lambda) del spline; 0 o None lo desactiva
+        """
+        self.max_gap = max_gap
+        self.max_speed = max_speed
+        self.smoothing = smoothing
+
+    def reject_outliers(self, series):
+        """
+        Marca como outliers las detecciones aisladas cuyo centro salta a una velocidad
+        imposible tanto respecto a la detección anterior como a la siguiente.
+
+        Args:
+            series (np.ndarray): Array (N, 4) con NaN en los frames sin detección
+
+        Returns:
+            np.ndarray: Máscara booleana (N,) con las detecciones rechazadas
+        """
+        outliers = np.zeros(series.shape[0], dtype=bool)
+        valid_idx = np.flatnonzero(~np.isnan(series[:, 0]))
+        if valid_idx.size < 3:
+            return outliers
+
+        centers = (series[valid_idx, :2] + series[valid_idx, 2:]) / 2
+        steps = np.diff(valid_idx)
+        speeds = np.linalg.norm(np.diff(centers, axis=0), axis=1) / steps
+        too_fast = speeds > self.max_speed
+
+        # Una detección es outlier si llega y sale demasiado rápido
+        spike = np.zeros(valid_idx.size, dtype=bool)
+        spike[1:-1] = too_fast[:-1] & too_fast[1:]
+        # En los extremos solo hay un vecino
+        spike[0] = too_fast[0] and not too_fast[1]
+        spike[-1] = too_fast[-1] and not too_fast[-2]
+
+        outliers[valid_idx[spike]] = True
+        return outliers
+
+    def interpolate(self, series):
+        """
+        Interpola linealmente los huecos de hasta max_gap frames.
+
+        Los huecos iniciales y finales se rellenan con la posición más cercana,
+        con el mismo límite de longitud.
+
+        Args:
+            series (np.ndarray): Array (N, 4) con NaN en los frames sin detección
+
+        Returns:
+            tuple: (serie interpolada (N, 4), máscara (N,) de frames rellenados)
+        """
+        missing = np.isnan(series[:, 0])
+        valid_idx = np.flatnonzero(~missing)
+        filled = series.copy()
+        if valid_idx.size == 0:
+            return filled, np.zeros_like(missing)
+
+        fillable = missing & (_run_lengths(missing) <= self.max_gap)
+        fill_idx = np.flatnonzero(fillable)
+        for col in range(4):
+            filled[fill_idx, col] = np.interp(fill_idx, valid_idx, series[valid_idx, col])
+
+        return filled, fillable
+
+    def smooth(self, series, weights):
+        """
+        Suaviza la serie con un spline discreto (Whittaker-Henderson) que minimiza
+        sum(w * (y - z)^2) + smoothing * sum((segunda diferencia de z)^2).
+
+        Los frames con peso 0 (interpolados) toman la forma del spline en lugar
+        de la recta. El sistema es pentadiagonal y se resuelve en O(N).
+
+        Args:
+            series (np.ndarray): Array (N, 4) sin NaN en los frames con peso > 0
+            weights (np.ndarray): Pesos (N,) por frame
+
+        Returns:
+            np.ndarray: Serie suavizada (N, 4)
+        """
+        n = series.shape[0]
+        if not self.smoothing or n < 3 or np.count_nonzero(weights) < 2:
+            return series
+
+        from scipy.linalg import solveh_banded
+
+        lam = float(self.smoothing)
+        # Matriz smoothing * D'D en formato banda superior (D = segunda diferencia)
+        banded = np.zeros((3, n))
+        banded[0, 2:] = lam
+        banded[1, 1:-1] -= 2 * lam
+        banded[1, 2:] -= 2 * lam
+        banded[2, :-2] += lam
+        banded[2, 1:-1] += 4 * lam
+        banded[2, 2:] += lam
+        banded[2] += weights
+
+        rhs = np.where(weights[:, None] > 0, series, 0.0) * weights[:, None]
+        return solveh_banded(banded, rhs)
+
+    def process(self, series):
+        """
+        Ejecuta el pipeline completo sobre la serie del balón.
+
+        Args:
+            series (np.ndarray): Array (N, 4) con NaN en los frames sin detección
+
+        Returns:
+            tuple: (serie final (N, 4), confianza (N,) uint8)
+        """
+        series = np.array(series, dtype=np.float64, copy=True)
+        series[self.reject_outliers(series)] = np.nan
+
+        detected = ~np.isnan(series[:, 0])
+        series, filled = self.interpolate(series)
+        available = detected | filled
+
+        series = self.smooth(series, detected.astype(np.float64))
+        series[~available] = np.nan
+
+        confidence = np.full(series.shape[0], BALL_MISSING, dtype=np.uint8)
+        confidence[filled] = BALL_INTERPOLATED
+        confidence[detected] = BALL_DETECTED
+        return series, confidence
@@ -0,0 +1,189 @@
+"""
+Módulo para reidentificar y fusionar tracks fragmentados.
+
+ByteTrack asigna un ID nuevo cada vez que pierde a un jugador. Este paso
+posterior al tracking resume cada track (tracklet) con un descriptor de
+apariencia barato (histograma H-S de la camiseta) y fusiona los fragmentos
+compatibles en tiempo, espacio y apariencia.
+"""
+
+import cv2
+import numpy as np
+
+
+class TrackReidentifier:
+    """
+    Fusiona tracklets que pertenecen al mismo jugador.
+
+    Los candidatos se buscan con un índice temporal (tracklets ordenados por
+    frame de inicio) y se comparan contra una matriz plana de descriptores
+    normalizados, por lo que el coste crece con el número de candidatos
+    dentro de la ventana temporal y no con el cuadrado del número de tracklets.
+    """
+
+    def __init__(self, max_gap=120, max_pixel_speed=15.0, base_radius=50.0,
+                 max_appearance_distance=0.5, num_samples=5):
+        """
+        Args:
+            max_gap (int): Frames máximos entre el fin de un tracklet y el inicio del siguiente
+            max_pixel_speed (float): Desplazamiento máximo en píxeles por frame durante el hueco
+            base_radius (float): Radio mínimo en píxeles para aceptar la continuación
+            max_appearance_distance (float): Distancia de Hellinger máxima entre descriptores
+            num_samples (int): Recortes por tracklet usados para el descriptor
+        """
+        self.max_gap = max_gap
+        self.max_pixel_speed = max_pixel_speed
+        self.base_radius = base_radius
+        self.max_appearance_distance = max_appearance_distance
+        self.num_samples = num_samples
+
+    def _describe_crop(self, frame, bbox):
+        """
+        Histograma H-S (16x4) de la mitad superior del bbox, en raíz cuadrada para
+        que la distancia euclídea equivalga a la de Hellinger.
+        """
+        x1, y1, x2, y2 = (int(v) for v in bbox)
+        y_mid = y1 + (y2 - y1) // 2
+        crop = frame[max(y1, 0):max(y_mid, 0), max(x1, 0):max(x2, 0)]
+        if crop.shape[0] < 2 or crop.shape[1] < 2:
+            return None
+
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 4], [0, 180, 0, 256]).ravel()
+        total = hist.sum()
+        if total == 0:
+            return None
+        return np.sqrt(hist / total)
+
+    def build_tracklets(self, frames, object_tracks):
+        """
+        Resume cada track en inicio, fin, posiciones extremas y descriptor de apariencia.
+
+        Returns:
+            tuple: (ids (n,), inicio (n,), fin (n,), posición inicial (n, 2),
+                    posición final (n, 2), descriptores (n, d))
+        """
+        frames_by_id = {}
+        for frame_num, frame_tracks in enumerate(object_tracks):
+            for track_id in frame_tracks:
+                frames_by_id.setdefault(track_id, []).append(frame_num)
+
+        # Recortes repartidos a lo largo de cada tracklet. Se leen por orden de
+        # frame y cada frame una sola vez: con un FrameSource el decodificador
+        # avanza sin volver atrás
+        samples_by_frame = {}
+        for track_id, track_frames in frames_by_id.items():
+            sample_idx = np.linspace(0, len(track_frames) - 1, min(self.num_samples, len(track_frames)))
+            for idx in np.unique(sample_idx.astype(int)):
+                samples_by_frame.setdefault(track_frames[idx], []).append(track_id)
+
+        samples_by_id = {}
+        for frame_num in sorted(samples_by_frame):
+            frame = frames[frame_num]
+            for track_id in samples_by_frame[frame_num]:
+                descriptor = self._describe_crop(frame, object_tracks[frame_num][track_id]['bbox'])
+                if descriptor is not None:
+                    samples_by_id.setdefault(track_id, []).append(descriptor)
+
+        ids, starts, ends, first_pos, last_pos, descriptors = [], [], [], [], [], []
+        for track_id, track_frames in frames_by_id.items():
+            samples = samples_by_id.get(track_id)
+            if not samples:
+                continue
+            descriptor = np.mean(samples, axis=0)
+            first, last = track_frames[0], track_frames[-1]
+            first_bbox = object_tracks[first][track_id]['bbox']
+            last_bbox = object_tracks[last][track_id]['bbox']
+
+            ids.append(track_id)
+            starts.append(first)
+            ends.append(last)
+            first_pos.append(((first_bbox[0] + first_bbox[2]) / 2, first_bbox[3]))
+            last_pos.append(((last_bbox[0] + last_bbox[2]) / 2, last_bbox[3]))
+            descriptors.append(descriptor / np.linalg.norm(descriptor))
+
+        return (np.array(ids), np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+                np.array(first_pos).reshape(-1, 2), np.array(last_pos).reshape(-1, 2),
+                np.array(descriptors).reshape(len(ids), -1))
+
+    def find_links(self, starts, ends, first_pos, last_pos, descriptors):
+        """
+        Empareja cada tracklet que termina con uno que empieza después, de forma
+        voraz por coste creciente (cada tracklet tiene como mucho un sucesor y un
+        predecesor).
+
+        Returns:
+            list: Pares (índice predecesor, índice sucesor)
+        """
+        order = np.argsort(starts)
+        sorted_starts = starts[order]
+
+        candidates = []
+        for i in range(len(starts)):
+            # Índice temporal: tracklets que empiezan en (fin, fin + max_gap]
+            lo = np.searchsorted(sorted_starts, ends[i], side='right')
+            hi = np.searchsorted(sorted_starts, ends[i] + self.max_gap, side='right')
+            if lo == hi:
+                continue
+            js = order[lo:hi]
+
+            gaps = starts[js] - ends[i]
+            jumps = np.linalg.norm(first_pos[js] - last_pos[i], axis=1)
+            reachable = jumps <= self.base_radius + self.max_pixel_speed * gaps
+
+            # Distancia euclídea entre descriptores unitarios a partir del producto escalar
+            appearance = np.sqrt(np.maximum(0.0, 2 - 2 * descriptors[js] @ descriptors[i]))
+            similar = appearance <= self.max_appearance_distance
+
+            valid = reachable & similar
+            for j, cost in zip(js[valid], (appearance + jumps / (self.base_radius * 10))[valid]):
+                candidates.append((cost, i, j))
+
+        candidates.sort()
+        has_successor, has_predecessor = set(), set()
+        links = []
+        for _, i, j in candidates:
+            if i in has_successor or j in has_predecessor:
+                continue
+            has_successor.add(i)
+            has_predecessor.add(j)
+            links.append((i, j))
+        return links
+
+    def merge_tracks(self, frames, tracks, object_name='players'):
+        """
+        Fusiona los tracks fragmentados de un tipo de objeto (in-place).
+
+        Args:
+            frames (list): Frames del video
+            tracks (dict): Tracks por tipo de objeto y frame
+            object_name (str): Tipo de objeto a procesar
+
+        Returns:
+            dict: Mapeo {id original: id fusionado} de los tracks renombrados
+        """
+        object_tracks = tracks[object_name]
+        ids, starts, ends, first_pos, last_pos, descriptors = self.build_tracklets(frames, object_tracks)
+        if len(ids) < 2:
+            return {}
+
+        successor = dict(self.find_links(starts, ends, first_pos, last_pos, descriptors))
+        predecessors = set(successor.values())
+
+        # Cada cadena toma el ID de su primer tracklet
+        mapping = {}
+        for root in range(len(ids)):
+            if root in predecessors:
+                continue
+            current = successor.get(root)
+            while current is not None:
+                mapping[ids[current].item()] = ids[root].item()
+                current = successor.get(current)
+
+        if mapping:
+            for frame_num, frame_tracks in enumerate(object_tracks):
+                if any(track_id in mapping for track_id in frame_tracks):
+                    object_tracks[frame_num] = {
+                        mapping.get(track_id, track_id): info for track_id, info in frame_tracks.items()
+                    }
+        return mapping
@@ -1,35 +1,102 @@
-from ultralytics import YOLO
-import supervision as sv
-import pickle as pk
 import os
 import sys
 import cv2
 import numpy as np
-import pandas as pd
 
 # Añadir el directorio padre al path para importaciones
 sys.path.append("../")
-from utils.bbox_utils import get_center_of_bbox, get_bbox_width, get_foot_position
+from utils.bbox_utils import get_center_of_bbox, get_foot_position
+from utils.checkpoint import atomic_pickle_dump, load_stub
+from utils.track_storage import PackedTracks, unpack_tracks
+from utils import progress, background_io
+from visualization.annotation_renderer import AnnotationRenderer
+from .ball_trajectory import BallTrajectory, ball_series_from_tracks, ball_series_to_tracks
+from .tracker_backends import create_tracker
 
 
 class Tracker:
     """
     Clase principal para detectar y rastrear objetos en videos de fútbol.
-    Utiliza YOLO para detección y ByteTrack para seguimiento de objetos.
+    Utiliza YOLO para detección y ByteTrack (o un tracker IoU) para seguimiento de objetos.
     """
     
-    def __init__(self, model_path):
+    # Clases con tracker propio; la pelota no se rastrea (una por frame, ID fijo)
+    TRACKED_CLASSES = ("players", "referees")
+    
+    def __init__(self, model_path, tracker_type='bytetrack', frame_rate=24, tracker_params=None, model=None,
+                 imgsz=None, ball_roi=None, ball_model_path=None):
         """
         Inicializa el tracker con el modelo YOLO y el algoritmo de seguimiento.
         
         Args:
             model_path (str): Ruta al archivo del modelo YOLO entrenado (.pt)
+            tracker_type (str): Backend de seguimiento ('bytetrack' o 'iou')
+            frame_rate (int): Frames por segundo del video
+            tracker_params (dict): Parámetros del backend por clase,
+                                   p. ej. {'players': {'lost_track_buffer': 60}} (opcional)
+            model: Modelo YOLO ya cargado, p. ej. el que mantiene caliente el servicio (opcional)
+            imgsz (int): Tamaño de entrada de la detección a imagen completa (None = el del modelo)
+            ball_roi (BallRoiDetector): Segunda pasada de balón sobre una ventana a resolución nativa (opcional)
+            ball_model_path (str): Modelo específico para esa pasada (por defecto, el principal)
         """
-        # Cargar modelo YOLO preentrenado para detección de objetos
-        self.model = YOLO(model_path)
+        # El modelo YOLO y los trackers se crean al primer uso: si los tracks
+        # se cargan desde cache no se importan ultralytics/torch ni supervision
+        self.model_path = model_path
+        self.tracker_type = tracker_type
+        self.frame_rate = frame_rate
+        self.tracker_params = tracker_params or {}
+        self._model = model
+        self._trackers = None
+        self.imgsz = imgsz
+        self.ball_roi = ball_roi
+        self.ball_model_path = ball_model_path
+        self._ball_model = None
+
+        # Motor de trayectoria del balón (interpolación y suavizado)
+        self.ball_trajectory = BallTrajectory()
+        self.renderer = AnnotationRenderer()
         
-        # Inicializar tracker ByteTrack para seguimiento multi-objeto
-        self.tracker = sv.ByteTrack()
+    def __getstate__(self):
+        # Al pasar el tracker a otro proceso no se copian el modelo ni el estado de los trackers
+        state = self.__dict__.copy()
+        state['_model'] = None
+        state['_trackers'] = None
+        state['_ball_model'] = None
+        return state
+
+    @property
+    def model(self):
+        """
+        Modelo YOLO preentrenado para detección de objetos (carga diferida).
+        """
+        if self._model is None:
+            from ultralytics import YOLO
+            self._model = YOLO(self.model_path)
+        return self._model
+    
+    @property
+    def ball_model(self):
+        """
+        Modelo de la pasada de balón por ventana: el específico si se indicó, si no el principal.
+        """
+        if self.ball_model_path is None:
+            return self.model
+        if self._ball_model is None:
+            from ultralytics import YOLO
+            self._ball_model = YOLO(self.ball_model_path)
+        return self._ball_model
+    
+    @property
+    def trackers(self):
+        """
+        Un tracker independiente por clase para que no compitan en la asociación (creación diferida).
+        """
+        if self._trackers is None:
+            self._trackers = {
+                object_name: create_tracker(self.tracker_type, self.frame_rate, **self.tracker_params.get(object_name, {}))
+                for object_name in self.TRACKED_CLASSES
+            }
+        return self._trackers
         
     def add_possition_to_tracks(self,tracks):
         for object, object_tracks in tracks.items():
@@ -44,16 +111,29 @@ class Tracker:
                         
         
         
-    def interpolate_ball_positions(self, ball_positions):
-        ball_positions = [x.get(1,{}).get('bbox',[]) for x in ball_positions]
-        df_ball_positions = pd.DataFrame(ball_positions,columns=['x1','y1','x2','y2'])
-        
-        df_ball_positions = df_ball_positions.interpolate()
-        df_ball_positions = df_ball_positions.bfill()
-        
-        ball_positions = [{1: {'bbox':x}} for x in df_ball_positions.to_numpy().tolist()]
-        
-        return ball_positions
+    def interpolate_ball_positions(self, ball_positions, segments=None):
+        """
+        Reconstruye la trayectoria del balón: descarta detecciones con velocidad
+        imposible, interpola huecos de hasta ball_trajectory.max_gap frames y suaviza.
+
+        Args:
+            ball_positions (list): Tracks del balón por frame
+            segments (list): Segmentos sin cortes de cámara; no se interpola entre segmentos (opcional)
+
+        Returns:
+            list: Tracks del balón con 'bbox' y 'confidence' por frame
+                  (dict vacío en los frames sin balón)
+        """
+        series = ball_series_from_tracks(ball_positions)
+        if segments is None:
+            series, confidence = self.ball_trajectory.process(series)
+            return ball_series_to_tracks(series, confidence)
+
+        confidence = np.zeros(len(series), dtype=np.uint8)
+        for segment in segments:
+            start, end = segment['start'], segment['end']
+            series[start:end], confidence[start:end] = self.ball_trajectory.process(series[start:end])
+        return ball_series_to_tracks(series, confidence)
 
     def detect_frames(self, frames):
         """
@@ -68,21 +148,41 @@ class Tracker:
         # Procesar frames en lotes para mayor eficiencia
         batch_size = 20
         detections = []
+        predict_params = {'imgsz': self.imgsz} if self.imgsz else {}
         
         for i in range(0, len(frames), batch_size):
             # Predecir objetos en el lote actual con confianza mínima del 10%
             detections_batch = self.model.predict(
                 frames[i:i+batch_size], 
-                conf=0.1
+                conf=0.1,
+                **predict_params
             )   
             detections += detections_batch
+            progress.advance(len(detections_batch))
             
             # Solo procesar el primer lote por ahora (para testing)
 
             
         return detections
 
-    def object_tracks(self, frames, read_from_stub=False, stub_path=None):
+    def get_tracker_state(self):
+        """
+        Estado interno de los trackers por clase, para guardarlo en un checkpoint.
+        
+        Se guarda el __dict__ de cada tracker porque la clase de ByteTrack
+        (envuelta por un decorador de obsolescencia) no se puede serializar.
+        """
+        return {object_name: dict(object_tracker.__dict__) for object_name, object_tracker in self.trackers.items()}
+
+    def set_tracker_state(self, state):
+        """
+        Restaura el estado guardado con get_tracker_state.
+        """
+        for object_name, tracker_state in state.items():
+            self.trackers[object_name].__dict__.update(tracker_state)
+
+    def object_tracks(self, frames, read_from_stub=False, stub_path=None, segments=None, skip_types=(),
+                      checkpoint=None, chunk_size=500):
         """
         Rastrea objetos a través de todos los frames del video.
         Puede cargar desde cache o procesar desde cero.
@@ -91,183 +191,144 @@ class Tracker:
             frames (list): Frames del video
             read_from_stub (bool): Si cargar datos desde cache
             stub_path (str): Ruta del archivo cache
+            segments (list): Segmentos sin cortes de cámara [{'start', 'end', 'type'}, ...] (opcional)
+            skip_types (tuple): Tipos de segmento que no se procesan (p. ej. repeticiones)
+            checkpoint (StageCheckpoint): Si se indica, se guarda un checkpoint cada chunk_size
+                                          frames y se continúa desde el último guardado (opcional)
+            chunk_size (int): Frames que se detectan de una vez
             
         Returns:
             dict: Diccionario con tracks organizados por tipo de objeto y frame
         """
         # Intentar cargar desde cache si está disponible
         if read_from_stub and stub_path and os.path.exists(stub_path):
-            with open(stub_path, 'rb') as f:
-                tracks = pk.load(f)
+            tracks = unpack_tracks(load_stub(stub_path))
             return tracks
 
-        # Ejecutar detecciones en todos los frames
-        detections = self.detect_frames(frames)       
+        import supervision as sv
+
+        # Sin segmentación, todo el video es un único plano
+        if segments is None:
+            segments = [{'start': 0, 'end': len(frames), 'type': 'play'}]
 
         # Inicializar estructura de datos para almacenar tracks
         tracks = {
-        key: [{} for _ in range(len(frames))]
-        for key in ("players", "referees", "ball")
-    }
-
-        for frame_num, detection in enumerate(detections):
-            # Obtener mapeo de clases del modelo
-            cls_names = detection.names
-            cls_names_inv = {v: k for k, v in cls_names.items()}
-
-            # Convertir detecciones YOLO al formato de supervision
-            detection_supervision = sv.Detections.from_ultralytics(detection)  
-
-            # Normalizar: convertir porteros en jugadores para tracking uniforme
-            for object_ind, class_id in enumerate(detection_supervision.class_id):
-                if cls_names[class_id] == "goalkeeper":
-                    detection_supervision.class_id[object_ind] = cls_names_inv["player"]
-
-            # Aplicar algoritmo de seguimiento para mantener IDs consistentes
-            detection_with_tracks = self.tracker.update_with_detections(detection_supervision)
-
-            # Organizar detecciones por tipo de objeto
-            tracks["players"].append({})
-            tracks["referees"].append({})
-            tracks["ball"].append({})
-
-            # Clasificar cada detección según su tipo
-            for frame_detection in detection_with_tracks:
-                bbox = frame_detection[0].tolist()
-                cls_id = frame_detection[3]
-                track_id = frame_detection[4]
-
-                # Asignar a la categoría correspondiente
-                if cls_id == cls_names_inv["player"]:
-                    tracks["players"][frame_num][track_id] = {"bbox": bbox}
-                    
-                elif cls_id == cls_names_inv["referee"]:
-                    tracks["referees"][frame_num][track_id] = {"bbox": bbox}
-
-                # Tratamiento especial para la pelota (solo una por frame)
-                if cls_id == cls_names_inv["ball"]:
-                    tracks["ball"][frame_num][1] = {"bbox": bbox}
-
-        # Guardar en cache si se especifica ruta
+            key: [{} for _ in range(len(frames))]
+            for key in ("players", "referees", "ball")
+        }
+
+        # Desplazamiento de IDs para que no se repitan entre segmentos
+        id_offset = 0
+
+        # Reanudar desde el último checkpoint: tracks ya calculados y estado de los trackers
+        saved = checkpoint.load() if checkpoint is not None else None
+        if saved is not None:
+            chunks, state = saved
+            for chunk in chunks:
+                for key, chunk_tracks in unpack_tracks(chunk['tracks']).items():
+                    tracks[key][chunk['start']:chunk['start'] + len(chunk_tracks)] = chunk_tracks
+            self.set_tracker_state(state['trackers'])
+            id_offset = state['id_offset']
+
+        # Frames que quedan por detectar (para el progreso)
+        remaining = 0
+        for segment_num, segment in enumerate(segments):
+            if segment['type'] in skip_types or (saved is not None and segment_num < state['segment']):
+                continue
+            resumed = saved is not None and segment_num == state['segment']
+            remaining += segment['end'] - (state['next_frame'] if resumed else segment['start'])
+        progress.start_stage("detection", remaining)
+
+        for segment_num, segment in enumerate(segments):
+            # Los segmentos omitidos quedan sin detecciones
+            if segment['type'] in skip_types:
+                continue
+
+            start = segment['start']
+            if saved is not None and segment_num < state['segment']:
+                continue
+            if saved is not None and segment_num == state['segment']:
+                # Segmento a medias: continuar con los trackers restaurados
+                start = state['next_frame']
+                max_track_id = state['max_track_id']
+            else:
+                # Nuevo plano: el estado de los trackers del plano anterior ya no es válido
+                for object_tracker in self.trackers.values():
+                    object_tracker.reset()
+                max_track_id = id_offset
+
+            for chunk_start in range(start, segment['end'], chunk_size):
+                chunk_end = min(chunk_start + chunk_size, segment['end'])
+
+                # Ejecutar detecciones en los frames del chunk (decodificados una sola vez
+                # si frames es un FrameSource; la recuperación del balón reutiliza los mismos)
+                chunk_frames = frames[chunk_start:chunk_end]
+                detections = self.detect_frames(chunk_frames)
+
+                for offset, detection in enumerate(detections):
+                    frame_num = chunk_start + offset
+
+                    # Obtener mapeo de clases del modelo
+                    cls_names = detection.names
+                    cls_names_inv = {v: k for k, v in cls_names.items()}
+
+                    # Convertir detecciones YOLO al formato de supervision
+                    detection_supervision = sv.Detections.from_ultralytics(detection)  
+
+                    # Normalizar: convertir porteros en jugadores para tracking uniforme
+                    if "goalkeeper" in cls_names_inv:
+                        goalkeepers = detection_supervision.class_id == cls_names_inv["goalkeeper"]
+                        detection_supervision.class_id[goalkeepers] = cls_names_inv["player"]
+
+                    # Aplicar el tracker de cada clase para mantener IDs consistentes
+                    class_ids = {"players": cls_names_inv["player"], "referees": cls_names_inv["referee"]}
+                    for object_name, object_tracker in self.trackers.items():
+                        class_detections = detection_supervision[detection_supervision.class_id == class_ids[object_name]]
+                        class_with_tracks = object_tracker.update_with_detections(class_detections)
+
+                        for bbox, tracker_id in zip(class_with_tracks.xyxy.tolist(), class_with_tracks.tracker_id.tolist()):
+                            track_id = int(tracker_id) + id_offset
+                            max_track_id = max(max_track_id, track_id)
+                            tracks[object_name][frame_num][track_id] = {"bbox": bbox}
+
+                    # Tratamiento especial para la pelota: la detección más confiable del frame
+                    ball_detections = detection_supervision[detection_supervision.class_id == cls_names_inv["ball"]]
+                    if len(ball_detections) > 0:
+                        best = int(np.argmax(ball_detections.confidence))
+                        tracks["ball"][frame_num][1] = {"bbox": ball_detections.xyxy[best].tolist()}
+
+                # Recuperar el balón perdido buscando alrededor de su posición prevista
+                if self.ball_roi is not None:
+                    self.ball_roi.recover(self.ball_model, chunk_frames, tracks["ball"], chunk_start, chunk_end,
+                                          context_start=segment['start'], frames_offset=chunk_start)
+
+                if checkpoint is not None:
+                    checkpoint.save(
+                        chunk_end,
+                        {'start': chunk_start,
+                         'tracks': PackedTracks.pack({key: tracks[key][chunk_start:chunk_end] for key in tracks})},
+                        {'segment': segment_num, 'id_offset': id_offset, 'max_track_id': max_track_id,
+                         'trackers': self.get_tracker_state()}
+                    )
+
+            id_offset = max_track_id
+
+        progress.finish_stage()
+
+        # Guardar en cache si se especifica ruta (escritura atómica), por columnas en float32.
+        # El checkpoint solo se borra cuando el stub ya está en disco
         if stub_path:
-            with open(stub_path, 'wb') as f:
-                pk.dump(tracks, f)
+            saved = background_io.submit("stub:tracks", atomic_pickle_dump, PackedTracks.pack(tracks), stub_path)
+            if checkpoint is not None:
+                background_io.result(saved)
+        if checkpoint is not None:
+            checkpoint.clear()
 
         return tracks
 
-    def draw_ellipse(self, frame, bbox, color, track_id=None):
-        """
-        Dibuja una elipse en la base del objeto detectado para visualización.
-        
-        Args:
-            frame: Frame donde dibujar
-            bbox: Coordenadas del bounding box [x1, y1, x2, y2]
-            color: Color RGB para la elipse
-            track_id: ID del track (opcional, para mostrar número)
-            
-        Returns:
-            frame: Frame modificado con la elipse dibujada
-        """
-        # Calcular posición y dimensiones de la elipse
-        y_bottom = int(bbox[3])  # Parte inferior del bbox
-        x_center, _ = get_center_of_bbox(bbox)
-        width = get_bbox_width(bbox)
-
-        # Dibujar elipse en la base del objeto
-        cv2.ellipse(
-            frame, 
-            center=(x_center, y_bottom), 
-            axes=(int(width), int(0.35 * width)), 
-            angle=0.0, 
-            startAngle=45, 
-            endAngle=235, 
-            color=color, 
-            thickness=2, 
-            lineType=cv2.LINE_4
-        )
-
-        # Añadir etiqueta con ID del track si se proporciona
-        if track_id is not None:
-            self._draw_track_label(frame, x_center, y_bottom, track_id, color)
-        
-        return frame
-
-    def _draw_track_label(self, frame, x_center, y_bottom, track_id, color):
-        """
-        Método auxiliar para dibujar la etiqueta del ID del track.
-        """
-        # Dimensiones del rectángulo de la etiqueta
-        rectangle_width = 40
-        rectangle_height = 20
-        
-        # Calcular posición del rectángulo
-        x1_rect = x_center - rectangle_width // 2
-        x2_rect = x_center + rectangle_width // 2
-        y1_rect = (y_bottom - rectangle_height // 2) + 15
-        y2_rect = (y_bottom + rectangle_height // 2) + 15
-
-        # Dibujar rectángulo de fondo
-        cv2.rectangle(
-            frame, 
-            (int(x1_rect), int(y1_rect)), 
-            (int(x2_rect), int(y2_rect)), 
-            color, 
-            cv2.FILLED
-        )
-        
-        # Ajustar posición del texto según número de dígitos
-        x_text = x1_rect + 12
-        if track_id > 99:
-            x_text -= 10
-        
-        # Dibujar número del track
-        cv2.putText(
-            frame, 
-            f"{track_id}", 
-            (int(x_text), int(y1_rect + 15)), 
-            cv2.FONT_HERSHEY_SIMPLEX, 
-            0.6, 
-            (0, 0, 0),  # Texto negro
-            2
-        )
-
-    def draw_triangle(self, frame, bbox, color):
-        """
-        Dibuja un triángulo para marcar objetos especiales como la pelota.
-        
-        Args:
-            frame: Frame donde dibujar
-            bbox: Coordenadas del bounding box
-            color: Color del triángulo
-            
-        Returns:
-            frame: Frame modificado con el triángulo
-        """
-        # Obtener posición para el triángulo (parte superior del bbox)
-        y_top = int(bbox[1])
-        x_center, _ = get_center_of_bbox(bbox)
-
-        # Definir puntos del triángulo
-        triangle_points = np.array([
-            [x_center, y_top],           # Punta superior
-            [x_center - 10, y_top - 20], # Esquina inferior izquierda
-            [x_center + 10, y_top - 20], # Esquina inferior derecha
-        ])
-        
-        # Dibujar triángulo relleno
-        cv2.drawContours(frame, [triangle_points], 0, color, cv2.FILLED)
-        
-        # Dibujar borde negro para mejor visibilidad
-        cv2.drawContours(frame, [triangle_points], 0, (0, 0, 0), 2)
-
-        return frame
-    
     def draw_team_control(self, frame, frame_num, team_ball_control):
-        # Dibuja un rectángulo 
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (1150,50), (1800,170), (125,65,24),-1)
-        alpha = 0.9
-        cv2.addWeighted(overlay, alpha , frame, 1 - alpha, 0, frame)
+        # Dibuja un rectángulo semitransparente (solo se mezcla la región del panel)
+        self.renderer.blend_rect(frame, (1150, 50), (1800, 170), (125, 65, 24), 0.9)
         
         team_ball_control_till_frame = team_ball_control[:frame_num+1]
         
@@ -284,13 +345,15 @@ class Tracker:
         
         return frame
 
-    def draw_annotations(self, video_frames, tracks, team_ball_control):
+    def draw_annotations(self, video_frames, tracks, team_ball_control, team_colors=None):
         """
         Dibuja todas las anotaciones de tracking en los frames del video.
         
         Args:
             video_frames (list): Lista de frames originales
             tracks (dict): Datos de tracking por tipo de objeto y frame
+            team_ball_control (np.ndarray): Equipo con el balón en cada frame
+            team_colors (dict): Color de cada equipo {team_id: color} (opcional)
             
         Returns:
             list: Frames anotados con visualizaciones de tracking
@@ -298,52 +361,51 @@ class Tracker:
         output_video_frames = []
         
         # Procesar cada frame del video
-        for frame_num, frame in enumerate(video_frames):
+        for frame_num, frame in progress.track(enumerate(video_frames), "draw_annotations", len(video_frames)):
             # Crear copia para no modificar el original
-            annotated_frame = frame.copy()
-
-            # Obtener datos de tracking para el frame actual
-            player_dict = tracks["players"][frame_num]
-            referee_dict = tracks["referees"][frame_num] 
-            ball_dict = tracks["ball"][frame_num]
-
-            # Dibujar jugadores con elipses rojas (o color del equipo)
-            for track_id, player in player_dict.items():
-                # Usar color del equipo si está disponible, sino rojo por defecto
-                color = player.get("team_color", (0, 0, 255))
-                annotated_frame = self.draw_ellipse(
-                    annotated_frame, 
-                    player["bbox"], 
-                    color, 
-                    track_id
-                )
-                
-                if player.get('has_ball',False):
-                    frame = self.draw_triangle(frame, player['bbox'],(0,0,255))
-
-            # Dibujar árbitros con elipses amarillas (sin ID)
-            for _, referee in referee_dict.items():
-                annotated_frame = self.draw_ellipse(
-                    annotated_frame, 
-                    referee["bbox"], 
-                    (0, 255, 255)  # Color amarillo
-                )
-
-            # Dibujar pelota con triángulo verde
-            for track_id, ball in ball_dict.items():
-                annotated_frame = self.draw_triangle(
-                    annotated_frame, 
-                    ball["bbox"], 
-                    (0, 255, 0)  # Color verde
-                )
-                
-            
-            # Dibujar Control del balón
-            annotated_frame = self.draw_team_control(annotated_frame, frame_num, team_ball_control)
-            
+            annotated_frame = self.draw_frame_annotations(frame.copy(), frame_num, tracks, team_ball_control, team_colors)
 
             # Añadir frame anotado a la lista de salida
             output_video_frames.append(annotated_frame)
 
         return output_video_frames
-                          
\ No newline at end of file
+
+    def draw_frame_annotations(self, frame, frame_num, tracks, team_ball_control, team_colors=None):
+        """
+        Dibuja las anotaciones de tracking de un frame (in-place).
+        
+        Args:
+            frame: Frame a anotar
+            frame_num (int): Número del frame en el video
+            tracks (dict): Datos de tracking por tipo de objeto y frame
+            team_ball_control (np.ndarray): Equipo con el balón en cada frame
+            team_colors (dict): Color de cada equipo {team_id: color} (opcional)
+            
+        Returns:
+            frame: El mismo frame, anotado
+        """
+        # Obtener datos de tracking para el frame actual
+        player_dict = tracks["players"][frame_num]
+        referee_dict = tracks["referees"][frame_num] 
+        ball_dict = tracks["ball"][frame_num]
+
+        team_colors = team_colors or {}
+        renderer = self.renderer
+
+        # Dibujar jugadores con elipses rojas (o color del equipo), todos a la vez
+        player_ids = list(player_dict)
+        players = list(player_dict.values())
+        player_colors = [team_colors.get(player.get("team"), (0, 0, 255)) for player in players]
+        x_centers, y_bottoms = renderer.draw_ellipses(frame, [player["bbox"] for player in players], player_colors)
+        renderer.draw_labels(frame, x_centers, y_bottoms, player_ids, player_colors)
+
+        # Dibujar árbitros con elipses amarillas (sin ID)
+        referees = list(referee_dict.values())
+        renderer.draw_ellipses(frame, [referee["bbox"] for referee in referees], [(0, 255, 255)] * len(referees))
+
+        # Marcar al jugador con el balón (rojo) y la pelota (verde) con triángulos
+        renderer.draw_triangles(frame, [player["bbox"] for player in players if player.get('has_ball', False)], (0, 0, 255))
+        renderer.draw_triangles(frame, [ball["bbox"] for ball in ball_dict.values()], (0, 255, 0))
+        
+        # Dibujar Control del balón
+        return self.draw_team_control(frame, frame_num, team_ball_control)
@@ -0,0 +1,120 @@
+"""
+Backends de seguimiento intercambiables para Tracker.
+
+Todos exponen la misma interfaz que sv.ByteTrack:
+    update_with_detections(detections: sv.Detections) -> sv.Detections (con tracker_id)
+    reset()
+"""
+
+import numpy as np
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Matriz IoU entre dos conjuntos de bounding boxes [x1, y1, x2, y2].
+
+    Returns:
+        np.ndarray: Matriz (len(boxes_a), len(boxes_b))
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+class IoUTracker:
+    """
+    Tracker ligero que solo asocia por solapamiento (IoU) entre frames consecutivos,
+    sin filtro de Kalman ni segunda asociación de detecciones de baja confianza.
+    """
+
+    def __init__(self, iou_threshold=0.3, lost_track_buffer=30, track_activation_threshold=0.25):
+        """
+        Args:
+            iou_threshold (float): IoU mínimo para asociar una detección a un track
+            lost_track_buffer (int): Frames que un track perdido se mantiene antes de eliminarse
+            track_activation_threshold (float): Confianza mínima para crear un track nuevo
+        """
+        self.iou_threshold = iou_threshold
+        self.lost_track_buffer = lost_track_buffer
+        self.track_activation_threshold = track_activation_threshold
+        self.reset()
+
+    def reset(self):
+        self.track_boxes = np.zeros((0, 4))
+        self.track_ids = np.zeros(0, dtype=int)
+        self.track_ages = np.zeros(0, dtype=int)
+        self.next_id = 1
+
+    def update_with_detections(self, detections):
+        boxes = detections.xyxy.astype(np.float64)
+        assigned = np.full(len(boxes), -1, dtype=int)
+        matched_tracks = np.zeros(len(self.track_ids), dtype=bool)
+
+        if len(boxes) and len(self.track_ids):
+            iou = box_iou(self.track_boxes, boxes)
+            # Asociación voraz de mayor a menor IoU
+            for flat in np.argsort(-iou, axis=None):
+                track_idx, det_idx = np.unravel_index(flat, iou.shape)
+                if iou[track_idx, det_idx] < self.iou_threshold:
+                    break
+                if matched_tracks[track_idx] or assigned[det_idx] != -1:
+                    continue
+                matched_tracks[track_idx] = True
+                assigned[det_idx] = self.track_ids[track_idx]
+                self.track_boxes[track_idx] = boxes[det_idx]
+
+        self.track_ages[matched_tracks] = 0
+        self.track_ages[~matched_tracks] += 1
+
+        # Crear tracks para las detecciones sin asociar con confianza suficiente
+        confidence = detections.confidence if detections.confidence is not None else np.ones(len(boxes))
+        new = (assigned == -1) & (confidence >= self.track_activation_threshold)
+        new_ids = np.arange(self.next_id, self.next_id + np.count_nonzero(new))
+        self.next_id += len(new_ids)
+        assigned[new] = new_ids
+
+        keep = self.track_ages <= self.lost_track_buffer
+        self.track_boxes = np.concatenate([self.track_boxes[keep], boxes[new]])
+        self.track_ids = np.concatenate([self.track_ids[keep], new_ids])
+        self.track_ages = np.concatenate([self.track_ages[keep], np.zeros(len(new_ids), dtype=int)])
+
+        tracked = detections[assigned != -1]
+        tracked.tracker_id = assigned[assigned != -1]
+        return tracked
+
+
+def create_tracker(tracker_type='bytetrack', frame_rate=24, track_activation_threshold=0.25,
+                   lost_track_buffer=30, minimum_matching_threshold=0.8, iou_threshold=0.3):
+    """
+    Crea un backend de seguimiento.
+
+    Args:
+        tracker_type (str): 'bytetrack' o 'iou'
+        frame_rate (int): Frames por segundo del video (ByteTrack escala el buffer con él)
+        track_activation_threshold (float): Confianza mínima para activar un track
+        lost_track_buffer (int): Frames que se conserva un track perdido
+        minimum_matching_threshold (float): Umbral de asociación de ByteTrack
+        iou_threshold (float): IoU mínimo de asociación del tracker IoU
+
+    Returns:
+        Objeto con update_with_detections() y reset()
+    """
+    if tracker_type == 'bytetrack':
+        import supervision as sv
+        return sv.ByteTrack(
+            track_activation_threshold=track_activation_threshold,
+            lost_track_buffer=lost_track_buffer,
+            minimum_matching_threshold=minimum_matching_threshold,
+            frame_rate=frame_rate,
+        )
+    if tracker_type == 'iou':
+        return IoUTracker(
+            iou_threshold=iou_threshold,
+            lost_track_buffer=lost_track_buffer,
+            track_activation_threshold=track_activation_threshold,
+        )
+    raise ValueError(f"Tipo de tracker no soportado: {tracker_type}")
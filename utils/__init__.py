@@ -1,2 +1,8 @@
-from .video_utils import read_video, save_video
-from .bbox_utils import get_center_of_bbox, get_bbox_width, measure_distance, get_foot_position
\ No newline at end of file
+from .video_utils import read_video, save_video, get_video_fps, concat_videos, save_video_resumable
+from .bbox_utils import get_center_of_bbox, get_bbox_width, measure_distance, get_foot_position
+from .frame_ring import FrameRingBuffer
+from .frame_pipeline import read_video_to_ring, run_frame_pipeline
+from .checkpoint import atomic_pickle_dump, load_stub, StageCheckpoint
+from .frame_source import FrameIndex, FrameSource, build_frame_index, load_frame_index
+from .track_storage import PackedTracks, pack_tracks, unpack_tracks
+from .background_io import BackgroundIO
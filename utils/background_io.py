@@ -0,0 +1,215 @@
+"""
+E/S en segundo plano con asyncio.
+
+Las escrituras de stubs, la carga anticipada de stubs, el sondeo del video y
+las exportaciones (paquete de resultados, mapas de calor, resumen de jugadas)
+son llamadas bloqueantes. Con un BackgroundIO activo (set_orchestrator) se
+ejecutan como tareas de un bucle asyncio propio, que las delega a un pool de
+hilos (run_in_executor) mientras el pipeline sigue con las etapas de CPU:
+detección, cámara, anotación y codificación. Sin orquestador activo, submit()
+ejecuta la llamada en el momento, así que el comportamiento no cambia.
+
+El orquestador activo es una ContextVar: cada hilo (p. ej. cada worker del
+servicio de análisis) tiene el suyo, y las tareas se ejecutan en el contexto
+desde el que se programaron.
+
+Las tareas reciben objetos que el pipeline ya no modifica (stubs ya
+empaquetados, tracks terminados). close() espera a las pendientes y
+devuelve cuánto tiempo de E/S quedó solapado con el resto del pipeline.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from functools import partial
+
+_orchestrator = contextvars.ContextVar("background_io", default=None)
+
+
+def set_orchestrator(orchestrator):
+    """
+    Activa (o desactiva con None) la E/S en segundo plano del contexto actual.
+    """
+    _orchestrator.set(orchestrator)
+
+
+def get_orchestrator():
+    return _orchestrator.get()
+
+
+def submit(name, fn, *args, **kwargs):
+    """
+    Ejecuta fn(*args, **kwargs) en segundo plano si hay un orquestador activo
+    y, si no, en el momento.
+
+    Returns:
+        concurrent.futures.Future: Resultado de la llamada
+    """
+    orchestrator = _orchestrator.get()
+    if orchestrator is not None:
+        return orchestrator.submit(name, fn, *args, **kwargs)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except BaseException as error:
+        future.set_exception(error)
+    return future
+
+
+def result(future):
+    """
+    Espera el resultado de una tarea de submit() contando el tiempo bloqueado.
+    """
+    orchestrator = _orchestrator.get()
+    if orchestrator is not None:
+        return orchestrator.result(future)
+    return future.result()
+
+
+def prefetch(name, path, loader):
+    """
+    Lee path con loader(path) en segundo plano para recogerlo después con
+    take_prefetched(). No hace nada sin orquestador activo o si path no existe.
+    """
+    orchestrator = _orchestrator.get()
+    if orchestrator is not None and os.path.exists(path):
+        orchestrator.prefetched[os.path.abspath(path)] = orchestrator.submit(name, loader, path)
+
+
+def take_prefetched(path):
+    """
+    Returns:
+        Future | None: Lectura anticipada de path, que deja de estar disponible
+    """
+    orchestrator = _orchestrator.get()
+    if orchestrator is None:
+        return None
+    return orchestrator.prefetched.pop(os.path.abspath(path), None)
+
+
+class BackgroundIO:
+    """
+    Bucle asyncio en un hilo propio que ejecuta las tareas de E/S en un pool de hilos.
+
+    Uso:
+        io = BackgroundIO()
+        set_orchestrator(io)
+        future = submit("stub:tracks", atomic_pickle_dump, packed, path)
+        ...
+        report = io.close()        # espera a las tareas pendientes
+    """
+
+    def __init__(self, max_workers=4):
+        """
+        Args:
+            max_workers (int): Tareas de E/S simultáneas
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background-io")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="background-io-loop", daemon=True)
+        self.thread.start()
+
+        self.tasks = []
+        self.futures = []
+        self.prefetched = {}
+        self.started = time.perf_counter()
+        self.wait_seconds = 0.0
+        self.closed = False
+
+    async def _run(self, name, call):
+        start = time.perf_counter()
+        task = {'name': name, 'seconds': None, 'error': None}
+        self.tasks.append(task)
+        try:
+            return await self.loop.run_in_executor(self.executor, call)
+        except BaseException as error:
+            task['error'] = repr(error)
+            raise
+        finally:
+            task['seconds'] = time.perf_counter() - start
+
+    def submit(self, name, fn, *args, **kwargs):
+        """
+        Programa una tarea de E/S.
+
+        Returns:
+            concurrent.futures.Future: Resultado de la tarea
+        """
+        # La tarea ve el mismo contexto (informe de progreso, orquestador) que quien la programa
+        call = partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        future = asyncio.run_coroutine_threadsafe(self._run(name, call), self.loop)
+        self.futures.append(future)
+        return future
+
+    def result(self, future):
+        """
+        Espera el resultado de una tarea contando el tiempo bloqueado.
+        """
+        start = time.perf_counter()
+        try:
+            return future.result()
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def wait(self):
+        """
+        Espera a todas las tareas programadas.
+
+        Raises:
+            Exception: La primera excepción de las tareas que fallaron
+        """
+        start = time.perf_counter()
+        try:
+            wait_futures(self.futures)
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+        errors = [future.exception() for future in self.futures if future.exception() is not None]
+        if errors:
+            raise errors[0]
+
+    def report(self):
+        """
+        Returns:
+            dict: 'tasks' [{name, seconds, error}], 'io_seconds' tiempo total de las
+                  tareas, 'wait_seconds' tiempo que el pipeline esperó por ellas y
+                  'saved_seconds' tiempo de E/S solapado con el resto del pipeline
+        """
+        io_seconds = sum(task['seconds'] or 0.0 for task in self.tasks)
+        return {
+            'tasks': [dict(task) for task in self.tasks],
+            'io_seconds': round(io_seconds, 3),
+            'wait_seconds': round(self.wait_seconds, 3),
+            'saved_seconds': round(max(io_seconds - self.wait_seconds, 0.0), 3),
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+        }
+
+    def close(self, raise_errors=True):
+        """
+        Espera a las tareas pendientes y detiene el bucle y el pool. Llamarlo de
+        nuevo solo devuelve el informe.
+
+        Args:
+            raise_errors (bool): Si relanzar el error de una tarea fallida
+
+        Returns:
+            dict: Informe de tiempos (ver report)
+        """
+        if self.closed:
+            return self.report()
+        self.closed = True
+        try:
+            self.wait()
+        except Exception:
+            if raise_errors:
+                raise
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.executor.shutdown(wait=True)
+        return self.report()
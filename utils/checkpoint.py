@@ -0,0 +1,132 @@
+"""
+Escritura atómica de stubs y checkpoints incrementales por etapa.
+
+Un checkpoint guarda en cada chunk solo los resultados de los frames nuevos
+(archivos chunk_*.pkl que no se reescriben) y un estado pequeño con lo
+necesario para continuar (estado.pkl). El coste total es lineal en la
+duración del video aunque se guarde a menudo. El estado guarda también una
+firma (video y opciones de la etapa): un checkpoint de otra ejecución se descarta.
+"""
+
+import os
+import pickle
+import shutil
+import sys
+
+from . import background_io
+
+
+def atomic_pickle_dump(obj, path):
+    """
+    Guarda obj en path sin dejar nunca un archivo a medio escribir: se escribe
+    en un temporal del mismo directorio y se renombra al terminar.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def file_signature(path):
+    """
+    Firma barata de un archivo: tamaño y fecha de modificación.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_stub(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_stub(path):
+    """
+    Carga un stub guardado con atomic_pickle_dump. Si main lo leyó por
+    adelantado (background_io.prefetch) se usa esa lectura.
+    """
+    future = background_io.take_prefetched(path)
+    if future is not None:
+        return background_io.result(future)
+    return read_stub(path)
+
+
+class StageCheckpoint:
+    """
+    Checkpoint de una etapa que avanza por frames.
+
+    Uso:
+        checkpoint = StageCheckpoint(stub_dir, 'tracks', signature)
+        saved = checkpoint.load()          # None o (chunks, estado)
+        ...
+        checkpoint.save(next_frame, chunk, state)
+        ...
+        checkpoint.clear()                 # al terminar la etapa y guardar su stub
+    """
+
+    def __init__(self, stub_dir, name, signature=None):
+        """
+        Args:
+            stub_dir (str): Directorio de stubs
+            name (str): Nombre de la etapa
+            signature: Identifica la ejecución (video y opciones que cambian el resultado);
+                       load() descarta un checkpoint guardado con otra firma
+        """
+        self.directory = os.path.join(stub_dir, f"{name}_checkpoint")
+        self.state_path = os.path.join(self.directory, "state.pkl")
+        self.signature = signature
+
+    def save(self, next_frame, chunk, state):
+        """
+        Guarda los resultados de un chunk y el estado para continuar en next_frame.
+
+        El chunk se escribe antes que el estado: si el proceso muere entre
+        ambos, el estado anterior sigue siendo coherente y el chunk huérfano se ignora.
+
+        Args:
+            next_frame (int): Primer frame aún no procesado
+            chunk: Resultados de los frames procesados desde el último checkpoint
+            state: Estado necesario para reanudar (trackers, features, etc.)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        chunks = self._load_state()['chunks'] if os.path.exists(self.state_path) else []
+        chunk_name = f"chunk_{next_frame:08d}.pkl"
+        atomic_pickle_dump(chunk, os.path.join(self.directory, chunk_name))
+        atomic_pickle_dump(
+            {'next_frame': next_frame, 'chunks': chunks + [chunk_name], 'state': state, 'signature': self.signature},
+            self.state_path
+        )
+
+    def load(self):
+        """
+        Returns:
+            tuple: (lista de chunks en orden, estado guardado con 'next_frame') o None si no hay
+                   checkpoint o es de otra ejecución (en ese caso se borra)
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        saved = self._load_state()
+        if saved.get('signature') != self.signature:
+            # Se avisa antes de borrar: el progreso guardado se pierde
+            old_signature = saved.get('signature') or {}
+            new_signature = self.signature or {}
+            changed = sorted(key for key in set(old_signature) | set(new_signature)
+                             if old_signature.get(key) != new_signature.get(key))
+            print(f"Descartando el checkpoint {self.directory} (cambió: {', '.join(map(str, changed))})",
+                  file=sys.stderr)
+            self.clear()
+            return None
+        chunks = []
+        for chunk_name in saved['chunks']:
+            with open(os.path.join(self.directory, chunk_name), 'rb') as f:
+                chunks.append(pickle.load(f))
+        return chunks, dict(saved['state'], next_frame=saved['next_frame'])
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _load_state(self):
+        with open(self.state_path, 'rb') as f:
+            return pickle.load(f)
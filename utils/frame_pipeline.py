@@ -0,0 +1,153 @@
+"""
+Pipeline multiproceso decodificación -> procesamiento -> codificación.
+
+Un proceso decodifica el video en los slots de un FrameRingBuffer, varios
+workers procesan cada frame en su slot (sin copiarlo) y el proceso principal
+escribe los frames en orden en el video de salida. Entre procesos solo viajan
+(número de frame, slot).
+"""
+
+import multiprocessing as mp
+import traceback
+
+import cv2
+import numpy as np
+
+from . import progress
+from .frame_ring import FrameRingBuffer
+
+
+def read_video_to_ring(video_path, ring, frame_queue, num_consumers=1):
+    """
+    Decodifica un video en el buffer compartido (sustituto de read_video para el pipeline).
+
+    Por cada frame publica (número de frame, slot) en frame_queue y al terminar
+    un None por consumidor. Se bloquea mientras no haya slots libres.
+
+    Args:
+        video_path (str): Ruta del video
+        ring (FrameRingBuffer): Buffer donde se escriben los frames
+        frame_queue: Cola hacia los consumidores
+        num_consumers (int): Número de consumidores que esperan el fin de video
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    frame_num = 0
+    while True:
+        slot = ring.acquire()
+        # Decodificar directamente sobre el slot (OpenCV reasigna si la forma no coincide)
+        view = ring.view(slot)
+        frame_exists, frame = video_capture.read(view)
+        if not frame_exists:
+            del view, frame
+            ring.release(slot)
+            break
+        if not np.shares_memory(frame, view):
+            view[...] = frame
+        del view, frame
+        frame_queue.put((frame_num, slot))
+        frame_num += 1
+    video_capture.release()
+
+    for _ in range(num_consumers):
+        frame_queue.put(None)
+
+
+def _decode_worker(video_path, ring, frame_queue, num_consumers, done_queue):
+    try:
+        read_video_to_ring(video_path, ring, frame_queue, num_consumers)
+    except Exception:
+        done_queue.put(('error', traceback.format_exc()))
+    finally:
+        ring.close()
+
+
+def _frame_worker(ring, process_frame, frame_queue, done_queue):
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            frame_num, slot = item
+            frame = ring.view(slot)
+            process_frame(frame, frame_num)
+            del frame
+            done_queue.put(item)
+    except Exception:
+        done_queue.put(('error', traceback.format_exc()))
+    finally:
+        done_queue.put(None)
+        ring.close()
+
+
+def run_frame_pipeline(video_path, output_path, process_frame, num_workers=2, num_slots=None, fps=24):
+    """
+    Procesa cada frame de un video en paralelo y guarda el resultado en orden.
+
+    Args:
+        video_path (str): Video de entrada
+        output_path (str): Video de salida (códec XVID, como save_video)
+        process_frame (callable): process_frame(frame, frame_num) modifica el frame in-place
+        num_workers (int): Procesos de procesamiento
+        num_slots (int): Frames en vuelo como máximo (por defecto 4 por worker)
+        fps (float): Frames por segundo del video de salida
+
+    Returns:
+        int: Número de frames escritos
+
+    Raises:
+        RuntimeError: Si falla la decodificación o algún worker
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    frame_shape = (int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                   int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+    video_capture.release()
+
+    # fork evita serializar process_frame (y los tracks que contiene) a cada worker
+    context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else 'spawn')
+    ring = FrameRingBuffer(num_slots or 4 * num_workers, frame_shape, context=context)
+    frame_queue, done_queue = context.Queue(), context.Queue()
+
+    processes = [context.Process(target=_decode_worker,
+                                 args=(video_path, ring, frame_queue, num_workers, done_queue))]
+    processes += [context.Process(target=_frame_worker, args=(ring, process_frame, frame_queue, done_queue))
+                  for _ in range(num_workers)]
+    for process in processes:
+        process.start()
+
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    out = cv2.VideoWriter(output_path, fourcc, fps, (frame_shape[1], frame_shape[0]))
+
+    # Los workers terminan en cualquier orden: guardar los adelantados hasta que toque
+    pending = {}
+    next_frame = 0
+    finished_workers = 0
+    progress.start_stage("annotate_and_save", frame_count)
+    try:
+        while finished_workers < num_workers:
+            item = done_queue.get()
+            if item is None:
+                finished_workers += 1
+                continue
+            if item[0] == 'error':
+                raise RuntimeError(f"Fallo en el pipeline de frames:\n{item[1]}")
+
+            frame_num, slot = item
+            pending[frame_num] = slot
+            while next_frame in pending:
+                slot = pending.pop(next_frame)
+                out.write(ring.view(slot))
+                ring.release(slot)
+                next_frame += 1
+                progress.advance()
+        progress.finish_stage()
+    finally:
+        out.release()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        ring.close()
+        ring.unlink()
+
+    return next_frame
@@ -0,0 +1,125 @@
+"""
+Buffer circular de frames en memoria compartida.
+
+Los procesos del pipeline se pasan índices de slot (un entero) en lugar de
+frames completos: cada slot es una región preasignada de un bloque de
+memoria compartida y los consumidores leen y escriben el frame sin copiarlo.
+Los slots se reutilizan por conteo de referencias y, cuando no queda ninguno
+libre, el productor se bloquea (contrapresión).
+"""
+
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Conjunto fijo de slots de frame en memoria compartida.
+
+    Ciclo de vida de un slot:
+        slot = ring.acquire()          # referencia = 1 (bloquea si no hay slots libres)
+        ring.write(slot, frame)
+        ring.retain(slot)              # opcional, si varios consumidores lo leen
+        ring.view(slot)                # array numpy sobre la memoria compartida
+        ring.release(slot)             # al llegar a 0 vuelve a estar libre
+
+    El objeto se puede pasar como argumento a procesos hijos; cada proceso se
+    vuelve a conectar al mismo bloque de memoria por su nombre.
+    """
+
+    def __init__(self, num_slots, frame_shape, dtype=np.uint8, context=None):
+        """
+        Args:
+            num_slots (int): Número de frames que caben en el buffer
+            frame_shape (tuple): Forma de cada frame, p. ej. (alto, ancho, 3)
+            dtype: Tipo de dato de los píxeles
+            context: Contexto de multiprocessing (por defecto, el del sistema)
+        """
+        context = context or mp.get_context()
+        self.num_slots = num_slots
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_nbytes * num_slots)
+        self.refcounts = context.Array('i', num_slots)
+        self.free_slots = context.Queue()
+        for slot in range(num_slots):
+            self.free_slots.put(slot)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['shm'] = self.shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state['shm'])
+
+    def acquire(self, timeout=None):
+        """
+        Reserva un slot libre con una referencia.
+
+        Args:
+            timeout (float): Segundos máximos de espera (None = esperar indefinidamente)
+
+        Returns:
+            int: Índice del slot
+
+        Raises:
+            TimeoutError: Si no se liberó ningún slot a tiempo
+        """
+        try:
+            slot = self.free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Sin slots libres en el buffer tras {timeout} s")
+        with self.refcounts.get_lock():
+            self.refcounts[slot] = 1
+        return slot
+
+    def retain(self, slot, count=1):
+        """
+        Añade referencias a un slot ocupado (un consumidor más por referencia).
+        """
+        with self.refcounts.get_lock():
+            if self.refcounts[slot] <= 0:
+                raise ValueError(f"El slot {slot} no está ocupado")
+            self.refcounts[slot] += count
+
+    def release(self, slot):
+        """
+        Quita una referencia; el slot vuelve a la lista de libres al llegar a 0.
+        """
+        with self.refcounts.get_lock():
+            if self.refcounts[slot] <= 0:
+                raise ValueError(f"El slot {slot} ya estaba libre")
+            self.refcounts[slot] -= 1
+            freed = self.refcounts[slot] == 0
+        if freed:
+            self.free_slots.put(slot)
+
+    def view(self, slot):
+        """
+        Returns:
+            np.ndarray: Frame del slot sobre la memoria compartida (sin copia)
+        """
+        return np.ndarray(self.frame_shape, dtype=self.dtype, buffer=self.shm.buf,
+                          offset=slot * self.frame_nbytes)
+
+    def write(self, slot, frame):
+        self.view(slot)[...] = frame
+
+    def close(self):
+        """
+        Desconecta este proceso del bloque de memoria.
+        """
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Libera el bloque de memoria (solo el proceso que creó el buffer, al terminar).
+        """
+        self.shm.unlink()
@@ -0,0 +1,319 @@
+"""
+Índice de búsqueda del video y acceso aleatorio a rangos de frames.
+
+read_video decodifica siempre desde el frame 0. El índice se construye una
+sola vez por video (y se guarda junto a los stubs) con la marca de tiempo de
+cada frame y los puntos desde los que el decodificador puede empezar a leer
+obteniendo exactamente los mismos frames que una lectura secuencial (frames
+clave comprobados). FrameSource lo usa para decodificar solo desde el punto
+anterior al rango pedido: volver a dibujar una ventana, cortar jugadas o
+repartir un partido entre procesos sin pasar por todo el video.
+"""
+
+import bisect
+import hashlib
+import os
+
+import cv2
+
+from . import background_io
+from .checkpoint import atomic_pickle_dump, file_signature
+
+
+def _frame_digest(frame):
+    return hashlib.blake2b(frame.tobytes(), digest_size=16).hexdigest()
+
+
+def _keyframe_candidates(video_path):
+    """
+    Frames clave según el contenedor, leyendo solo los paquetes (sin decodificar).
+
+    Returns:
+        list: Números de frame (en orden de presentación) o None si PyAV no está
+              disponible o el contenedor no tiene marcas de tiempo
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        packets = [(packet.pts, packet.is_keyframe) for packet in container.demux(stream) if packet.size]
+    if not packets or any(pts is None for pts, _ in packets):
+        return None
+
+    # El orden de presentación es el de las marcas de tiempo (no el de los paquetes si hay frames B)
+    order = {pts: frame_num for frame_num, pts in enumerate(sorted(pts for pts, _ in packets))}
+    return sorted(order[pts] for pts, is_keyframe in packets if is_keyframe)
+
+
+class FrameIndex:
+    """
+    Índice de un video: número de frames, marcas de tiempo y puntos de búsqueda.
+    """
+
+    def __init__(self, video_path, signature, fps, frame_shape, timestamps, seek_points, method):
+        """
+        Args:
+            video_path (str): Video indexado
+            signature (list): Tamaño y fecha de modificación del video al indexarlo
+            fps (float): Frames por segundo
+            frame_shape (tuple): Forma de cada frame (alto, ancho, 3)
+            timestamps (list): Marca de tiempo de cada frame en milisegundos
+            seek_points (list): Frames (ordenados) desde los que la búsqueda es exacta; siempre incluye 0
+            method (str): Origen de los candidatos ('keyframes' del contenedor o 'stride')
+        """
+        self.video_path = video_path
+        self.signature = signature
+        self.fps = fps
+        self.frame_shape = frame_shape
+        self.timestamps = timestamps
+        self.seek_points = seek_points
+        self.method = method
+
+    @property
+    def frame_count(self):
+        return len(self.timestamps)
+
+    def matches(self, video_path):
+        """
+        Returns:
+            bool: True si el video no cambió desde que se construyó el índice
+        """
+        return os.path.exists(video_path) and file_signature(video_path) == self.signature
+
+    def seek_point(self, frame_num):
+        """
+        Returns:
+            int: Último punto de búsqueda igual o anterior a frame_num
+        """
+        return self.seek_points[bisect.bisect_right(self.seek_points, frame_num) - 1]
+
+    def frame_at(self, milliseconds):
+        """
+        Returns:
+            int: Frame que se muestra en el instante dado
+        """
+        return max(bisect.bisect_right(self.timestamps, milliseconds) - 1, 0)
+
+    def shard_ranges(self, num_shards):
+        """
+        Reparte el video en rangos contiguos que empiezan en puntos de búsqueda,
+        para que cada proceso decodifique solo su parte.
+
+        Args:
+            num_shards (int): Número de partes deseado (puede haber menos si hay pocos puntos)
+
+        Returns:
+            list: Rangos (inicio, fin) con fin exclusivo, que cubren todo el video
+        """
+        bounds = {0}
+        for shard in range(1, num_shards):
+            bounds.add(self.seek_point(shard * self.frame_count // num_shards))
+        bounds = sorted(bounds) + [self.frame_count]
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def build_frame_index(video_path, seek_stride=250):
+    """
+    Construye el índice con una pasada de decodificación.
+
+    Los candidatos a punto de búsqueda son los frames clave del contenedor (si
+    PyAV está instalado) o uno cada seek_stride frames. Cada candidato se
+    comprueba buscándolo con OpenCV y comparando el frame obtenido con el de la
+    lectura secuencial; solo se conservan los que coinciden.
+
+    Args:
+        video_path (str): Ruta del video
+        seek_stride (int): Separación de los candidatos si no hay frames clave
+
+    Returns:
+        FrameIndex: Índice del video
+    """
+    keyframes = _keyframe_candidates(video_path)
+    method = 'stride' if keyframes is None else 'keyframes'
+    candidates = set(keyframes) if keyframes is not None else None
+
+    video_capture = cv2.VideoCapture(video_path)
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 24
+    timestamps = []
+    digests = {}
+    frame_shape = None
+    frame_num = 0
+    # grab() decodifica sin convertir el frame; solo se recuperan los candidatos
+    while video_capture.grab():
+        timestamps.append(video_capture.get(cv2.CAP_PROP_POS_MSEC))
+        is_candidate = frame_num in candidates if candidates is not None else frame_num % seek_stride == 0
+        if is_candidate or frame_shape is None:
+            _, frame = video_capture.retrieve()
+            frame_shape = frame.shape
+            if is_candidate and frame_num > 0:
+                digests[frame_num] = _frame_digest(frame)
+        frame_num += 1
+
+    seek_points = [0]
+    for candidate in sorted(digests):
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, candidate)
+        frame_exists, frame = video_capture.read()
+        if frame_exists and _frame_digest(frame) == digests[candidate]:
+            seek_points.append(candidate)
+    video_capture.release()
+
+    return FrameIndex(video_path, file_signature(video_path), fps, frame_shape,
+                      timestamps, seek_points, method)
+
+
+def load_frame_index(video_path, stub_dir=None, seek_stride=250):
+    """
+    Devuelve el índice guardado del video o lo construye y lo guarda.
+
+    Args:
+        video_path (str): Ruta del video
+        stub_dir (str): Directorio de stubs donde se guarda el índice (None = no guardar)
+        seek_stride (int): Separación de los candidatos si no hay frames clave
+
+    Returns:
+        FrameIndex: Índice del video
+    """
+    import pickle
+
+    stub_path = None
+    if stub_dir is not None:
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        stub_path = os.path.join(stub_dir, f"frame_index_{name}.pkl")
+        if os.path.exists(stub_path):
+            with open(stub_path, 'rb') as f:
+                index = pickle.load(f)
+            if index.matches(video_path):
+                return index
+
+    index = build_frame_index(video_path, seek_stride)
+    if stub_path is not None:
+        os.makedirs(stub_dir, exist_ok=True)
+        background_io.submit("stub:frame_index", atomic_pickle_dump, index, stub_path)
+    return index
+
+
+class FrameSource:
+    """
+    Acceso aleatorio a los frames de un video a partir de su índice.
+
+    Uso:
+        with FrameSource("videos/partido.mp4", stub_dir="stubs") as source:
+            for frame_num, frame in source.read_range(1200, 1500):
+                ...
+            frame = source[4000]
+            frames = source[100:200]
+    """
+
+    def __init__(self, video_path, index=None, stub_dir=None):
+        """
+        Args:
+            video_path (str): Ruta del video
+            index (FrameIndex): Índice ya cargado (por defecto se carga o construye con load_frame_index)
+            stub_dir (str): Directorio de stubs donde se guarda el índice
+        """
+        self.video_path = video_path
+        self.index = index if index is not None else load_frame_index(video_path, stub_dir)
+        self.video_capture = None
+        self.position = 0
+
+    def __len__(self):
+        return self.index.frame_count
+
+    @property
+    def fps(self):
+        return self.index.fps
+
+    @property
+    def frame_shape(self):
+        return self.index.frame_shape
+
+    def __getstate__(self):
+        # Cada proceso abre su propio decodificador
+        state = self.__dict__.copy()
+        state['video_capture'] = None
+        state['position'] = 0
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.video_capture is not None:
+            self.video_capture.release()
+            self.video_capture = None
+
+    def _seek(self, frame_num):
+        """
+        Deja el decodificador listo para leer frame_num.
+
+        Si el frame está por delante de la posición actual y no hay un punto de
+        búsqueda más cercano, se sigue decodificando sin buscar.
+        """
+        if self.video_capture is None:
+            self.video_capture = cv2.VideoCapture(self.video_path)
+            self.position = 0
+
+        seek_point = self.index.seek_point(frame_num)
+        if not seek_point <= self.position <= frame_num:
+            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, seek_point)
+            self.position = seek_point
+        while self.position < frame_num:
+            if not self.video_capture.grab():
+                raise IndexError(f"El video terminó en el frame {self.position}")
+            self.position += 1
+
+    def read_range(self, start, end=None):
+        """
+        Decodifica los frames [start, end) del video.
+
+        Args:
+            start (int): Primer frame
+            end (int): Frame siguiente al último (por defecto, hasta el final)
+
+        Yields:
+            tuple: (número de frame, frame BGR)
+        """
+        end = len(self) if end is None else min(end, len(self))
+        if start >= end:
+            return
+        self._seek(start)
+        for frame_num in range(start, end):
+            frame_exists, frame = self.video_capture.read()
+            if not frame_exists:
+                break
+            self.position += 1
+            yield frame_num, frame
+
+    def get_frame(self, frame_num):
+        """
+        Returns:
+            np.ndarray: Frame BGR frame_num
+
+        Raises:
+            IndexError: Si el frame no existe
+        """
+        if not 0 <= frame_num < len(self):
+            raise IndexError(f"Frame {frame_num} fuera del video ({len(self)} frames)")
+        for _, frame in self.read_range(frame_num, frame_num + 1):
+            return frame
+        raise IndexError(f"No se pudo decodificar el frame {frame_num}")
+
+    def __iter__(self):
+        for _, frame in self.read_range(0):
+            yield frame
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, end, step = key.indices(len(self))
+            if step != 1:
+                return [frame for frame_num, frame in self.read_range(start, end) if (frame_num - start) % step == 0]
+            return [frame for _, frame in self.read_range(start, end)]
+        if key < 0:
+            key += len(self)
+        return self.get_frame(key)
@@ -0,0 +1,203 @@
+"""
+Progreso por etapas con fps, ETA y memoria.
+
+Los bucles largos del pipeline informan con track() o advance(); si no hay un
+ProgressReporter activo (set_reporter), track() devuelve el iterable tal cual
+y advance() no hace nada, así que el coste sin informe es nulo. Con informe
+activo, cada paso solo suma un contador y compara un reloj: la salida a
+terminal y al archivo de estado se genera como mucho una vez por intervalo.
+
+El informe activo es una ContextVar: cada hilo (p. ej. cada worker del servicio
+de análisis) tiene el suyo y los análisis simultáneos no se mezclan.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import time
+from collections import deque
+
+_reporter = contextvars.ContextVar("progress_reporter", default=None)
+
+
+def set_reporter(reporter):
+    """
+    Activa (o desactiva con None) el informe de progreso del contexto actual.
+    """
+    _reporter.set(reporter)
+
+
+def get_reporter():
+    return _reporter.get()
+
+
+def start_stage(stage, total=None):
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.start_stage(stage, total)
+
+
+def advance(count=1):
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.advance(count)
+
+
+def finish_stage():
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.finish_stage()
+
+
+def track(iterable, stage, total=None):
+    """
+    Recorre iterable informando de cada elemento como un paso de la etapa.
+
+    Args:
+        iterable: Elementos a recorrer
+        stage (str): Nombre de la etapa
+        total (int): Número de elementos (por defecto len(iterable) si existe)
+    """
+    reporter = _reporter.get()
+    if reporter is None:
+        return iterable
+    if total is None and hasattr(iterable, '__len__'):
+        total = len(iterable)
+    return reporter.track(iterable, stage, total)
+
+
+def _memory_mb():
+    """
+    Returns:
+        tuple: (memoria residente actual, pico de memoria residente) en MB
+    """
+    current = None
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa en KB, macOS en bytes
+        peak = peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+    except ImportError:
+        peak = None
+    return current, peak
+
+
+class ProgressReporter:
+    """
+    Contadores por etapa con fps móvil, ETA y memoria.
+
+    El informe se escribe en una línea de terminal y/o en un archivo JSON de
+    estado (reemplazado de forma atómica) para que un orquestador lo lea.
+    El historial para el fps móvil tiene tamaño fijo.
+    """
+
+    def __init__(self, stream=sys.stderr, status_path=None, interval=2.0, window=10):
+        """
+        Args:
+            stream: Salida de texto para la línea de progreso (None = sin terminal)
+            status_path (str): Archivo JSON de estado (opcional)
+            interval (float): Segundos mínimos entre informes
+            window (int): Número de informes usados para el fps móvil
+        """
+        self.stream = stream
+        self.status_path = status_path
+        self.interval = interval
+        self.started = time.monotonic()
+        self.stages = {}
+        self.stage = None
+        self.samples = deque(maxlen=window)
+        self.next_report = 0.0
+
+    def start_stage(self, stage, total=None):
+        """
+        Empieza una etapa (o la retoma si ya existía); la etapa anterior se da por terminada.
+        """
+        if self.stage is not None and self.stage != stage:
+            self.finish_stage()
+        info = self.stages.setdefault(stage, {'done': 0, 'total': None, 'seconds': 0.0})
+        if total is not None:
+            info['total'] = total
+        if self.stage != stage:
+            self.stage = stage
+            self.stage_started = time.monotonic()
+            self.samples.clear()
+            self.samples.append((self.stage_started, info['done']))
+
+    def advance(self, count=1):
+        if self.stage is None:
+            return
+        info = self.stages[self.stage]
+        info['done'] += count
+        now = time.monotonic()
+        if now >= self.next_report:
+            self.next_report = now + self.interval
+            self.samples.append((now, info['done']))
+            self._report()
+
+    def track(self, iterable, stage, total=None):
+        self.start_stage(stage, total)
+        for item in iterable:
+            yield item
+            self.advance()
+        self.finish_stage()
+
+    def finish_stage(self):
+        if self.stage is None:
+            return
+        info = self.stages[self.stage]
+        info['seconds'] += time.monotonic() - self.stage_started
+        self._report()
+        self.stage = None
+
+    def close(self):
+        """
+        Termina la etapa en curso y escribe el estado final.
+        """
+        self.finish_stage()
+        self._report()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Estado actual (etapa, frames, fps, ETA, memoria y resumen por etapa)
+        """
+        rss, peak = _memory_mb()
+        status = {
+            'elapsed': round(time.monotonic() - self.started, 1),
+            'stage': self.stage,
+            'rss_mb': round(rss, 1) if rss is not None else None,
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'stages': {name: dict(info, seconds=round(info['seconds'], 2)) for name, info in self.stages.items()},
+        }
+        if self.stage is not None:
+            info = self.stages[self.stage]
+            (t0, n0), (t1, n1) = self.samples[0], (time.monotonic(), info['done'])
+            fps = (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+            remaining = info['total'] - info['done'] if info['total'] is not None else None
+            status.update({
+                'done': info['done'],
+                'total': info['total'],
+                'fps': round(fps, 2),
+                'eta': round(remaining / fps, 1) if remaining is not None and fps > 0 else None,
+            })
+        return status
+
+    def _report(self):
+        status = self.snapshot()
+        if self.stream is not None and status['stage'] is not None:
+            total = f"/{status['total']}" if status['total'] is not None else ""
+            eta = f" ETA {status['eta']:.0f}s" if status['eta'] is not None else ""
+            memory = f" RSS {status['rss_mb']:.0f}MB" if status['rss_mb'] is not None else ""
+            self.stream.write(f"[{status['stage']}] {status['done']}{total} {status['fps']:.1f} fps{eta}{memory}\n")
+            self.stream.flush()
+        if self.status_path is not None:
+            tmp_path = f"{self.status_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(status, f)
+            os.replace(tmp_path, self.status_path)
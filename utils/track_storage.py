@@ -0,0 +1,373 @@
+"""
+Almacenamiento compacto de tracks para stubs y exportaciones.
+
+Los tracks en memoria son dicts por frame con listas y tuplas de floats de
+Python (más de 1 KB por detección). PackedTracks los guarda por columnas:
+un array por campo con solo las filas que lo tienen, ids en int32, equipos y
+banderas en uint8/bool y los colores de equipo como índices a una paleta
+común. Con precision='quantized' las coordenadas se guardan en enteros a
+escala fija (bbox a 1/4 px en int16, posición en el campo en cm, ...) y con
+delta=True cada valor se guarda como diferencia respecto a la detección
+anterior del mismo track, que se comprime mucho mejor. Los arrays se
+comprimen con zlib al serializar.
+
+Los campos desconocidos se conservan tal cual (sin comprimir), así que
+unpack() devuelve siempre los mismos tracks salvo el redondeo de la precisión
+elegida.
+"""
+
+import zlib
+
+import numpy as np
+
+# Campos de coordenadas: (dtype cuantizado, valores por unidad)
+QUANTIZED_FIELDS = {
+    'bbox': (np.int16, 4),                  # 1/4 de píxel
+    'position': (np.int16, 4),
+    'position_adjusted': (np.int16, 4),
+    'position_transformed': (np.int16, 100),  # centímetros
+    'speed': (np.uint16, 100),              # 0.01 km/h
+    'distance': (np.int32, 100),            # centímetros
+}
+# Campos categóricos: dtype entero
+CATEGORICAL_FIELDS = {'team': np.uint8, 'has_ball': np.bool_, 'confidence': np.uint8}
+PALETTE_FIELDS = ('team_color',)
+
+PRECISIONS = ('float32', 'quantized')
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def _delta_order(track_ids):
+    # Filas agrupadas por track manteniendo el orden de los frames
+    order = np.lexsort((np.arange(len(track_ids)), track_ids))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = track_ids[order][1:] != track_ids[order][:-1]
+    return order, first
+
+
+def delta_encode(values, track_ids):
+    """
+    Sustituye cada valor por su diferencia con la fila anterior del mismo track
+    (la primera fila de cada track queda igual). La aritmética es modular, así
+    que no hay desbordamiento al decodificar.
+    """
+    order, first = _delta_order(track_ids)
+    ordered = values[order]
+    deltas = ordered.copy()
+    deltas[1:] = ordered[1:] - ordered[:-1]
+    deltas[first] = ordered[first]
+    encoded = np.empty_like(values)
+    encoded[order] = deltas
+    return encoded
+
+
+def delta_decode(encoded, track_ids):
+    """
+    Inversa de delta_encode.
+    """
+    order, first = _delta_order(track_ids)
+    ordered = encoded[order]
+    # Suma acumulada por track: a cada fila se le resta la suma acumulada antes de su track
+    cumulative = np.cumsum(ordered, axis=0, dtype=ordered.dtype)
+    starts = np.flatnonzero(first)
+    offsets = np.zeros((len(starts),) + ordered.shape[1:], dtype=ordered.dtype)
+    offsets[1:] = cumulative[starts[1:] - 1]
+    decoded = np.empty_like(encoded)
+    decoded[order] = cumulative - offsets[np.cumsum(first) - 1]
+    return decoded
+
+
+class PackedTracks:
+    """
+    Tracks guardados por columnas.
+
+    Uso:
+        packed = PackedTracks.pack(tracks, precision='quantized', delta=True)
+        atomic_pickle_dump(packed, "stubs/track_stubs.pkl")
+        ...
+        tracks = packed.unpack()
+    """
+
+    def __init__(self, objects, precision='float32', delta=False):
+        """
+        Args:
+            objects (dict): Columnas por objeto (ver pack)
+            precision (str): 'float32' o 'quantized'
+            delta (bool): Si las coordenadas cuantizadas están codificadas como diferencias
+        """
+        self.objects = objects
+        self.precision = precision
+        self.delta = delta
+
+    @classmethod
+    def pack(cls, tracks, precision='float32', delta=False):
+        """
+        Convierte los tracks a columnas.
+
+        Args:
+            tracks (dict): {objeto: [ {track_id: info}, ... ]}
+            precision (str): 'float32' (error relativo ~1e-7) o 'quantized' (escala fija, ver QUANTIZED_FIELDS)
+            delta (bool): Codificar las coordenadas cuantizadas como diferencias entre frames
+
+        Returns:
+            PackedTracks: Tracks empaquetados
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisión no soportada: {precision} (opciones: {', '.join(PRECISIONS)})")
+        delta = delta and precision == 'quantized'
+        return cls({name: cls._pack_object(object_tracks, precision, delta)
+                    for name, object_tracks in tracks.items()}, precision, delta)
+
+    @staticmethod
+    def _pack_object(object_tracks, precision, delta):
+        counts = np.fromiter((len(frame) for frame in object_tracks), dtype=np.int64, count=len(object_tracks))
+        rows = [(track_id, info) for frame in object_tracks for track_id, info in frame.items()]
+        track_ids = np.fromiter((track_id for track_id, _ in rows), dtype=np.int64, count=len(rows))
+
+        keys = {}
+        for _, info in rows:
+            for key in info:
+                keys.setdefault(key, None)
+
+        fields, extras = {}, []
+        for key in keys:
+            values = [info.get(key, _MISSING) for _, info in rows]
+            packed = _pack_field(key, values, track_ids, precision, delta)
+            if packed is None:
+                extras += [(row, key, value) for row, value in enumerate(values) if value is not _MISSING]
+            else:
+                fields[key] = packed
+
+        return {
+            'num_frames': len(object_tracks),
+            'counts': counts.astype(np.uint16 if counts.max(initial=0) < 2 ** 16 else np.uint32),
+            'track_id': track_ids.astype(np.int32),
+            'fields': fields,
+            'extras': extras,
+        }
+
+    def unpack(self):
+        """
+        Returns:
+            dict: Tracks con el formato original ({objeto: [ {track_id: info}, ... ]})
+        """
+        tracks = {}
+        for name, data in self.objects.items():
+            track_ids = data['track_id'].astype(np.int64)
+            num_rows = len(track_ids)
+            infos = [{} for _ in range(num_rows)]
+
+            for key, packed in data['fields'].items():
+                for row, value in _unpack_field(packed, track_ids, num_rows):
+                    infos[row][key] = value
+            for row, key, value in data['extras']:
+                infos[row][key] = value
+
+            object_tracks = []
+            row = 0
+            ids = track_ids.tolist()
+            for count in data['counts'].tolist():
+                object_tracks.append(dict(zip(ids[row:row + count], infos[row:row + count])))
+                row += count
+            tracks[name] = object_tracks
+        return tracks
+
+    @property
+    def nbytes(self):
+        """
+        Bytes de los arrays sin comprimir (sin contar los campos desconocidos).
+        """
+        total = 0
+        for data in self.objects.values():
+            total += data['counts'].nbytes + data['track_id'].nbytes
+            for packed in data['fields'].values():
+                total += sum(value.nbytes for value in packed.values() if isinstance(value, np.ndarray))
+        return total
+
+    def __getstate__(self):
+        # Cada array se serializa comprimido: (dtype, forma, bytes zlib)
+        def compress(value):
+            if isinstance(value, np.ndarray):
+                return ('ndarray', value.dtype.str, value.shape, zlib.compress(value.tobytes(), 6))
+            if isinstance(value, dict):
+                return {key: compress(item) for key, item in value.items()}
+            return value
+        return {'objects': compress(self.objects), 'precision': self.precision, 'delta': self.delta}
+
+    def __setstate__(self, state):
+        def decompress(value):
+            if isinstance(value, tuple) and len(value) == 4 and value[0] == 'ndarray':
+                _, dtype, shape, data = value
+                return np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape).copy()
+            if isinstance(value, dict):
+                return {key: decompress(item) for key, item in value.items()}
+            return value
+        self.objects = decompress(state['objects'])
+        self.precision = state['precision']
+        self.delta = state['delta']
+
+
+class _Missing:
+    def __repr__(self):
+        return '<missing>'
+
+
+_MISSING = _Missing()
+
+
+def _pack_masks(values):
+    has_key = np.fromiter((value is not _MISSING for value in values), dtype=bool, count=len(values))
+    is_none = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    masks = {'present': np.packbits(has_key & ~is_none)}
+    if not has_key.all():
+        masks['has_key'] = np.packbits(has_key)
+    if is_none.any():
+        masks['is_none'] = np.packbits(is_none)
+    return masks, has_key & ~is_none
+
+
+def _pack_field(key, values, track_ids, precision, delta):
+    """
+    Columnas de un campo, o None si sus valores no tienen un formato conocido.
+    """
+    present_values = [value for value in values if value is not _MISSING and value is not None]
+    if not present_values:
+        masks, _ = _pack_masks(values)
+        return {'kind': 'empty', **masks}
+
+    first = present_values[0]
+    if isinstance(first, np.ndarray):
+        container = 'ndarray'
+    elif isinstance(first, (list, tuple)):
+        container = type(first).__name__
+    else:
+        container = None
+
+    if key in PALETTE_FIELDS and container is not None:
+        try:
+            colors = np.asarray(present_values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return None
+        if colors.ndim != 2:
+            return None
+        palette, index = np.unique(colors, axis=0, return_inverse=True)
+        if len(palette) > 255:
+            return None
+        masks, _ = _pack_masks(values)
+        return {'kind': 'palette', 'container': container, 'palette': palette,
+                'index': index.reshape(-1).astype(np.uint8), **masks}
+
+    if key in CATEGORICAL_FIELDS and container is None:
+        if not all(_is_number(value) or isinstance(value, (bool, np.bool_)) for value in present_values):
+            return None
+        dtype = CATEGORICAL_FIELDS[key]
+        array = np.asarray(present_values)
+        if dtype is not np.bool_ and (array.min() < 0 or array.max() > np.iinfo(dtype).max
+                                      or not np.array_equal(array, np.rint(array))):
+            return None
+        masks, _ = _pack_masks(values)
+        value_type = 'bool' if isinstance(first, (bool, np.bool_)) else 'float' if isinstance(first, float) else 'int'
+        return {'kind': 'categorical', 'type': value_type, 'values': array.astype(dtype), **masks}
+
+    # Campos numéricos: escalares o vectores de longitud fija
+    if container is None:
+        if not all(_is_number(value) for value in present_values):
+            return None
+        width = 0
+    else:
+        width = len(first)
+        if not all(isinstance(value, (list, tuple, np.ndarray)) and len(value) == width for value in present_values):
+            return None
+    try:
+        array = np.asarray(present_values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    first_items = [first] if width == 0 else list(first)
+    integer = (all(isinstance(item, (int, np.integer)) for item in first_items)
+               and np.array_equal(array, np.rint(array)))
+
+    masks, present = _pack_masks(values)
+    packed = {'kind': 'numeric', 'container': container, 'width': width, 'integer': integer, **masks}
+
+    quantize = precision == 'quantized' and key in QUANTIZED_FIELDS
+    if quantize:
+        dtype, scale = QUANTIZED_FIELDS[key]
+        limits = np.iinfo(dtype)
+        scaled = np.rint(array * scale)
+        # Fuera de rango (o NaN) se guarda en float32 en lugar de recortar
+        quantize = bool(np.isfinite(scaled).all() and (scaled >= limits.min).all() and (scaled <= limits.max).all())
+
+    if quantize:
+        quantized = scaled.astype(dtype)
+        if delta:
+            quantized = delta_encode(quantized, track_ids[present])
+        packed.update(values=quantized, scale=scale, delta=delta)
+    elif integer and np.abs(array).max(initial=0) < 2 ** 31:
+        packed.update(values=array.astype(np.int32), scale=None, delta=False)
+    else:
+        packed.update(values=array.astype(np.float32), scale=None, delta=False)
+    return packed
+
+
+def _unpack_field(packed, track_ids, num_rows):
+    """
+    Genera (fila, valor) de un campo empaquetado.
+    """
+    present = np.unpackbits(packed['present'], count=num_rows).astype(bool)
+    if 'is_none' in packed:
+        for row in np.flatnonzero(np.unpackbits(packed['is_none'], count=num_rows)).tolist():
+            yield row, None
+    rows = np.flatnonzero(present).tolist()
+    kind = packed['kind']
+
+    if kind == 'empty':
+        return
+    if kind == 'palette':
+        colors = packed['palette'][packed['index']]
+        yield from zip(rows, _restore_containers(colors, packed['container']))
+        return
+    if kind == 'categorical':
+        cast = {'bool': bool, 'float': float}.get(packed['type'], int)
+        yield from zip(rows, (cast(value) for value in packed['values'].tolist()))
+        return
+
+    values = packed['values']
+    if packed['scale'] is not None:
+        if packed['delta']:
+            values = delta_decode(values, track_ids[present])
+        values = values.astype(np.float64) / packed['scale']
+        if packed['integer']:
+            values = np.rint(values).astype(np.int64)
+    elif not packed['integer']:
+        values = values.astype(np.float64)
+
+    if packed['width'] == 0:
+        yield from zip(rows, values.tolist())
+    else:
+        yield from zip(rows, _restore_containers(values, packed['container']))
+
+
+def _restore_containers(values, container):
+    if container == 'ndarray':
+        return list(values)
+    if container == 'tuple':
+        return [tuple(value) for value in values.tolist()]
+    return values.tolist()
+
+
+def pack_tracks(tracks, precision='float32', delta=False):
+    """
+    Atajo de PackedTracks.pack.
+    """
+    return PackedTracks.pack(tracks, precision, delta)
+
+
+def unpack_tracks(stored):
+    """
+    Devuelve tracks en el formato de dicts tanto si stored está empaquetado
+    como si ya son tracks (stubs antiguos).
+    """
+    return stored.unpack() if isinstance(stored, PackedTracks) else stored
@@ -1,5 +1,12 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
 import cv2 
 
+from . import progress
+
 def read_video(video_path):
     """
     Lee un archivo de video y extrae todos sus frames.
@@ -37,17 +44,34 @@ def read_video(video_path):
     
     return frames_list
 
-def save_video(output_video_frames, output_video_path):
+def get_video_fps(video_path, default=24):
+    """
+    Obtiene los frames por segundo de un archivo de video.
+    
+    Args:
+        video_path (str): Ruta al archivo de video
+        default (int): Valor a usar si el contenedor no informa los FPS
+        
+    Returns:
+        float: Frames por segundo del video
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    fps = video_capture.get(cv2.CAP_PROP_FPS)
+    video_capture.release()
+    
+    return fps if fps and fps > 0 else default
+
+def save_video(output_video_frames, output_video_path, fps=24):
     """
     Guarda una lista de frames como un archivo de video.
     
     Toma una secuencia de frames y los codifica en un archivo de video
-    usando el códec XVID. Mantiene las dimensiones originales de los frames
-    con una velocidad de reproducción fija de 24 FPS.
+    usando el códec XVID. Mantiene las dimensiones originales de los frames.
     
     Args:
         output_video_frames (list): Lista de frames como arrays numpy
         output_video_path (str): Ruta donde guardar el video resultante
+        fps (float): Frames por segundo del video resultante (el del video de entrada)
         
     Ejemplo:
         processed_frames = process_video(original_frames)
@@ -57,11 +81,101 @@ def save_video(output_video_frames, output_video_path):
     fourcc = cv2.VideoWriter_fourcc(*'XVID')
     
     # Crear objeto escritor de video con dimensiones del primer frame
-    out = cv2.VideoWriter(output_video_path, fourcc, 24, (output_video_frames[0].shape[1], output_video_frames[0].shape[0]))
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (output_video_frames[0].shape[1], output_video_frames[0].shape[0]))
     
     # Escribir cada frame al archivo de video
-    for frame in output_video_frames:
+    for frame in progress.track(output_video_frames, "saving"):
         out.write(frame)
     
     # Finalizar escritura y liberar recursos
-    out.release()
\ No newline at end of file
+    out.release()
+
+
+def concat_videos(part_paths, output_path, fps=24):
+    """
+    Une varios videos con el mismo códec y tamaño en uno solo.
+    
+    Usa ffmpeg con copia de stream si está disponible (sin recodificar) y, si no,
+    recodifica con OpenCV. El archivo final se escribe de forma atómica.
+    
+    Args:
+        part_paths (list): Videos a unir, en orden
+        output_path (str): Video resultante
+        fps (float): Frames por segundo (solo para la recodificación con OpenCV)
+    """
+    root, ext = os.path.splitext(output_path)
+    tmp_path = f"{root}.tmp{ext}"
+    
+    if shutil.which('ffmpeg'):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as list_file:
+            for part_path in part_paths:
+                list_file.write(f"file '{os.path.abspath(part_path)}'\n")
+        try:
+            subprocess.run([
+                'ffmpeg', '-y', '-loglevel', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_file.name, '-c', 'copy', tmp_path,
+            ], check=True)
+        finally:
+            os.remove(list_file.name)
+    else:
+        out = None
+        for part_path in part_paths:
+            video_capture = cv2.VideoCapture(part_path)
+            while True:
+                frame_exists, frame = video_capture.read()
+                if not frame_exists:
+                    break
+                if out is None:
+                    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+                    out = cv2.VideoWriter(tmp_path, fourcc, fps, (frame.shape[1], frame.shape[0]))
+                out.write(frame)
+            video_capture.release()
+        if out is not None:
+            out.release()
+    
+    os.replace(tmp_path, output_path)
+
+
+def save_video_resumable(video_frames, output_path, annotate_frame, checkpoint, chunk_size=500, fps=24):
+    """
+    Anota y guarda el video por partes, con un checkpoint tras cada parte.
+    
+    Cada parte de chunk_size frames se codifica en un archivo propio dentro del
+    directorio del checkpoint; si el proceso se interrumpe, al reanudar solo se
+    vuelven a anotar y codificar los frames de la parte en curso. Al terminar,
+    las partes se unen en output_path.
+    
+    Args:
+        video_frames (list): Frames originales
+        output_path (str): Video de salida
+        annotate_frame (callable): annotate_frame(frame, frame_num) dibuja sobre el frame in-place
+        checkpoint (StageCheckpoint): Checkpoint de la etapa de codificación
+        chunk_size (int): Frames por parte
+        fps (float): Frames por segundo del video de salida
+    """
+    saved = checkpoint.load()
+    part_names, next_frame = ([], 0) if saved is None else (saved[0], saved[1]['next_frame'])
+    ext = os.path.splitext(output_path)[1]
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    height, width = video_frames[0].shape[:2]
+    
+    progress.start_stage("saving", len(video_frames) - next_frame)
+    for chunk_start in range(next_frame, len(video_frames), chunk_size):
+        chunk_end = min(chunk_start + chunk_size, len(video_frames))
+        part_name = f"part_{chunk_start:08d}{ext}"
+        tmp_path = os.path.join(checkpoint.directory, f"part_{chunk_start:08d}.tmp{ext}")
+        os.makedirs(checkpoint.directory, exist_ok=True)
+        
+        out = cv2.VideoWriter(tmp_path, fourcc, fps, (width, height))
+        for frame_num in range(chunk_start, chunk_end):
+            out.write(annotate_frame(video_frames[frame_num].copy(), frame_num))
+            progress.advance()
+        out.release()
+        
+        os.replace(tmp_path, os.path.join(checkpoint.directory, part_name))
+        checkpoint.save(chunk_end, part_name, {})
+        part_names.append(part_name)
+    progress.finish_stage()
+    
+    concat_videos([os.path.join(checkpoint.directory, name) for name in part_names], output_path, fps)
+    checkpoint.clear()
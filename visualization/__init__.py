@@ -1 +1,2 @@
-from .heatmap_generator import HeatmapGenerator
\ No newline at end of file
+from .heatmap_generator import HeatmapGenerator
+from .annotation_renderer import AnnotationRenderer
@@ -0,0 +1,131 @@
+"""
+Dibujo por lotes de las anotaciones de un frame.
+
+La geometría de todos los objetos de un frame (elipses, etiquetas y
+triángulos) se calcula de una vez con numpy a partir de las cajas, y los
+paneles semitransparentes se mezclan solo en su región, con la capa de color
+precalculada, en lugar de copiar y mezclar el frame completo en cada frame.
+Los trazos y textos siguen usando las primitivas de OpenCV: medidas frente a
+plantillas de polilíneas y textos rasterizados en cache, son igual de rápidas
+o más y mantienen el mismo resultado (texto con antialiasing incluido).
+"""
+
+import cv2
+import numpy as np
+
+
+# Triángulo del balón/poseedor relativo a la parte superior central de la caja
+TRIANGLE_TEMPLATE = np.array([[0, 0], [-10, -20], [10, -20]], dtype=np.int32)
+
+
+class AnnotationRenderer:
+    """
+    Primitivas de dibujo por lotes (paneles, elipses, etiquetas, triángulos y textos).
+    """
+
+    def __init__(self):
+        # Capas de color de los paneles por (forma, color), reutilizadas entre frames
+        self.overlays = {}
+
+    def blend_rect(self, frame, top_left, bottom_right, color, alpha):
+        """
+        Dibuja un rectángulo semitransparente mezclando solo su región.
+
+        Equivale a dibujar el rectángulo relleno sobre una copia del frame y
+        mezclarla con alpha, sin copiar ni recorrer el resto del frame.
+
+        Args:
+            frame: Frame donde dibujar (in-place)
+            top_left (tuple): Esquina superior izquierda (x, y)
+            bottom_right (tuple): Esquina inferior derecha (x, y), incluida
+            color (tuple): Color BGR del rectángulo
+            alpha (float): Opacidad del rectángulo
+        """
+        (x1, y1), (x2, y2) = top_left, bottom_right
+        region = frame[max(y1, 0):y2 + 1, max(x1, 0):x2 + 1]
+        if region.size == 0:
+            return
+        key = (region.shape, tuple(color))
+        overlay = self.overlays.get(key)
+        if overlay is None:
+            overlay = self.overlays[key] = np.empty_like(region)
+            overlay[:] = color
+        cv2.addWeighted(overlay, alpha, region, 1 - alpha, 0, region)
+
+    def draw_ellipses(self, frame, bboxes, colors, thickness=2):
+        """
+        Dibuja el arco de la base de cada caja (de 45° a 235°).
+
+        Args:
+            frame: Frame donde dibujar (in-place)
+            bboxes (list): Cajas [x1, y1, x2, y2]
+            colors (list): Color BGR de cada caja
+            thickness (int): Grosor de la línea
+
+        Returns:
+            tuple: (centros x, bases y) enteros de cada caja, para las etiquetas
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        x_centers = ((bboxes[:, 0] + bboxes[:, 2]) / 2).astype(np.int32)
+        y_bottoms = bboxes[:, 3].astype(np.int32)
+        widths = bboxes[:, 2] - bboxes[:, 0]
+        axes = np.stack([widths, 0.35 * widths], axis=1).astype(np.int32)
+
+        for x_center, y_bottom, (major, minor), color in zip(x_centers.tolist(), y_bottoms.tolist(),
+                                                            axes.tolist(), colors):
+            cv2.ellipse(frame, (x_center, y_bottom), (major, minor), 0.0, 45, 235, color, thickness, cv2.LINE_4)
+        return x_centers, y_bottoms
+
+    def draw_labels(self, frame, x_centers, y_bottoms, track_ids, colors):
+        """
+        Dibuja la etiqueta con el ID de cada track bajo su elipse.
+
+        Args:
+            frame: Frame donde dibujar (in-place)
+            x_centers, y_bottoms: Posición de cada elipse (de draw_ellipses)
+            track_ids (list): ID de cada track
+            colors (list): Color BGR del fondo de cada etiqueta
+        """
+        height, width = frame.shape[:2]
+        texts, origins = [], []
+        for x_center, y_bottom, track_id, color in zip(x_centers.tolist(), y_bottoms.tolist(), track_ids, colors):
+            # Rectángulo de 40x20 centrado 15 píxeles por debajo de la base
+            x1, y1 = x_center - 20, y_bottom + 5
+            frame[max(y1, 0):min(y1 + 21, height), max(x1, 0):min(x1 + 41, width)] = color
+            texts.append(f"{track_id}")
+            origins.append((x1 + 12 - (10 if track_id > 99 else 0), y1 + 15))
+
+        self.draw_texts(frame, texts, origins, 0.6, [(0, 0, 0)] * len(texts), 2)
+
+    def draw_triangles(self, frame, bboxes, color):
+        """
+        Dibuja un triángulo relleno con borde negro sobre cada caja.
+
+        Args:
+            frame: Frame donde dibujar (in-place)
+            bboxes (list): Cajas [x1, y1, x2, y2]
+            color (tuple): Color BGR del relleno
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        if len(bboxes) == 0:
+            return
+        tips = np.stack([((bboxes[:, 0] + bboxes[:, 2]) / 2).astype(np.int32),
+                         bboxes[:, 1].astype(np.int32)], axis=1)
+        triangles = list(TRIANGLE_TEMPLATE[None] + tips[:, None])
+        cv2.fillPoly(frame, triangles, color)
+        cv2.polylines(frame, triangles, True, (0, 0, 0), 2)
+
+    def draw_texts(self, frame, texts, origins, font_scale, colors, thickness=1):
+        """
+        Dibuja varios textos con FONT_HERSHEY_SIMPLEX.
+
+        Args:
+            frame: Frame donde dibujar (in-place)
+            texts (list): Textos
+            origins (list): Esquina inferior izquierda de cada texto, como en cv2.putText
+            font_scale (float): Escala de la fuente
+            colors (list): Color BGR de cada texto
+            thickness (int): Grosor del trazo
+        """
+        for text, origin, color in zip(texts, origins, colors):
+            cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
@@ -1,28 +1,262 @@
 """
 Módulo para generar mapas de calor de posiciones en el campo de fútbol.
+
+Los mapas se acumulan como histogramas 2D sobre las posiciones transformadas
+('position_transformed', en metros). Todos los mapas (por jugador, por equipo y
+del balón) se obtienen en una sola pasada sobre los tracks, o incrementalmente
+con update() a medida que se procesan los frames.
 """
 
+import os
+
 import numpy as np
-from typing import Dict, Any
-import matplotlib.pyplot as plt
+from typing import Dict, Any, List, Optional
+
+
+def gaussian_smooth(grid: np.ndarray, sigma: float) -> np.ndarray:
+    """
+    Suaviza una matriz 2D con un kernel gaussiano separable.
+
+    Args:
+        grid: Matriz 2D a suavizar
+        sigma: Desviación estándar del kernel en celdas
+
+    Returns:
+        np.ndarray: Matriz suavizada del mismo tamaño
+    """
+    if not sigma or sigma <= 0:
+        return grid.astype(np.float64)
+
+    radius = max(1, int(3 * sigma))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+
+    smoothed = grid.astype(np.float64)
+    for axis in (0, 1):
+        smoothed = np.apply_along_axis(np.convolve, axis, smoothed, kernel, mode='same')
+    return smoothed
+
 
 class HeatmapGenerator:
     """
     Genera mapas de calor de posiciones de jugadores o balón.
     """
-    def __init__(self, tracks: Dict[str, Any]):
+    def __init__(self, tracks: Optional[Dict[str, Any]] = None, pitch_length: float = 105.0,
+                 pitch_width: float = 68.0, cell_size: float = 1.0):
+        """
+        tracks: dict con información de tracking (None para acumular con update())
+        pitch_length, pitch_width: dimensiones del campo en metros
+        cell_size: tamaño de cada celda del histograma en metros
+        """
         self.tracks = tracks
+        self.pitch_length = pitch_length
+        self.pitch_width = pitch_width
+        self.cell_size = cell_size
+
+        self.num_x = int(np.ceil(pitch_length / cell_size))
+        self.num_y = int(np.ceil(pitch_width / cell_size))
+        self.num_cells = self.num_x * self.num_y
+
+        # Acumuladores por equipo y para el balón (una fila de celdas). Los de jugador
+        # son dispersos: claves ordenadas player_id * num_cells + celda con su cuenta,
+        # porque ByteTrack fragmenta los IDs y la mayoría pisa pocas celdas
+        self.player_keys = np.zeros(0, dtype=np.int64)
+        self.player_values = np.zeros(0, dtype=np.int64)
+        self.team_counts: Dict[int, np.ndarray] = {}
+        self.ball_counts = np.zeros(self.num_cells, dtype=np.int64)
+
+        # Posiciones pendientes de volcar a los acumuladores
+        self._pending_ids = []
+        self._pending_teams = []
+        self._pending_xy = []
+        self._pending_ball = []
+        self._accumulated = False
+
+    def update(self, player_track: Dict[int, Any], ball_track: Optional[Dict[int, Any]] = None):
+        """
+        Añade las posiciones de un frame a los acumuladores.
+
+        Args:
+            player_track: Dict {player_id: info} de los jugadores en el frame
+            ball_track: Dict {1: info} del balón en el frame (opcional)
+        """
+        for player_id, info in player_track.items():
+            position = info.get('position_transformed')
+            if position is None:
+                continue
+            self._pending_ids.append(player_id)
+            self._pending_teams.append(info.get('team') or 0)
+            self._pending_xy.append(position)
+
+        if ball_track:
+            position = ball_track.get(1, {}).get('position_transformed')
+            if position is not None:
+                self._pending_ball.append(position)
+
+        # Volcar periódicamente para no acumular listas grandes
+        if len(self._pending_xy) >= 100000:
+            self._flush()
+
+    def _cells(self, positions: np.ndarray):
+        """
+        Convierte posiciones (n, 2) en metros a índices de celda.
+        Returns: (índices de celda, máscara de posiciones dentro del campo)
+        """
+        cols = np.floor(positions[:, 0] / self.cell_size).astype(np.int64)
+        rows = np.floor(positions[:, 1] / self.cell_size).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.num_x) & (rows >= 0) & (rows < self.num_y)
+        return rows[inside] * self.num_x + cols[inside], inside
+
+    def _flush(self):
+        """
+        Vuelca las posiciones pendientes a los histogramas (bincount por equipo y
+        balón; por jugador, solo las celdas pisadas).
+        """
+        if self._pending_xy:
+            ids = np.asarray(self._pending_ids, dtype=np.int64)
+            teams = np.asarray(self._pending_teams, dtype=np.int64)
+            cells, inside = self._cells(np.asarray(self._pending_xy, dtype=np.float64))
+            ids, teams = ids[inside], teams[inside]
+
+            # Sumar las cuentas nuevas a las claves ya vistas (solo las celdas pisadas)
+            keys, inverse = np.unique(np.concatenate([self.player_keys, ids * self.num_cells + cells]),
+                                      return_inverse=True)
+            inverse = inverse.ravel()
+            values = np.bincount(inverse[len(self.player_keys):], minlength=len(keys))
+            # Las claves anteriores son únicas: basta una suma indexada sin repeticiones
+            values[inverse[:len(self.player_keys)]] += self.player_values
+            self.player_keys, self.player_values = keys, values
+
+            for team in np.unique(teams).tolist():
+                team_cells = cells[teams == team]
+                counts = self.team_counts.setdefault(team, np.zeros(self.num_cells, dtype=np.int64))
+                counts += np.bincount(team_cells, minlength=self.num_cells)
 
-    def generate_player_heatmap(self, player_id: int, save_path: str = None):
+        if self._pending_ball:
+            cells, _ = self._cells(np.asarray(self._pending_ball, dtype=np.float64))
+            self.ball_counts += np.bincount(cells, minlength=self.num_cells)
+
+        self._pending_ids, self._pending_teams, self._pending_xy, self._pending_ball = [], [], [], []
+
+    def accumulate(self):
+        """
+        Recorre una sola vez los tracks completos y llena todos los acumuladores.
+        """
+        if self._accumulated or self.tracks is None:
+            return
+        players = self.tracks.get('players', [])
+        balls = self.tracks.get('ball', [])
+        for frame_num, player_track in enumerate(players):
+            self.update(player_track, balls[frame_num] if frame_num < len(balls) else None)
+        self._accumulated = True
+
+    def _grid(self, counts: np.ndarray, sigma: float) -> np.ndarray:
+        return gaussian_smooth(counts.reshape(self.num_y, self.num_x), sigma)
+
+    def get_player_heatmap(self, player_id: int, sigma: float = 0.0) -> Optional[np.ndarray]:
+        """
+        Devuelve el histograma (num_y, num_x) de un jugador, o None si no tiene posiciones.
+        """
+        self.accumulate()
+        self._flush()
+        first, last = np.searchsorted(self.player_keys, [player_id * self.num_cells,
+                                                         (player_id + 1) * self.num_cells])
+        if first == last:
+            return None
+        counts = np.zeros(self.num_cells, dtype=np.int64)
+        counts[self.player_keys[first:last] - player_id * self.num_cells] = self.player_values[first:last]
+        return self._grid(counts, sigma)
+
+    def get_team_heatmap(self, team: int, sigma: float = 0.0) -> Optional[np.ndarray]:
+        """
+        Devuelve el histograma (num_y, num_x) de un equipo, o None si no tiene posiciones.
+        """
+        self.accumulate()
+        self._flush()
+        if team not in self.team_counts:
+            return None
+        return self._grid(self.team_counts[team], sigma)
+
+    def get_ball_heatmap(self, sigma: float = 0.0) -> np.ndarray:
+        """
+        Devuelve el histograma (num_y, num_x) del balón.
+        """
+        self.accumulate()
+        self._flush()
+        return self._grid(self.ball_counts, sigma)
+
+    def render(self, heatmap: np.ndarray, save_path: str, title: str = ""):
+        """
+        Dibuja un mapa de calor sobre el contorno del campo y lo guarda en disco.
+
+        Usa el backend Agg de matplotlib directamente, sin pyplot, por lo que
+        funciona sin entorno gráfico. matplotlib solo se importa al renderizar.
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.patches import Rectangle
+
+        figure = Figure(figsize=(10.5, 6.8))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot(1, 1, 1)
+
+        axes.imshow(heatmap, cmap='hot', interpolation='bilinear', origin='upper',
+                    extent=(0, self.pitch_length, self.pitch_width, 0))
+        axes.add_patch(Rectangle((0, 0), self.pitch_length, self.pitch_width,
+                                 fill=False, edgecolor='white', linewidth=2))
+        axes.plot([self.pitch_length / 2] * 2, [0, self.pitch_width], color='white', linewidth=1)
+        axes.set_xlim(0, self.pitch_length)
+        axes.set_ylim(self.pitch_width, 0)
+        axes.set_title(title)
+        axes.set_axis_off()
+
+        figure.savefig(save_path, bbox_inches='tight')
+
+    def generate_player_heatmap(self, player_id: int, save_path: str = None, sigma: float = 1.5):
         """
         Genera y guarda un mapa de calor para un jugador específico.
         """
-        # Implementación pendiente
-        pass
+        heatmap = self.get_player_heatmap(player_id, sigma)
+        if heatmap is not None and save_path:
+            self.render(heatmap, save_path, f"Jugador {player_id}")
+        return heatmap
 
-    def generate_ball_heatmap(self, save_path: str = None):
+    def generate_team_heatmap(self, team: int, save_path: str = None, sigma: float = 1.5):
+        """
+        Genera y guarda un mapa de calor para un equipo.
+        """
+        heatmap = self.get_team_heatmap(team, sigma)
+        if heatmap is not None and save_path:
+            self.render(heatmap, save_path, f"Equipo {team}")
+        return heatmap
+
+    def generate_ball_heatmap(self, save_path: str = None, sigma: float = 1.5):
         """
         Genera y guarda un mapa de calor para la trayectoria del balón.
         """
-        # Implementación pendiente
-        pass 
\ No newline at end of file
+        heatmap = self.get_ball_heatmap(sigma)
+        if save_path:
+            self.render(heatmap, save_path, "Balón")
+        return heatmap
+
+    def save_match_heatmaps(self, output_dir: str, prefix: str = "", sigma: float = 1.5) -> List[str]:
+        """
+        Guarda los mapas de calor de cada equipo y del balón en output_dir.
+
+        Returns:
+            list: Rutas de las imágenes generadas
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.accumulate()
+        self._flush()
+
+        paths = []
+        for team in sorted(team for team in self.team_counts if team):
+            path = os.path.join(output_dir, f"{prefix}heatmap_team_{team}.png")
+            self.generate_team_heatmap(team, path, sigma)
+            paths.append(path)
+        path = os.path.join(output_dir, f"{prefix}heatmap_ball.png")
+        self.generate_ball_heatmap(path, sigma)
+        paths.append(path)
+        return paths